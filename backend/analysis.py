@@ -0,0 +1,341 @@
+"""
+Shared analysis entry points for the API routes
+Season analyses are memoized across /analyze, /wrapped and /gasp-previews,
+and identical concurrent requests (e.g. a whole league opening a shared link
+at once) are coalesced so the pipeline runs once per set of arguments.
+Each league season keeps a SeasonLedger of folded weeks, so a stale result
+only fetches and folds the weeks whose data changed, and a new week range
+is assembled from prefix sums without touching ESPN.
+stream_season_analysis runs the same pipeline as a generator of per-week
+progress events for streaming responses, reporting each week as soon as
+it's fetched.
+Finished season, draft and waiver analyses are also written to the shared
+store (caching.shared_store), so other workers and nodes reuse them while
+the week data they were computed from is unchanged.
+"""
+import os
+import threading
+from collections import namedtuple
+
+import http_client
+from caching import LRUCache, SingleFlight, schema_fingerprint, shared_store
+from espn_api import (
+    fetch_week_bundle,
+    fetch_week_range,
+    fetch_week_version,
+    get_lineup_slot_counts,
+    get_team_name_map,
+    iter_week_range
+)
+from stats.draft_analyzer import analyze_draft
+from stats.season_analyzer import fold_week, fold_weeks, analyze_ledger_range
+from stats.player_week import PLAYER_WEEK_FIELDS
+from stats.season_ledger import SeasonLedger
+from stats.team_calculator import initialize_team_stats
+from stats.waiver_analyzer import analyze_waivers
+
+# Memory budget for memoized analyze_season results (LRU-evicted beyond this)
+ANALYSIS_CACHE_MAX_MB = int(os.getenv('ANALYSIS_CACHE_MAX_MB', 128))
+
+# Memory budget for per-season ledgers of folded weeks
+LEDGER_CACHE_MAX_MB = int(os.getenv('LEDGER_CACHE_MAX_MB', 64))
+
+# How long finished analyses are kept in the shared store (they're also
+# checked against the current week versions on every read)
+ANALYSIS_STORE_TTL = int(os.getenv('ANALYSIS_STORE_TTL', 7 * 24 * 3600))
+
+# Record runs (ESPN_FIXTURE_MODE=record) recompute analyses rather than reuse
+# ones another worker stored, so every ESPN request they depend on is recorded
+REUSE_STORED_RESULTS = http_client.FIXTURE_MODE != 'record'
+
+season_results = LRUCache(max_bytes=ANALYSIS_CACHE_MAX_MB * 1024 * 1024)
+season_ledgers = LRUCache(max_bytes=LEDGER_CACHE_MAX_MB * 1024 * 1024)
+_ledger_lock = threading.Lock()
+season_flight = SingleFlight()
+
+# Draft and waiver analyses (the dashboard's other pillars)
+pillar_flight = SingleFlight()
+
+# Bump when a result's shape changes in a way the fingerprints below can't
+# see (e.g. new post-season or league stats), so stored results written by
+# older code read as misses
+RESULT_FORMAT_VERSION = 1
+
+STORE_SCHEMAS = {
+    'season': schema_fingerprint('season', RESULT_FORMAT_VERSION, initialize_team_stats(), PLAYER_WEEK_FIELDS),
+    'draft': schema_fingerprint('draft', RESULT_FORMAT_VERSION),
+    'waivers': schema_fingerprint('waivers', RESULT_FORMAT_VERSION),
+}
+
+# What a season analysis is computed from: one content version per week, the
+# league's lineup settings, and their combined fingerprint (None if any week
+# couldn't be versioned)
+AnalysisInputs = namedtuple('AnalysisInputs', ['week_versions', 'lineup_slots', 'versions'])
+
+
+def _week_versions(league_id, year, start_week, end_week):
+    """Content version per week in the range (None where a week couldn't be versioned)."""
+    weeks = fetch_week_range(league_id, year, start_week, end_week, fetch_week_version)
+    return tuple(version for _week, version, _error in weeks)
+
+
+def _data_versions(week_versions, team_name_map, lineup_slots):
+    """
+    Fingerprint the inputs of a season analysis: one content version per week
+    plus the team names and lineup settings. Returns None if any week
+    couldn't be versioned.
+    """
+    if None in week_versions:
+        return None
+    return week_versions + (repr(sorted(team_name_map.items())), lineup_slots)
+
+
+def get_analysis_inputs(league_id, year, start_week, end_week, team_name_map):
+    """
+    Version the inputs of a season analysis without running it, e.g. to
+    derive a response ETag before deciding whether to compute anything.
+    """
+    week_versions = _week_versions(league_id, year, start_week, end_week)
+    lineup_slots, _ = get_lineup_slot_counts(league_id, year)
+    versions = _data_versions(week_versions, team_name_map, lineup_slots)
+    return AnalysisInputs(week_versions, lineup_slots, versions)
+
+
+def _get_ledger(league_id, year, lineup_slots):
+    """
+    The league season's ledger (per lineup configuration, since a settings
+    change re-optimizes every week). Created and registered atomically, so
+    concurrent analyses of a new league share one ledger.
+    """
+    ledger_key = (str(league_id), year, lineup_slots)
+    with _ledger_lock:
+        ledger = season_ledgers.get(ledger_key)
+        if ledger is None:
+            ledger = SeasonLedger()
+            season_ledgers.set(ledger_key, ledger)
+    return ledger_key, ledger
+
+
+def _refresh_ledger(ledger, league_id, year, start_week, end_week, week_versions, fetch_errors):
+    """
+    Bring a ledger up to date for the range. Weeks already folded at their
+    current version are neither fetched nor re-optimized; stale weeks are
+    fetched concurrently, then folded in order with all of their lineups
+    optimized in one batch. Weeks that fail to fetch are dropped from the
+    ledger and their message added to fetch_errors.
+    """
+    stale = [
+        week for week, version in zip(range(start_week, end_week + 1), week_versions)
+        if version is None or ledger.version(week) != version
+    ]
+    if not stale:
+        return
+
+    refolds = []
+    for week, bundle, error in iter_week_range(league_id, year, stale[0], stale[-1], fetch_week_bundle):
+        if week not in stale:
+            continue
+        if error or not bundle:
+            fetch_errors[week] = f"Week {week}: {error or 'No data'}"
+            ledger.drop_week(week)
+            continue
+        refolds.append((week, bundle['version'], bundle))
+    fold_weeks(ledger, refolds)
+
+
+def _run_season_analysis(league_id, year, start_week, end_week, team_name_map, week_versions, lineup_slots,
+                         advanced_stats=True):
+    """Bring the league's ledger up to date for the range and build the result."""
+    ledger_key, ledger = _get_ledger(league_id, year, lineup_slots)
+
+    with ledger.lock:
+        fetch_errors = {}
+        _refresh_ledger(ledger, league_id, year, start_week, end_week, week_versions, fetch_errors)
+        result = analyze_ledger_range(
+            ledger, start_week, end_week, team_name_map, fetch_errors, advanced_stats
+        )
+
+    # Re-set so the LRU re-measures the ledger after it grew
+    season_ledgers.set(ledger_key, ledger)
+    return result
+
+
+def _store_key(key, advanced_stats):
+    # Full and summary results are stored separately so neither replaces the other
+    return key + ('full' if advanced_stats else 'summary',)
+
+
+def _remember_result(key, versions, advanced_stats, result, share=True):
+    """
+    Memoize a season result in this worker (never letting a summary replace
+    a current full one) and, with share=True, in the shared store.
+    """
+    if versions is None:
+        return
+    cached = season_results.get(key)
+    full_is_current = cached is not None and cached['versions'] == versions and cached['advanced_stats']
+    entry = {'versions': versions, 'advanced_stats': advanced_stats, 'result': result}
+    if advanced_stats or not full_is_current:
+        season_results.set(key, entry)
+    if share:
+        shared_store.set(
+            'season', _store_key(key, advanced_stats), entry,
+            ttl=ANALYSIS_STORE_TTL, schema=STORE_SCHEMAS['season']
+        )
+
+
+def _memoized_result(key, versions, advanced_stats):
+    """
+    A memoized result that's current for versions and has what the caller
+    needs (from this worker, else the shared store), or None.
+    """
+    if versions is None:
+        return None
+    cached = season_results.get(key)
+    if cached is not None and cached['versions'] == versions and (cached['advanced_stats'] or not advanced_stats):
+        return cached['result']
+
+    if not REUSE_STORED_RESULTS:
+        return None
+    for full in ((True,) if advanced_stats else (True, False)):
+        stored = shared_store.get('season', _store_key(key, full), schema=STORE_SCHEMAS['season'])
+        if stored is not None and stored['versions'] == versions:
+            _remember_result(key, versions, full, stored['result'], share=False)
+            return stored['result']
+    return None
+
+
+def get_season_analysis(league_id, year, start_week, end_week, team_name_map, advanced_stats=True,
+                        inputs=None):
+    """
+    Run analyze_season, reusing a memoized result while the underlying week
+    data is unchanged and sharing the work with concurrent identical callers.
+
+    advanced_stats=False skips the per-team advanced stats for callers that
+    won't return them; a memoized full result still satisfies those calls.
+    Pass inputs if the caller already has them from get_analysis_inputs.
+
+    The result is shared between requests and must be treated as read-only.
+    """
+    key = (str(league_id), year, start_week, end_week)
+    if inputs is None:
+        inputs = get_analysis_inputs(league_id, year, start_week, end_week, team_name_map)
+    week_versions, lineup_slots, versions = inputs
+
+    cached = _memoized_result(key, versions, advanced_stats)
+    if cached is not None:
+        return cached
+
+    result = season_flight.do(
+        key + (advanced_stats,), _run_season_analysis,
+        league_id, year, start_week, end_week, team_name_map, week_versions, lineup_slots, advanced_stats
+    )
+    _remember_result(key, versions, advanced_stats, result)
+    return result
+
+
+def stream_season_analysis(league_id, year, start_week, end_week, team_name_map, advanced_stats=True):
+    """
+    get_season_analysis as a stream of progress events.
+
+    There's no up-front versioning pass: weeks are fetched concurrently and
+    each one is reported as soon as it (and every week before it) arrives,
+    so progress shows during the slow ESPN round trips. Each week is checked
+    against the ledger and folded only if its version changed, under the
+    ledger lock so concurrent analyses never fold the same week twice. Once
+    every week is versioned, a current memoized result is reused; otherwise
+    the result is built and memoized like get_season_analysis's.
+
+    Yields:
+        ('week', {week, status, error, matchups, totals}) for each week in
+        order, where status is 'cached', 'folded' or 'error' and totals are
+        each team's season-to-date counters, then ('result', result) with
+        the analyze_season result (read-only)
+    """
+    key = (str(league_id), year, start_week, end_week)
+    lineup_slots, _ = get_lineup_slot_counts(league_id, year)
+    ledger_key, ledger = _get_ledger(league_id, year, lineup_slots)
+
+    fetch_errors = {}
+    week_versions = []
+    for week, bundle, error in iter_week_range(league_id, year, start_week, end_week, fetch_week_bundle):
+        version = None
+        with ledger.lock:
+            if error or not bundle:
+                fetch_errors[week] = f"Week {week}: {error or 'No data'}"
+                ledger.drop_week(week)
+                status = 'error'
+            else:
+                version = bundle['version']
+                if version is not None and ledger.version(week) == version:
+                    status = 'cached'
+                else:
+                    ledger.set_week(week, version, bundle, fold_week)
+                    status = 'folded'
+        week_versions.append(version)
+
+        yield 'week', {
+            'week': week,
+            'status': status,
+            'error': fetch_errors.get(week),
+            'matchups': ledger.matchup_count(week),
+            'totals': {
+                team_id: {field: round(value, 2) for field, value in totals.items()}
+                for team_id, totals in ledger.running_totals(start_week, week).items()
+            },
+        }
+    season_ledgers.set(ledger_key, ledger)
+
+    versions = _data_versions(tuple(week_versions), team_name_map, lineup_slots)
+    cached = _memoized_result(key, versions, advanced_stats)
+    if cached is not None:
+        yield 'result', cached
+        return
+
+    with ledger.lock:
+        result = analyze_ledger_range(
+            ledger, start_week, end_week, team_name_map, fetch_errors, advanced_stats
+        )
+    _remember_result(key, versions, advanced_stats, result)
+    yield 'result', result
+
+
+def _shared_pillar_analysis(namespace, analyze_func, league_id, year, start_week, end_week):
+    """
+    Run a league-wide draft / waiver analysis, reusing a shared-store result
+    computed from the same week data and team names, and joining an
+    identical in-flight call (e.g. a still-pending gasp-preview pillar).
+
+    Returns:
+        (result, error) as returned by analyze_func
+    """
+    key = (str(league_id), year, start_week, end_week)
+    week_versions = _week_versions(league_id, year, start_week, end_week)
+    team_name_map, _ = get_team_name_map(league_id, year)
+    versions = _data_versions(week_versions, team_name_map or {}, None)
+
+    schema = STORE_SCHEMAS[namespace]
+    reuse = REUSE_STORED_RESULTS and versions is not None
+    stored = shared_store.get(namespace, key, schema=schema) if reuse else None
+    if stored is not None and stored['versions'] == versions:
+        return stored['result'], None
+
+    result, error = pillar_flight.do(
+        (namespace,) + key, analyze_func, league_id, year, start_week, end_week
+    )
+    if not error and versions is not None:
+        shared_store.set(
+            namespace, key, {'versions': versions, 'result': result},
+            ttl=ANALYSIS_STORE_TTL, schema=schema
+        )
+    return result, error
+
+
+def get_draft_analysis(league_id, year, start_week, end_week):
+    """analyze_draft through the shared store (see _shared_pillar_analysis)."""
+    return _shared_pillar_analysis('draft', analyze_draft, league_id, year, start_week, end_week)
+
+
+def get_waiver_analysis(league_id, year, start_week, end_week):
+    """analyze_waivers through the shared store (see _shared_pillar_analysis)."""
+    return _shared_pillar_analysis('waivers', analyze_waivers, league_id, year, start_week, end_week)
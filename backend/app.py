@@ -2,24 +2,48 @@
 Fantasy Football Wrapped - Flask API
 """
 import os
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 
+import http_client
+from analysis import (
+    get_analysis_inputs,
+    get_season_analysis,
+    get_draft_analysis,
+    get_waiver_analysis,
+    pillar_flight,
+    stream_season_analysis,
+    season_flight,
+    season_results,
+    season_ledgers
+)
 from espn_api import (
     get_team_name_map,
-    fetch_league_data,
-    get_league_info
+    fetch_week_bundle,
+    get_league_info,
+    get_season_plan,
+    clamp_week_range,
+    week_cache,
+    fetch_flight,
+    refresh_stats
 )
-from stats import analyze_season, format_team_wrapped
+from caching import shared_store
+from stats import format_team_wrapped
 from stats.weekly_analyzer import analyze_week, generate_week_summaries, find_one_player_away_losses
-from stats.draft_analyzer import analyze_draft, calculate_draft_alternatives
-from stats.waiver_analyzer import analyze_waivers
-from stats.team_calculator import detect_undefeated_optimal, detect_perfect_lineup_losses
+from stats.draft_analyzer import calculate_draft_alternatives
+from gasp_previews import get_gasp_previews
+from stats.lineup_optimizer import lineup_cache
+from responses import AppJSONProvider, finalize_json_response, request_etag, etag_matches, not_modified
+from utils.fieldsets import parse_fields, parse_include, selects, select_fields, drop_sections
 
 # Get the path to the frontend directory (one level up from backend)
 FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend')
 
+
+
 app = Flask(__name__, static_folder=os.path.join(FRONTEND_DIR, 'static'))
+app.json = AppJSONProvider(app)
+app.after_request(finalize_json_response)
 CORS(app)
 
 # Configuration
@@ -27,6 +51,10 @@ DEFAULT_YEAR = 2025
 DEFAULT_START_WEEK = 1
 DEFAULT_END_WEEK = 14
 
+# Heavy sections that include= can leave out (all are returned by default)
+ANALYZE_SECTIONS = ('weekly_data', 'advanced_stats')
+WRAPPED_SECTIONS = ('weekly_data', 'advanced_stats', 'league_context')
+
 
 # ===== Frontend Routes =====
 
@@ -104,6 +132,61 @@ def serve_static(filename):
 
 # ===== API Routes =====
 
+def get_fieldset(sections):
+    """
+    Read the fields= / include= query parameters.
+
+    Returns:
+        (fields, include, error): parsed field paths (None = everything),
+        included heavy sections, and an error message for bad input
+    """
+    fields = parse_fields(request.args.get('fields'))
+    include, error = parse_include(request.args.get('include'), sections)
+    return fields, include, error
+
+
+def get_week_range(league_id, year):
+    """
+    Read the start_week= / end_week= query parameters, clamped by the
+    league's season plan to weeks that can have data (completed weeks plus
+    the current one), so weeks that haven't been played aren't fetched.
+
+    Returns:
+        tuple: (start_week, end_week, error string or None) - error is set
+        when no requested week has been played yet
+    """
+    start_week = request.args.get('start_week', DEFAULT_START_WEEK, type=int)
+    end_week = request.args.get('end_week', DEFAULT_END_WEEK, type=int)
+    if end_week < start_week:
+        return start_week, end_week, f'end_week ({end_week}) is before start_week ({start_week})'
+
+    plan, _ = get_season_plan(league_id, year)
+    start_week, end_week = clamp_week_range(plan, start_week, end_week)
+    if end_week < start_week:
+        return start_week, end_week, (
+            f"Week {start_week} hasn't been played yet "
+            f"(current week is {plan.current_week})"
+        )
+    return start_week, end_week, None
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """ESPN client and cache counters (watch 'throttled' / 'retries' for ESPN rate limiting)"""
+    return jsonify({
+        'http': http_client.get_stats(),
+        'espn_cache': week_cache.stats(),
+        'espn_refresh': refresh_stats(),
+        'coalesced_fetches': fetch_flight.stats(),
+        'coalesced_analyses': season_flight.stats(),
+        'coalesced_pillars': pillar_flight.stats(),
+        'analysis_cache': season_results.stats(),
+        'season_ledgers': season_ledgers.stats(),
+        'lineup_cache': lineup_cache.stats(),
+        'shared_store': shared_store.stats(),
+    })
+
+
 @app.route('/api/league/<league_id>/info', methods=['GET'])
 def league_info(league_id):
     """Get basic league information"""
@@ -139,63 +222,153 @@ def league_teams(league_id):
     return jsonify({'teams': teams})
 
 
+def wants_stream():
+    """Whether the client asked for the streaming (NDJSON) variant of a route."""
+    return request.args.get('stream', 'false').lower() in ('1', 'true', 'ndjson')
+
+
+def stream_analysis(league_id, year, start_week, end_week, team_name_map, advanced_stats, build_body):
+    """
+    Streaming variant of a season analysis route, as NDJSON: one
+    {"event": "week", ...} line per week as it's processed (status, matchups
+    and every team's season-to-date totals), then {"event": "result",
+    "data": ...} with the route's usual body, or {"event": "error", ...}.
+
+    Args:
+        build_body: Function(results) -> (body, error) building the route's body
+    """
+    def events():
+        try:
+            for event, payload in stream_season_analysis(
+                league_id, year, start_week, end_week, team_name_map, advanced_stats
+            ):
+                if event == 'week':
+                    yield app.json.dumps({'event': 'week', **payload}) + '\n'
+                    continue
+                body, error = build_body(payload)
+                if error:
+                    yield app.json.dumps({'event': 'error', 'error': error}) + '\n'
+                else:
+                    yield app.json.dumps({'event': 'result', 'data': body}) + '\n'
+        except Exception as e:
+            yield app.json.dumps({'event': 'error', 'error': str(e)}) + '\n'
+
+    response = app.response_class(stream_with_context(events()), mimetype='application/x-ndjson')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @app.route('/api/league/<league_id>/analyze', methods=['GET'])
 def analyze_league(league_id):
-    """Analyze full season for all teams"""
+    """
+    Analyze full season for all teams
+
+    Optional query parameters:
+        fields: comma-separated sub-trees to return, e.g.
+            "league_stats,team_stats.total_points" (team_stats.<field>
+            selects that field for every team)
+        include: per-team heavy sections to keep (weekly_data,
+            advanced_stats); "none" returns a summary without either.
+            Sections left out are not computed.
+        stream: "1" streams per-week progress as NDJSON (see stream_analysis)
+    """
     year = request.args.get('year', DEFAULT_YEAR, type=int)
-    start_week = request.args.get('start_week', DEFAULT_START_WEEK, type=int)
-    end_week = request.args.get('end_week', DEFAULT_END_WEEK, type=int)
-    
+    start_week, end_week, error = get_week_range(league_id, year)
+    if error:
+        return jsonify({'error': error}), 400
+
+    fields, include, error = get_fieldset(ANALYZE_SECTIONS)
+    if error:
+        return jsonify({'error': error}), 400
+    if fields is not None:
+        fields = tuple(
+            ('team_stats', '*') + path[1:] if path[0] == 'team_stats' and len(path) > 1 else path
+            for path in fields
+        )
+    advanced_stats = 'advanced_stats' in include and selects(fields, ('team_stats', '*', 'advanced_stats'))
+
     team_name_map, error = get_team_name_map(league_id, year)
     if error:
         return jsonify({'error': error}), 400
+
+    def build_body(results):
+        team_stats = results['team_stats']
+        left_out = set(ANALYZE_SECTIONS) - include
+        if left_out:
+            team_stats = {
+                team_id: drop_sections(stats, left_out) for team_id, stats in team_stats.items()
+            }
+
+        return select_fields({
+            'league_id': league_id,
+            'year': year,
+            'weeks_analyzed': f"{start_week}-{end_week}",
+            'team_stats': team_stats,
+            'league_stats': results['league_stats'],
+            'team_names': team_name_map,
+            'processing_errors': results['processing_errors']
+        }, fields), None
     
     try:
-        results = analyze_season(
+        if wants_stream():
+            return stream_analysis(
+                league_id, year, start_week, end_week, team_name_map, advanced_stats, build_body
+            )
+
+        inputs = get_analysis_inputs(league_id, year, start_week, end_week, team_name_map)
+        etag = request_etag(inputs.versions)
+        if etag_matches(etag):
+            return not_modified(etag)
+
+        results = get_season_analysis(
             league_id, 
             year, 
             start_week, 
             end_week,
             team_name_map,
-            fetch_league_data
+            advanced_stats=advanced_stats,
+            inputs=inputs
         )
-        
-        return jsonify({
-            'league_id': league_id,
-            'year': year,
-            'weeks_analyzed': f"{start_week}-{end_week}",
-            'team_stats': results['team_stats'],
-            'league_stats': results['league_stats'],
-            'team_names': team_name_map,
-            'processing_errors': results['processing_errors']
-        })
+
+        body, _ = build_body(results)
+        response = jsonify(body)
+        if etag:
+            response.set_etag(etag)
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/league/<league_id>/team/<int:team_id>/wrapped', methods=['GET'])
 def team_wrapped(league_id, team_id):
-    """Get Wrapped-style data for a specific team"""
+    """
+    Get Wrapped-style data for a specific team
+
+    Optional query parameters:
+        fields: comma-separated sub-trees to return, e.g. "overview,records"
+        include: heavy sections to keep (weekly_data, advanced_stats,
+            league_context); "none" leaves all three out
+        stream: "1" streams per-week progress as NDJSON (see stream_analysis)
+    """
     year = request.args.get('year', DEFAULT_YEAR, type=int)
-    start_week = request.args.get('start_week', DEFAULT_START_WEEK, type=int)
-    end_week = request.args.get('end_week', DEFAULT_END_WEEK, type=int)
+    start_week, end_week, error = get_week_range(league_id, year)
+    if error:
+        return jsonify({'error': error}), 400
 
-    team_name_map, error = get_team_name_map(league_id, year)
+    fields, include, error = get_fieldset(WRAPPED_SECTIONS)
     if error:
         return jsonify({'error': error}), 400
+    advanced_stats = 'advanced_stats' in include and selects(fields, ('advanced_stats',))
 
-    try:
-        results = analyze_season(
-            league_id,
-            year,
-            start_week,
-            end_week,
-            team_name_map,
-            fetch_league_data
-        )
+    team_name_map, error = get_team_name_map(league_id, year)
+    if error:
+        return jsonify({'error': error}), 400
 
+    def build_body(results):
         if team_id not in results['team_stats']:
-            return jsonify({'error': f'Team {team_id} not found in league'}), 404
+            return None, f'Team {team_id} not found in league'
 
         wrapped_data = format_team_wrapped(
             team_id,
@@ -205,8 +378,38 @@ def team_wrapped(league_id, team_id):
         )
 
         wrapped_data['league_context'] = results['league_stats']
+        wrapped_data = drop_sections(wrapped_data, set(WRAPPED_SECTIONS) - include)
+        return select_fields(wrapped_data, fields), None
+
+    try:
+        if wants_stream():
+            return stream_analysis(
+                league_id, year, start_week, end_week, team_name_map, advanced_stats, build_body
+            )
 
-        return jsonify(wrapped_data)
+        inputs = get_analysis_inputs(league_id, year, start_week, end_week, team_name_map)
+        etag = request_etag(inputs.versions)
+        if etag_matches(etag):
+            return not_modified(etag)
+
+        results = get_season_analysis(
+            league_id,
+            year,
+            start_week,
+            end_week,
+            team_name_map,
+            advanced_stats=advanced_stats,
+            inputs=inputs
+        )
+
+        body, error = build_body(results)
+        if error:
+            return jsonify({'error': error}), 404
+
+        response = jsonify(body)
+        if etag:
+            response.set_etag(etag)
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -234,7 +437,7 @@ def week_deep_dive(league_id, week):
             week,
             team_id,
             team_name_map,
-            fetch_league_data
+            fetch_week_bundle
         )
 
         if result.get('error'):
@@ -268,11 +471,12 @@ def week_deep_dive(league_id, week):
 def league_draft(league_id):
     """Get draft analysis for the league"""
     year = request.args.get('year', DEFAULT_YEAR, type=int)
-    start_week = request.args.get('start_week', DEFAULT_START_WEEK, type=int)
-    end_week = request.args.get('end_week', DEFAULT_END_WEEK, type=int)
+    start_week, end_week, error = get_week_range(league_id, year)
+    if error:
+        return jsonify({'error': error}), 400
 
     try:
-        result, error = analyze_draft(league_id, year, start_week, end_week)
+        result, error = get_draft_analysis(league_id, year, start_week, end_week)
 
         if error:
             return jsonify({'error': error}), 400
@@ -297,15 +501,16 @@ def league_draft(league_id):
 def league_draft_alternatives(league_id):
     """Get draft alternative analysis for a specific team"""
     year = request.args.get('year', DEFAULT_YEAR, type=int)
-    start_week = request.args.get('start_week', DEFAULT_START_WEEK, type=int)
-    end_week = request.args.get('end_week', DEFAULT_END_WEEK, type=int)
+    start_week, end_week, error = get_week_range(league_id, year)
+    if error:
+        return jsonify({'error': error}), 400
     team_id = request.args.get('team_id', type=int)
 
     if not team_id:
         return jsonify({'error': 'team_id query parameter is required'}), 400
 
     try:
-        result, error = analyze_draft(league_id, year, start_week, end_week)
+        result, error = get_draft_analysis(league_id, year, start_week, end_week)
 
         if error:
             return jsonify({'error': error}), 400
@@ -324,65 +529,23 @@ def league_draft_alternatives(league_id):
 
 @app.route('/api/league/<league_id>/team/<int:team_id>/gasp-previews', methods=['GET'])
 def team_gasp_previews(league_id, team_id):
-    """Get gasp moment previews for dashboard cards"""
+    """
+    Get gasp moment previews for dashboard cards
+
+    Pillars are computed concurrently; any that miss their deadline are
+    listed in 'pending' and any that couldn't get a worker in 'busy' (retry
+    to pick them up), and failures in 'errors'.
+    """
     year = request.args.get('year', DEFAULT_YEAR, type=int)
-    start_week = request.args.get('start_week', DEFAULT_START_WEEK, type=int)
-    end_week = request.args.get('end_week', DEFAULT_END_WEEK, type=int)
+    start_week, end_week, error = get_week_range(league_id, year)
+    if error:
+        return jsonify({'error': error}), 400
 
     team_name_map, error = get_team_name_map(league_id, year)
     if error:
         return jsonify({'error': error}), 400
 
-    previews = {'start_sit': None, 'draft': None, 'waiver': None}
-
-    try:
-        # Start/Sit pillar: optimal record + one-player-away count
-        results = analyze_season(
-            league_id, year, start_week, end_week,
-            team_name_map, fetch_league_data
-        )
-        if team_id in results['team_stats']:
-            ts = results['team_stats'][team_id]
-            optimal = detect_undefeated_optimal(team_id, results['team_stats'])
-            perfect_losses = detect_perfect_lineup_losses(team_id, results['team_stats'], team_name_map)
-            total_pts_lost = round(ts.get('points_lost', 0), 1)
-            previews['start_sit'] = {
-                'optimal_record': f"{optimal['optimal_wins']}-{optimal['optimal_losses']}",
-                'actual_record': f"{optimal['actual_wins']}-{optimal['actual_losses']}",
-                'wins_left_on_bench': optimal['wins_left_on_bench'],
-                'undefeated_optimal': optimal['undefeated'],
-                'perfect_lineup_losses': len(perfect_losses),
-                'total_points_lost': total_pts_lost,
-            }
-
-        # Draft pillar: biggest miss
-        draft_result, draft_error = analyze_draft(league_id, year, start_week, end_week)
-        if not draft_error:
-            alternatives = calculate_draft_alternatives(draft_result['picks'], team_id)
-            biggest_miss = max(alternatives, key=lambda a: a['missed_points']) if alternatives else None
-            if biggest_miss and biggest_miss['missed_points'] > 0:
-                previews['draft'] = {
-                    'biggest_miss_player': biggest_miss['your_pick']['player_name'],
-                    'best_alternative': biggest_miss['best_alternative']['player_name'],
-                    'missed_points': biggest_miss['missed_points'],
-                    'round': biggest_miss['your_pick']['round'],
-                }
-
-        # Waiver pillar: transaction count + best pickup
-        waiver_result, waiver_error = analyze_waivers(league_id, year, start_week, end_week)
-        if not waiver_error:
-            team_txns = [t for t in waiver_result.get('transactions', []) if t.get('to_team_id') == team_id]
-            awards = waiver_result.get('awards', {})
-            previews['waiver'] = {
-                'total_moves': len(team_txns),
-                'league_total_moves': len(waiver_result.get('transactions', [])),
-                'diamond': awards.get('diamond_in_the_rough', {}).get('player_name') if awards.get('diamond_in_the_rough') else None,
-            }
-
-    except Exception as e:
-        # Return partial previews even if some fail
-        previews['error'] = str(e)
-
+    previews = get_gasp_previews(league_id, year, start_week, end_week, team_id, team_name_map)
     return jsonify(previews)
 
 
@@ -390,11 +553,12 @@ def team_gasp_previews(league_id, team_id):
 def league_waivers(league_id):
     """Get waiver wire analysis for the league"""
     year = request.args.get('year', DEFAULT_YEAR, type=int)
-    start_week = request.args.get('start_week', DEFAULT_START_WEEK, type=int)
-    end_week = request.args.get('end_week', DEFAULT_END_WEEK, type=int)
+    start_week, end_week, error = get_week_range(league_id, year)
+    if error:
+        return jsonify({'error': error}), 400
 
     try:
-        result, error = analyze_waivers(league_id, year, start_week, end_week)
+        result, error = get_waiver_analysis(league_id, year, start_week, end_week)
 
         if error:
             return jsonify({'error': error}), 400
@@ -0,0 +1,16 @@
+"""
+Caching layer for ESPN responses and analysis results
+"""
+from .week_cache import WeekCache, make_key, FINAL_VERSION
+from .singleflight import SingleFlight
+from .lru import LRUCache, approx_size
+from .backends import (
+    CacheBackend, MemoryBackend, SQLiteBackend, RedisBackend, schema_fingerprint
+)
+from .shared_store import create_backend, shared_store
+
+__all__ = [
+    'WeekCache', 'make_key', 'FINAL_VERSION', 'SingleFlight', 'LRUCache', 'approx_size',
+    'CacheBackend', 'MemoryBackend', 'SQLiteBackend', 'RedisBackend', 'schema_fingerprint',
+    'create_backend', 'shared_store'
+]
@@ -0,0 +1,604 @@
+"""
+Cache backends
+The shared cache tier (ESPN responses, season / draft / waiver analyses)
+sits behind one small interface, so a deployment can pick where it lives:
+
+    MemoryBackend  - in-process LRU (single worker, dev)
+    SQLiteBackend  - WAL-mode SQLite file shared by every worker on a node
+    RedisBackend   - any Redis-protocol (RESP) server shared by every node
+
+Values are stored in a versioned envelope: a header naming the envelope
+format and the caller's schema fingerprint, an HMAC-SHA256 signature, then
+the zlib-compressed pickle. An entry written by code with a different schema
+(e.g. a changed initialize_team_stats) reads as a miss instead of serving a
+stale shape.
+
+The signature covers the namespace, key, header and body, keyed from
+CACHE_SIGNING_KEY. The store is writable by anything that can reach the
+SQLite file or the Redis server, so a blob whose signature doesn't verify
+is rejected (counted, read as a miss) and never unpickled. Every process
+sharing a store needs the same CACHE_SIGNING_KEY; without one each process
+signs with its own random key, which is safe but means entries are only
+reused by the process that wrote them.
+
+A backend error never fails a request: reads miss and writes are dropped.
+"""
+import hashlib
+import hmac
+import os
+import pickle
+import socket
+import ssl
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from .lru import LRUCache
+
+# Bump when the envelope layout itself changes
+ENVELOPE_FORMAT = 2
+_MAGIC = b'FFW'
+_HEADER = struct.Struct('>3sB8s')  # magic, envelope format, schema fingerprint
+_SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+_SIGNING_SECRET = os.getenv('CACHE_SIGNING_KEY', '')
+SIGNING_KEY_CONFIGURED = bool(_SIGNING_SECRET)
+SIGNING_KEY = (
+    hashlib.blake2b(_SIGNING_SECRET.encode(), digest_size=32, person=b'ffw-cache').digest()
+    if SIGNING_KEY_CONFIGURED else os.urandom(32)
+)
+
+# Reads only refresh an SQLite entry's last-access time this often, so hot
+# entries don't turn every read into a write
+ACCESS_GRANULARITY_SECONDS = 60
+
+# An over-budget SQLite file is evicted down to this fraction of max_bytes,
+# so the eviction scan runs once per ~10% of churn instead of on every write
+SQLITE_EVICT_TO = 0.9
+
+
+def _shape(value):
+    if isinstance(value, dict):
+        return tuple(sorted((repr(k), _shape(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_shape(v) for v in value)
+    return type(value).__name__
+
+
+def schema_fingerprint(*parts):
+    """
+    Fingerprint the shape of what a cache namespace stores, e.g.
+    schema_fingerprint(RESULT_VERSION, initialize_team_stats()). Dicts count
+    by their keys and value types, so adding or retyping a field changes it;
+    any other part (version numbers, tuples of field names) counts by value.
+    """
+    shape = tuple(_shape(part) if isinstance(part, dict) else repr(part) for part in parts)
+    return hashlib.blake2b(repr(shape).encode(), digest_size=8).digest()
+
+
+NO_SCHEMA = schema_fingerprint()
+
+
+class UntrustedEntry(ValueError):
+    """A stored envelope whose signature doesn't verify."""
+
+
+def _signature(signing_key, namespace, key, header, body):
+    mac = hmac.new(signing_key, digestmod=hashlib.sha256)
+    for part in (namespace.encode(), key.encode(), header):
+        mac.update(struct.pack('>I', len(part)) + part)
+    mac.update(body)
+    return mac.digest()
+
+
+def encode_entry(value, namespace, key, schema=NO_SCHEMA, signing_key=SIGNING_KEY):
+    """Signed, versioned envelope bytes for a picklable value stored at namespace/key."""
+    header = _HEADER.pack(_MAGIC, ENVELOPE_FORMAT, schema)
+    body = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    return header + _signature(signing_key, namespace, key, header, body) + body
+
+
+def decode_entry(blob, namespace, key, schema=NO_SCHEMA, signing_key=SIGNING_KEY):
+    """
+    Value from envelope bytes read from namespace/key. The signature is
+    checked before anything is unpickled.
+
+    Returns:
+        (value, current): current is False (and value None) if the entry was
+        written with another envelope format or schema
+
+    Raises:
+        UntrustedEntry: the signature is missing or doesn't match
+    """
+    if len(blob) < _HEADER.size:
+        return None, False
+    magic, envelope_format, entry_schema = _HEADER.unpack_from(blob)
+    if magic != _MAGIC or envelope_format != ENVELOPE_FORMAT or entry_schema != schema:
+        return None, False
+
+    header = blob[:_HEADER.size]
+    signature = blob[_HEADER.size:_HEADER.size + _SIGNATURE_SIZE]
+    body = blob[_HEADER.size + _SIGNATURE_SIZE:]
+    if not hmac.compare_digest(signature, _signature(signing_key, namespace, key, header, body)):
+        raise UntrustedEntry(f"bad signature on {namespace} entry")
+    return pickle.loads(zlib.decompress(body)), True
+
+
+class CacheBackend:
+    """
+    Namespaced key/value store for the shared cache tier.
+
+    Keys are any value with a stable repr (tuples of strings and ints);
+    values are anything picklable, and come back as fresh copies.
+    Subclasses store envelope bytes via _read / _write / _remove.
+    Entries whose signature doesn't verify are counted as rejected.
+    """
+
+    name = 'backend'
+
+    def __init__(self, signing_key=None):
+        self._lock = threading.Lock()
+        self.signing_key = signing_key or SIGNING_KEY
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.rejected = 0
+        self.writes = 0
+        self.errors = 0
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _failed(self, action, error):
+        self._count('errors')
+        print(f"[Cache Backend] {self.name} {action} failed: {error}")
+
+    def get(self, namespace, key, schema=NO_SCHEMA):
+        """Return the stored value, or None if missing, expired, stale or unreadable."""
+        key = repr(key)
+        try:
+            blob = self._read(namespace, key)
+            if blob is None:
+                self._count('misses')
+                return None
+            value, current = decode_entry(blob, namespace, key, schema, self.signing_key)
+        except UntrustedEntry:
+            self._count('rejected')
+            return None
+        except Exception as e:
+            self._failed(f"read of {namespace}", e)
+            return None
+
+        if not current:
+            self._count('stale')
+            return None
+        self._count('hits')
+        return value
+
+    def set(self, namespace, key, value, ttl=None, schema=NO_SCHEMA):
+        """
+        Store a value, replacing any previous one.
+
+        Args:
+            namespace: Entry group, e.g. 'espn' or 'season'
+            key: Key within the namespace
+            value: Picklable value
+            ttl: Seconds until the entry expires (None = no expiry)
+            schema: schema_fingerprint of the value's shape
+        """
+        try:
+            key = repr(key)
+            self._write(namespace, key, encode_entry(value, namespace, key, schema, self.signing_key), ttl)
+        except Exception as e:
+            self._failed(f"write to {namespace}", e)
+            return
+        self._count('writes')
+
+    def delete(self, namespace, key):
+        try:
+            self._remove(namespace, repr(key))
+        except Exception as e:
+            self._failed(f"delete from {namespace}", e)
+
+    def stats(self):
+        """Return counters for monitoring (plus backend-specific sizes)."""
+        with self._lock:
+            stats = {
+                'backend': self.name,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'rejected': self.rejected,
+                'writes': self.writes,
+                'errors': self.errors,
+            }
+        stats.update(self._sizes())
+        return stats
+
+    def _read(self, namespace, key):
+        raise NotImplementedError
+
+    def _write(self, namespace, key, blob, ttl):
+        raise NotImplementedError
+
+    def _remove(self, namespace, key):
+        raise NotImplementedError
+
+    def _sizes(self):
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU of envelope bytes, bounded by max_bytes."""
+
+    name = 'memory'
+
+    def __init__(self, max_bytes, signing_key=None):
+        super().__init__(signing_key)
+        self._cache = LRUCache(max_bytes=max_bytes, sizeof=lambda entry: len(entry[1]))
+
+    def _read(self, namespace, key):
+        entry = self._cache.get((namespace, key))
+        if entry is None:
+            return None
+        expires_at, blob = entry
+        if expires_at is not None and expires_at <= time.time():
+            self._cache.delete((namespace, key))
+            return None
+        return blob
+
+    def _write(self, namespace, key, blob, ttl):
+        self._cache.set((namespace, key), (time.time() + ttl if ttl is not None else None, blob))
+
+    def _remove(self, namespace, key):
+        self._cache.delete((namespace, key))
+
+    def _sizes(self):
+        stats = self._cache.stats()
+        return {'bytes': stats['bytes'], 'max_bytes': self._cache.max_bytes, 'evictions': stats['evictions']}
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    value       BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    expires_at  REAL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE TABLE IF NOT EXISTS totals (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    WAL-mode SQLite file shared by every worker on a node.
+
+    Entries past their TTL read as misses, and the least recently used are
+    evicted once the file's entries pass max_bytes. The entries' total size
+    is kept as a running total in the totals table, updated in the same
+    transaction as each write or delete, so a write doesn't have to sum the
+    whole table. Each thread (and each forked worker) gets its own connection.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, max_bytes, signing_key=None):
+        super().__init__(signing_key)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self.evictions = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(_SQLITE_SCHEMA)
+        if conn.execute("SELECT 1 FROM totals WHERE name = 'bytes'").fetchone() is None:
+            # A file written before the running total existed
+            conn.execute(
+                "INSERT OR IGNORE INTO totals (name, value) "
+                "SELECT 'bytes', COALESCE(SUM(size), 0) FROM entries"
+            )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _read(self, namespace, key):
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT value, expires_at, accessed_at FROM entries WHERE namespace = ? AND key = ?',
+            (namespace, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return None
+        if now - row[2] > ACCESS_GRANULARITY_SECONDS:
+            conn.execute(
+                'UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?', (now, namespace, key)
+            )
+        return row[0]
+
+    @staticmethod
+    @contextmanager
+    def _transaction(conn):
+        """BEGIN IMMEDIATE ... COMMIT, rolled back if the block raises."""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+
+    def _write(self, namespace, key, blob, ttl):
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connection()
+        evicted = 0
+        with self._transaction(conn):
+            old = conn.execute(
+                'SELECT size FROM entries WHERE namespace = ? AND key = ?', (namespace, key)
+            ).fetchone()
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (namespace, key, value, size, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (namespace, key, blob, len(blob), now + ttl if ttl is not None else None, now)
+            )
+            total = conn.execute(
+                "UPDATE totals SET value = value + ? WHERE name = 'bytes' RETURNING value",
+                (len(blob) - (old[0] if old else 0),)
+            ).fetchall()[0][0]
+            if total > self.max_bytes:
+                evicted = self._evict(conn, now)
+
+        if evicted:
+            with self._lock:
+                self.evictions += evicted
+
+    def _remove(self, namespace, key):
+        conn = self._connection()
+        with self._transaction(conn):
+            removed = conn.execute(
+                'DELETE FROM entries WHERE namespace = ? AND key = ? RETURNING size', (namespace, key)
+            ).fetchall()
+            if removed:
+                conn.execute("UPDATE totals SET value = value - ? WHERE name = 'bytes'", (removed[0][0],))
+
+    def _evict(self, conn, now):
+        """
+        Drop expired entries, then least recently used ones until under
+        SQLITE_EVICT_TO of max_bytes. Runs inside the writer's transaction
+        and resets the running total from the rows it scans.
+
+        Returns:
+            int: Entries removed
+        """
+        evicted = max(conn.execute(
+            'DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,)
+        ).rowcount, 0)
+        rows = conn.execute('SELECT namespace, key, size FROM entries ORDER BY accessed_at').fetchall()
+        total = sum(size for _namespace, _key, size in rows)
+        target = self.max_bytes * SQLITE_EVICT_TO
+        for namespace, key, size in rows:
+            if total <= target:
+                break
+            conn.execute('DELETE FROM entries WHERE namespace = ? AND key = ?', (namespace, key))
+            total -= size
+            evicted += 1
+        conn.execute("UPDATE totals SET value = ? WHERE name = 'bytes'", (total,))
+        return evicted
+
+    def _sizes(self):
+        try:
+            conn = self._connection()
+            entries = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            size = conn.execute("SELECT value FROM totals WHERE name = 'bytes'").fetchone()[0]
+        except sqlite3.Error:
+            entries, size = None, None
+        return {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes, 'evictions': self.evictions}
+
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server."""
+
+
+class RedisBackend(CacheBackend):
+    """
+    Client for a Redis-protocol (RESP) server, shared by every node.
+
+    Keys are '<prefix><namespace>:<key>'; TTLs become PX expiries and size
+    eviction is left to the server's maxmemory policy. After a connection
+    failure the backend stays offline (reads miss, writes are skipped) for
+    retry_seconds instead of stalling each request on a dead server.
+
+    Connections are pooled per process and shared by every thread, so the
+    short-lived fetch threads reuse authenticated connections instead of
+    opening new ones; at most max_idle idle connections are kept.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url, prefix='ffw:', timeout=2.0, retry_seconds=30, max_idle=8, signing_key=None):
+        super().__init__(signing_key)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.username = parsed.username
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.use_ssl = parsed.scheme == 'rediss'
+        self.prefix = prefix
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self.max_idle = max_idle
+        self._pool_lock = threading.Lock()
+        self._idle = []
+        self._pool_pid = os.getpid()
+        self._offline_until = 0.0
+        self.connections_opened = 0
+
+    # ── RESP ──
+
+    def _connect(self):
+        """Open a connection and run AUTH / SELECT; it's only returned once they succeed."""
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        conn = (sock, None)
+        try:
+            if self.use_ssl:
+                sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self.host)
+            conn = (sock, sock.makefile('rb'))
+            if self.password:
+                auth = ('AUTH', self.username, self.password) if self.username else ('AUTH', self.password)
+                self._send(conn, auth)
+            if self.db:
+                self._send(conn, ('SELECT', self.db))
+        except RedisError as e:
+            self._close(conn)
+            raise ConnectionError(f'handshake failed: {e}')
+        except BaseException:
+            self._close(conn)
+            raise
+        with self._pool_lock:
+            self.connections_opened += 1
+        return conn
+
+    @staticmethod
+    def _close(conn):
+        sock, reader = conn
+        for resource in (reader, sock):
+            try:
+                if resource is not None:
+                    resource.close()
+            except OSError:
+                pass
+
+    def _acquire(self):
+        with self._pool_lock:
+            if self._pool_pid != os.getpid():
+                # Forked: the parent's sockets aren't ours to use
+                self._idle = []
+                self._pool_pid = os.getpid()
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def _release(self, conn):
+        with self._pool_lock:
+            if self._pool_pid == os.getpid() and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        self._close(conn)
+
+    def _send(self, conn, args):
+        sock, reader = conn
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        sock.sendall(b''.join(parts))
+        return self._reply(reader)
+
+    def _reply(self, reader):
+        line = reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError('connection closed by server')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest
+        if kind == b'-':
+            raise RedisError(rest.decode(errors='replace'))
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(rest)
+            return None if count < 0 else [self._reply(reader) for _ in range(count)]
+        raise ConnectionError(f'unexpected reply {line[:20]!r}')
+
+    def _online(self):
+        return time.time() >= self._offline_until
+
+    def _command(self, *args):
+        try:
+            conn = self._acquire()
+        except (OSError, ConnectionError, ValueError):
+            self._offline_until = time.time() + self.retry_seconds
+            raise
+        try:
+            reply = self._send(conn, args)
+        except RedisError:
+            # An error reply leaves the connection usable
+            self._release(conn)
+            raise
+        except (OSError, ConnectionError, ValueError):
+            self._close(conn)
+            self._offline_until = time.time() + self.retry_seconds
+            raise
+        except BaseException:
+            self._close(conn)
+            raise
+        self._release(conn)
+        return reply
+
+    # ── Backend ──
+
+    def _key(self, namespace, key):
+        return f"{self.prefix}{namespace}:{key}"
+
+    def _read(self, namespace, key):
+        if not self._online():
+            return None
+        return self._command('GET', self._key(namespace, key))
+
+    def _write(self, namespace, key, blob, ttl):
+        if not self._online():
+            return
+        if ttl is None:
+            self._command('SET', self._key(namespace, key), blob)
+        else:
+            self._command('SET', self._key(namespace, key), blob, 'PX', max(1, int(ttl * 1000)))
+
+    def _remove(self, namespace, key):
+        if self._online():
+            self._command('DEL', self._key(namespace, key))
+
+    def ping(self):
+        """True if the server answers PING."""
+        try:
+            return self._command('PING') == b'PONG'
+        except Exception:
+            return False
+
+    def _sizes(self):
+        with self._pool_lock:
+            idle, opened = len(self._idle), self.connections_opened
+        return {
+            'server': f"{self.host}:{self.port}/{self.db}",
+            'online': self._online(),
+            'idle_connections': idle,
+            'connections_opened': opened,
+        }
@@ -0,0 +1,107 @@
+"""
+Memory-bounded LRU cache
+Evicts least-recently-used entries once the estimated size of all values
+exceeds max_bytes, so a busy worker can't grow without limit.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+
+def approx_size(obj):
+    """
+    Estimate the memory footprint of a nested structure in bytes.
+    Objects shared between containers (e.g. player dicts) are counted once.
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(type(item), '__slots__'):
+            stack.extend(getattr(item, slot) for slot in type(item).__slots__ if hasattr(item, slot))
+    return total
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by the approximate byte size of its values."""
+
+    def __init__(self, max_bytes, sizeof=approx_size):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value (marking it recently used) or default."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key, default=None):
+        """Return the cached value or default, without counting a hit/miss or marking it used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else default
+
+    def set(self, key, value, size=None):
+        """Insert a value, evicting old entries to stay under max_bytes."""
+        size = self._sizeof(value) if size is None else size
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+
+            while self.total_bytes > self.max_bytes:
+                _key, (_value, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return size and hit/miss counters for monitoring."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
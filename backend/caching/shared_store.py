@@ -0,0 +1,54 @@
+"""
+Shared store
+The cache tier every worker (and, with Redis, every node) shares: ESPN
+responses and finished season / draft / waiver analyses are written here so
+any process can reuse them, and they survive worker restarts and deploys.
+
+CACHE_BACKEND picks the backend (see caching.backends):
+    sqlite (default) - SHARED_STORE_PATH, shared by the workers on a node
+    redis            - CACHE_REDIS_URL (or REDIS_URL), shared across nodes
+    memory           - per-process only
+
+Set CACHE_SIGNING_KEY to the same secret in every process sharing a sqlite
+or redis store: entries are signed with it and only unpickled if the
+signature verifies (see caching.backends).
+"""
+import os
+from pathlib import Path
+
+from .backends import MemoryBackend, SQLiteBackend, RedisBackend, SIGNING_KEY_CONFIGURED
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'sqlite')
+SHARED_STORE_PATH = os.getenv(
+    'SHARED_STORE_PATH', str(Path(__file__).parent.parent / 'cache' / 'shared.sqlite3')
+)
+SHARED_STORE_MAX_MB = int(os.getenv('SHARED_STORE_MAX_MB', 512))
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL') or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+CACHE_REDIS_PREFIX = os.getenv('CACHE_REDIS_PREFIX', 'ffw:')
+CACHE_REDIS_MAX_IDLE = int(os.getenv('CACHE_REDIS_MAX_IDLE', 8))
+
+
+def create_backend(kind=CACHE_BACKEND):
+    """
+    Build the configured cache backend.
+
+    Args:
+        kind: 'sqlite', 'redis' or 'memory'
+
+    Returns:
+        CacheBackend instance
+    """
+    if kind in ('sqlite', 'redis') and not SIGNING_KEY_CONFIGURED:
+        print(f"[Shared Store] CACHE_SIGNING_KEY is not set; {kind} entries are signed with a "
+              f"per-process key and won't be reused by other workers")
+    if kind == 'sqlite':
+        return SQLiteBackend(SHARED_STORE_PATH, max_bytes=SHARED_STORE_MAX_MB * 1024 * 1024)
+    if kind == 'redis':
+        return RedisBackend(CACHE_REDIS_URL, prefix=CACHE_REDIS_PREFIX, max_idle=CACHE_REDIS_MAX_IDLE)
+    if kind == 'memory':
+        return MemoryBackend(max_bytes=SHARED_STORE_MAX_MB * 1024 * 1024)
+    raise ValueError(f"Unknown CACHE_BACKEND {kind!r} (expected sqlite, redis or memory)")
+
+
+# One store per process, shared by the ESPN cache and the analysis caches
+shared_store = create_backend()
@@ -0,0 +1,201 @@
+"""
+ESPN Response Cache
+Caches raw league responses keyed by (league_id, year, scoringPeriodId, views).
+
+Two tiers: a hot, memory-bounded LRU in each process over the shared store
+(caching.shared_store), so every worker reuses a response any of them
+fetched. Completed weeks never change, so they never expire. The current /
+in-progress week (and non-weekly lookups like team names) is served
+stale-while-revalidate: once an entry is older than the freshness window
+it's still returned straight away, and the caller refreshes it in the
+background; only past the live TTL is it dropped and fetched inline.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+from .backends import schema_fingerprint
+from .lru import LRUCache
+from .shared_store import shared_store
+
+# Legacy per-file cache of final weeks (read and imported into the shared store)
+CACHE_DIR = Path(os.getenv('ESPN_CACHE_DIR', Path(__file__).parent.parent / 'cache' / 'espn'))
+# Longest a live entry is served at all (stale or not)
+LIVE_TTL_SECONDS = int(os.getenv('ESPN_CACHE_LIVE_TTL', 300))
+# Live entries older than this are served stale and refreshed in the background
+LIVE_FRESH_SECONDS = int(os.getenv('ESPN_CACHE_LIVE_FRESH', 60))
+# Memory budget for each process's hot tier
+WEEK_CACHE_MAX_MB = int(os.getenv('WEEK_CACHE_MAX_MB', 256))
+
+# Version shared by every completed week (its content can no longer change)
+FINAL_VERSION = 'final'
+
+
+def make_key(league_id, year, week, views):
+    """Build a cache key. Views are order-insensitive; week may be None."""
+    return (str(league_id), int(year), week, tuple(sorted(views)))
+
+
+def _entry(data, final):
+    if final:
+        version = FINAL_VERSION
+    else:
+        version = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+    return {'data': data, 'final': final, 'fetched_at': time.time(), 'version': version}
+
+
+# Shape of stored entries (raw ESPN JSON inside, so only the wrapper counts)
+ENTRY_SCHEMA = schema_fingerprint('espn', _entry({}, final=True))
+
+
+class WeekCache:
+    """
+    Two-tier (memory LRU + shared store) cache for ESPN responses.
+
+    Entries are stored as {'data': ..., 'final': bool, 'fetched_at': float,
+    'version': str}. Final entries never expire. Live entries are fresh for
+    `fresh_seconds`, then stale (still served, but lookup() flags them for
+    a background refresh), and dropped `live_ttl` seconds after they were
+    fetched, in memory and in the store.
+
+    The version identifies the entry's content: always 'final' for completed
+    weeks, a content hash for live ones. Result caches built on top of this
+    data compare versions to know when to recompute.
+
+    Cached data is shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, live_ttl=LIVE_TTL_SECONDS, fresh_seconds=LIVE_FRESH_SECONDS,
+                 max_bytes=WEEK_CACHE_MAX_MB * 1024 * 1024, store=shared_store):
+        self.cache_dir = Path(cache_dir)
+        self.live_ttl = live_ttl
+        self.fresh_seconds = min(fresh_seconds, live_ttl)
+        self.store = store
+        self._entries = LRUCache(max_bytes=max_bytes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        league_id, year, week, views = key
+        period = f"week_{week}" if week is not None else "league"
+        return self.cache_dir / league_id / str(year) / f"{period}_{'+'.join(views)}.json"
+
+    def _age(self, entry):
+        return time.time() - entry['fetched_at']
+
+    def _usable(self, entry):
+        return entry['final'] or self._age(entry) < self.live_ttl
+
+    def _is_stale(self, entry):
+        return not entry['final'] and self._age(entry) >= self.fresh_seconds
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def lookup(self, key):
+        """
+        Cached data for key, checking memory then the shared store.
+
+        Returns:
+            (data, stale): data is None if missing or past the live TTL;
+            stale is True for a live entry past the freshness window, which
+            the caller should refresh (in the background)
+        """
+        entry = self._entries.get(key)
+        if entry is not None and not self._usable(entry):
+            self._entries.delete(key)
+            entry = None
+
+        if entry is not None:
+            self._count('hits')
+        else:
+            entry = self.store.get('espn', key, schema=ENTRY_SCHEMA)
+            if entry is None or not self._usable(entry):
+                entry = self._import_from_disk(key)
+            if entry is None:
+                self._count('misses')
+                return None, False
+            self._entries.set(key, entry)
+            self._count('disk_hits')
+
+        stale = self._is_stale(entry)
+        if stale:
+            self._count('stale_hits')
+        return entry['data'], stale
+
+    def get(self, key):
+        """Return cached data for key (fresh or stale), or None if missing or expired."""
+        return self.lookup(key)[0]
+
+    def reload(self, key):
+        """
+        Adopt a fresh copy from the shared store, e.g. one another worker
+        just refreshed. Returns True if memory now holds a fresh entry.
+        """
+        entry = self.store.get('espn', key, schema=ENTRY_SCHEMA)
+        if entry is None or not self._usable(entry) or self._is_stale(entry):
+            return False
+        self._entries.set(key, entry)
+        return True
+
+    def set(self, key, data, final=False):
+        """Store data for key, in memory and in the shared store."""
+        entry = _entry(data, final)
+        self._entries.set(key, entry)
+        self.store.set('espn', key, entry, ttl=None if final else self.live_ttl, schema=ENTRY_SCHEMA)
+
+    def version(self, key, data=None):
+        """
+        Return the content version of a cached entry, or None if not cached.
+        A probe: it doesn't count as a hit/miss or make the entry recently used.
+
+        Args:
+            key: Cache key
+            data: Optional data object returned by an earlier read; the
+                version is only returned if the entry still holds that same
+                object, so a refresh that landed after the read can't lend
+                its version to the older data
+        """
+        entry = self._entries.peek(key)
+        if entry is None or (data is not None and entry['data'] is not data):
+            return None
+        return entry['version']
+
+    def clear(self):
+        """Drop all in-memory entries (shared store entries are left alone)."""
+        self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters for monitoring."""
+        memory = self._entries.stats()
+        with self._lock:
+            return {
+                'entries': memory['entries'],
+                'bytes': memory['bytes'],
+                'evictions': memory['evictions'],
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
+
+    def _import_from_disk(self, key):
+        """Entry for a final week saved by the old per-file cache (copied into the store)."""
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return None
+        entry = _entry(data, final=True)
+        self.store.set('espn', key, entry, schema=ENTRY_SCHEMA)
+        return entry
@@ -1,34 +1,197 @@
 """
 ESPN Fantasy Football API Interface
 """
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
+import http_client
+from caching import WeekCache, SingleFlight, LRUCache, make_key
+
+LEAGUE_URL = "https://lm-api-reads.fantasy.espn.com/apis/v3/games/ffl/seasons/{year}/segments/0/leagues/{league_id}"
+
+# Max concurrent ESPN requests when fetching a range of weeks
+MAX_FETCH_WORKERS = int(os.getenv('ESPN_FETCH_WORKERS', 6))
+
+# Shared by every caller (analyze_season, analyze_week, draft + waiver analyzers)
+week_cache = WeekCache()
+
+# Identical concurrent fetches on a cache miss share one ESPN request
+fetch_flight = SingleFlight()
+
+# Stale live entries (current week, team names) are refreshed off the request path
+refresh_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ESPN_REFRESH_WORKERS', 2)), thread_name_prefix='espn-refresh'
+)
+_refresh_lock = threading.Lock()
+_refreshing = set()
+_refresh_counts = {'scheduled': 0, 'adopted': 0, 'fetched': 0, 'failed': 0}
+
+# Parsed week bundles, reused (same object) while the raw week is unchanged
+bundle_cache = LRUCache(max_bytes=int(os.getenv('BUNDLE_CACHE_MAX_MB', 64)) * 1024 * 1024)
+
 POSITION_MAP = {
     0: "QB", 2: "RB", 4: "WR", 6: "TE", 
-    16: "D/ST", 17: "K", 23: "FLEX", 20: "BENCH", 21: "IR"
+    16: "D/ST", 17: "K", 23: "FLEX", 20: "BENCH", 21: "IR",
+    # Superflex / IDP / flex variants
+    3: "RB/WR", 5: "WR/TE", 7: "OP", 8: "DT", 9: "DE", 10: "LB",
+    11: "DL", 12: "CB", 13: "S", 14: "DB", 15: "DP", 18: "P", 19: "HC"
 }
 
 PLAYER_POSITION_MAP = {
-    1: "QB", 2: "RB", 3: "WR", 4: "TE", 5: "K", 16: "D/ST"
+    1: "QB", 2: "RB", 3: "WR", 4: "TE", 5: "K", 16: "D/ST",
+    7: "P", 9: "DT", 10: "DE", 11: "LB", 12: "CB", 13: "S", 14: "HC"
 }
 
+# Views for one week of league data (the week bundle)
+WEEK_VIEWS = ['mMatchup', 'mRoster', 'mTeam']
 
-def get_team_name_map(league_id, year):
+# League-level views, fetched once and shared by get_league_info,
+# get_lineup_slot_counts and get_season_plan
+LEAGUE_VIEWS = ['mTeam', 'mSettings', 'mStatus']
+
+# Which weeks of a season can have data, from the league's status/settings:
+#   current_week  - latest scoring period ESPN has data for (may be live)
+#   last_week     - final scoring period of the season (playoffs included)
+#   final_through - last week that can no longer change (0 if none)
+SeasonPlan = namedtuple('SeasonPlan', ['current_week', 'last_week', 'final_through'])
+
+# Latest plan per league season, so fetches can tell final weeks apart
+# without another request
+season_plans = LRUCache(max_bytes=int(os.getenv('SEASON_PLAN_CACHE_MAX_MB', 1)) * 1024 * 1024)
+
+
+def is_week_final(data, week):
     """
-    Build team info map from ESPN API.
-    Returns dict: {team_id: {"team_name": "Mahomes Alone", "manager_name": "Will Hofner"}}
+    Check whether a scoring period is complete (its data can no longer change).
+
+    A week is final once ESPN's current scoring period has moved past it, or
+    once every matchup for that week has a decided winner.
+    """
+    if week is None or not data:
+        return False
+
+    current_week = data.get('status', {}).get('latestScoringPeriod') or data.get('scoringPeriodId')
+    if current_week and week < current_week:
+        return True
+
+    matchups = [m for m in data.get('schedule', []) if m.get('matchupPeriodId') == week]
+    return bool(matchups) and all(m.get('winner', 'UNDECIDED') != 'UNDECIDED' for m in matchups)
+
+
+def fetch_league_views(league_id, year, views, week=None):
+    """
+    Fetch raw league JSON for a set of views, going through the shared cache.
+    A stale live entry is returned as-is and refreshed in the background.
+
+    Args:
+        league_id: ESPN league ID
+        year: Season year
+        views: List of ESPN view names (e.g. ['mMatchup', 'mRoster'])
+        week: Optional scoringPeriodId
+
+    Returns:
+        tuple: (data dict, error string or None)
     """
-    url = f"https://lm-api-reads.fantasy.espn.com/apis/v3/games/ffl/seasons/{year}/segments/0/leagues/{league_id}"
-    params = {'view': ['mTeam']}
+    key = make_key(league_id, year, week, views)
+    cached, stale = week_cache.lookup(key)
+    if cached is not None:
+        if http_client.FIXTURE_MODE == 'record':
+            # Cache hits never reach http_client, so record them here
+            http_client.record_fixture(
+                LEAGUE_URL.format(year=year, league_id=league_id), _league_params(views, week),
+                cached, overwrite=False
+            )
+        if stale:
+            _schedule_refresh(key, league_id, year, views, week)
+        return cached, None
 
+    return fetch_flight.do(key, _fetch_and_cache, key, league_id, year, views, week)
+
+
+def _fetch_and_cache(key, league_id, year, views, week):
+    """Fetch from ESPN and store in the week cache (runs once per in-flight key)."""
+    # Another caller may have filled the cache while we waited to lead
+    cached = week_cache.get(key)
+    if cached is not None:
+        return cached, None
+    return _fetch_into_cache(key, league_id, year, views, week)
+
+
+def _league_params(views, week):
+    params = {'view': list(views)}
+    if week is not None:
+        params['scoringPeriodId'] = week
+    return params
+
+
+def _fetch_into_cache(key, league_id, year, views, week):
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = http_client.get_json(
+            LEAGUE_URL.format(year=year, league_id=league_id), params=_league_params(views, week)
+        )
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching team names: {e}")
         return None, str(e)
 
+    final = is_week_final(data, week) or is_planned_final(league_id, year, week)
+    week_cache.set(key, data, final=final)
+    return data, None
+
+
+def _schedule_refresh(key, league_id, year, views, week):
+    """Queue a background refresh for key unless one is already queued or running."""
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        _refresh_counts['scheduled'] += 1
+    refresh_executor.submit(_refresh, key, league_id, year, views, week)
+
+
+def _refresh(key, league_id, year, views, week):
+    """
+    Replace a stale entry: adopt a fresh copy another worker already put in
+    the shared store, otherwise refetch from ESPN. On failure the stale
+    entry keeps being served until it passes the live TTL.
+    """
+    try:
+        if week_cache.reload(key):
+            outcome = 'adopted'
+        else:
+            _data, error = fetch_flight.do(key, _fetch_into_cache, key, league_id, year, views, week)
+            outcome = 'failed' if error else 'fetched'
+            if error:
+                print(f"[ESPN] Background refresh of {key} failed: {error}")
+    except Exception as e:
+        outcome = 'failed'
+        print(f"[ESPN] Background refresh of {key} failed: {e}")
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(key)
+
+    with _refresh_lock:
+        _refresh_counts[outcome] += 1
+
+
+def refresh_stats():
+    """Return background refresh counters for monitoring."""
+    with _refresh_lock:
+        return {'in_flight': len(_refreshing), **_refresh_counts}
+
+
+def get_team_name_map(league_id, year):
+    """
+    Build team info map from ESPN API.
+    Returns dict: {team_id: {"team_name": "Mahomes Alone", "manager_name": "Will Hofner"}}
+    """
+    data, error = fetch_league_views(league_id, year, ['mTeam'])
+    if error:
+        print(f"Error fetching team names: {error}")
+        return None, error
+
     # Build member lookup by ID
     member_lookup = {}
     for member in data.get('members', []):
@@ -86,43 +249,309 @@ def fetch_league_data(league_id, year, week, include_transactions=False):
     Returns:
         tuple: (data dict, error string or None)
     """
-    url = f"https://lm-api-reads.fantasy.espn.com/apis/v3/games/ffl/seasons/{year}/segments/0/leagues/{league_id}"
-
-    views = ['mMatchup', 'mRoster', 'mTeam']
+    views = list(WEEK_VIEWS)
     if include_transactions:
         views.append('mPendingTransactions')
 
-    params = {
-        'view': views,
-        'scoringPeriodId': week
+    return fetch_league_views(league_id, year, views, week)
+
+
+def fetch_week_bundle(league_id, year, week):
+    """
+    Fetch and normalize one week of league data (the "week bundle").
+
+    This is the single per-week fetch shared by the season, weekly, draft and
+    waiver analyzers, so each week is downloaded once per dashboard.
+
+    Returns:
+        tuple: (bundle dict from parse_week_bundle, error string or None)
+    """
+    data, error = fetch_league_data(league_id, year, week)
+    if error or not data:
+        return None, error
+
+    # Falls back to the standard lineup if settings can't be fetched
+    lineup_slots, _ = get_lineup_slot_counts(league_id, year)
+
+    # The same bundle object is returned until the week's data (or the
+    # league's lineup settings) change, so the week isn't re-parsed; its
+    # 'version' lets downstream engines skip weeks they have already processed
+    key = make_key(league_id, year, week, WEEK_VIEWS)
+    version = week_cache.version(key, data)
+    cached = bundle_cache.get(key)
+    if cached is not None and version is not None and cached[0] == (version, lineup_slots):
+        return cached[1], None
+
+    bundle = parse_week_bundle(data, week, lineup_slots, version)
+    if version is not None:
+        bundle_cache.set(key, ((version, lineup_slots), bundle))
+    return bundle, None
+
+
+def fetch_week_version(league_id, year, week):
+    """
+    Return the content version of a week's data, fetching it if not cached.
+
+    Completed weeks are always 'final'; the live week's version changes when
+    ESPN's data for it changes.
+
+    Returns:
+        tuple: (version string, error string or None)
+    """
+    data, error = fetch_league_data(league_id, year, week)
+    if error or not data:
+        return None, error
+    return week_cache.version(make_key(league_id, year, week, WEEK_VIEWS)), None
+
+
+def parse_week_bundle(data, week, lineup_slots=None, version=None):
+    """
+    Normalize a raw mMatchup+mRoster+mTeam response for one week.
+
+    Args:
+        data: Raw league JSON for the week
+        week: Week number
+        lineup_slots: Optional (slot_id, count) pairs from
+            get_lineup_slot_counts (None = standard lineup)
+        version: Week cache content version of data (None if unknown)
+
+    Returns:
+        dict: {
+            'week': int,
+            'matchups': [{'home_id': int or None, 'away_id': int or None}],
+            'rosters': {team_id: [player row, ...]},
+            'teams': {team_id: {'team_id', 'team_name', 'abbrev', 'owners'}},
+            'lineup_slots': {slot_id: count} or None,
+            'version': str or None,
+        }
+
+        Each player row is a dict with player_id, name, position_id,
+        position (e.g. 'RB'), slot_id, points (unrounded), acquisition_type
+        and acquisition_date. Rosters come from the week's matchup when
+        available, otherwise from the team's roster snapshot.
+    """
+    matchups = []
+    matchup_entries = {}
+    for matchup in data.get('schedule', []):
+        if matchup.get('matchupPeriodId') != week:
+            continue
+        home_id = matchup.get('home', {}).get('teamId')
+        away_id = matchup.get('away', {}).get('teamId')
+        matchups.append({'home_id': home_id, 'away_id': away_id})
+
+        for side in ('home', 'away'):
+            team_entry = matchup.get(side, {})
+            team_id = team_entry.get('teamId')
+            if not team_id:
+                continue
+            entries = (
+                team_entry.get('rosterForCurrentScoringPeriod', {}).get('entries')
+                or team_entry.get('rosterForMatchupPeriod', {}).get('entries')
+            )
+            if entries:
+                matchup_entries[team_id] = entries
+
+    teams = {}
+    rosters = {}
+    for team in data.get('teams', []):
+        team_id = team.get('id')
+        location = (team.get('location', '') or '').strip()
+        nickname = (team.get('nickname', '') or '').strip()
+        teams[team_id] = {
+            'team_id': team_id,
+            'team_name': f"{location} {nickname}".strip() or f"Team {team_id}",
+            'abbrev': team.get('abbrev'),
+            'owners': team.get('owners', []),
+        }
+        entries = matchup_entries.get(team_id) or team.get('roster', {}).get('entries', [])
+        rosters[team_id] = [_parse_roster_entry(entry, week) for entry in entries]
+
+    # Teams that only appear in the schedule (views without mTeam)
+    for team_id, entries in matchup_entries.items():
+        if team_id not in rosters:
+            rosters[team_id] = [_parse_roster_entry(entry, week) for entry in entries]
+
+    return {
+        'week': week,
+        'matchups': matchups,
+        'rosters': rosters,
+        'teams': teams,
+        'lineup_slots': dict(lineup_slots) if lineup_slots else None,
+        'version': version,
     }
 
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json(), None
-    except requests.exceptions.RequestException as e:
-        return None, str(e)
+
+def _parse_roster_entry(entry, week):
+    """Normalize one roster entry into a player row."""
+    pool_entry = entry.get('playerPoolEntry', {})
+    player = pool_entry.get('player', {})
+    position_id = player.get('defaultPositionId', 0)
+
+    points = pool_entry.get('appliedStatTotal', 0)
+    # Fallback: this week's actual (statSourceId 0, not projected) stat line
+    if points == 0:
+        for stat in player.get('stats', []):
+            if stat.get('scoringPeriodId') == week and stat.get('statSourceId', 0) == 0:
+                points = stat.get('appliedTotal', 0)
+                break
+
+    return {
+        'player_id': player.get('id'),
+        'name': player.get('fullName', 'Unknown'),
+        'position_id': position_id,
+        'position': PLAYER_POSITION_MAP.get(position_id, 'Unknown'),
+        'slot_id': entry.get('lineupSlotId'),
+        'points': points,
+        'acquisition_type': entry.get('acquisitionType', -1),
+        'acquisition_date': entry.get('acquisitionDate', 0),
+    }
+
+
+def fetch_week_range(league_id, year, start_week, end_week, fetch_data_func=None, max_workers=MAX_FETCH_WORKERS):
+    """
+    Fetch a range of weeks with bounded concurrency.
+
+    Each week succeeds or fails on its own, so callers keep their per-week
+    error handling (e.g. processing_errors) exactly as with a serial loop.
+
+    Args:
+        league_id: ESPN league ID
+        year: Season year
+        start_week: First week to fetch
+        end_week: Last week to fetch (inclusive)
+        fetch_data_func: Function(league_id, year, week) -> (data, error).
+            Defaults to fetch_week_bundle.
+        max_workers: Max requests in flight at once
+
+    Returns:
+        List of (week, data, error) tuples in week order
+    """
+    return list(iter_week_range(league_id, year, start_week, end_week, fetch_data_func, max_workers))
+
+
+def iter_week_range(league_id, year, start_week, end_week, fetch_data_func=None, max_workers=MAX_FETCH_WORKERS):
+    """
+    Like fetch_week_range, but yields each (week, data, error) in week order
+    as soon as that week (and every week before it) has been fetched, so
+    callers can process early weeks while later ones are still in flight.
+    """
+    fetch_data_func = fetch_data_func or fetch_week_bundle
+    weeks = list(range(start_week, end_week + 1))
+
+    def fetch_one(week):
+        try:
+            data, error = fetch_data_func(league_id, year, week)
+        except Exception as e:
+            data, error = None, str(e)
+        return week, data, error
+
+    if len(weeks) <= 1 or max_workers <= 1:
+        for week in weeks:
+            yield fetch_one(week)
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(weeks))) as executor:
+        yield from executor.map(fetch_one, weeks)
+
+
+def get_lineup_slot_counts(league_id, year):
+    """
+    Get the league's starting lineup slots from the mSettings view.
+
+    Shares get_league_info's cached league-level response.
+
+    Returns:
+        tuple: (tuple of (slot_id, count) pairs for starting slots, sorted by
+        slot ID, or None if unavailable; error string or None)
+    """
+    data, error = fetch_league_views(league_id, year, LEAGUE_VIEWS)
+    if error or not data:
+        return None, error
+
+    counts = data.get('settings', {}).get('rosterSettings', {}).get('lineupSlotCounts') or {}
+    slots = tuple(sorted(
+        (int(slot_id), count) for slot_id, count in counts.items()
+        if count and int(slot_id) not in (20, 21)  # bench / IR
+    ))
+    return slots or None, None
 
 
 def get_league_info(league_id, year):
     """Get basic league information"""
-    url = f"https://lm-api-reads.fantasy.espn.com/apis/v3/games/ffl/seasons/{year}/segments/0/leagues/{league_id}"
-    params = {'view': ['mTeam', 'mSettings']}
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        settings = data.get('settings', {})
-        teams = data.get('teams', [])
-        
-        return {
-            'league_name': settings.get('name', 'Unknown League'),
-            'team_count': len(teams),
-            'current_week': data.get('scoringPeriodId', 1),
-            'final_week': settings.get('scheduleSettings', {}).get('matchupPeriodCount', 14)
-        }, None
-    except requests.exceptions.RequestException as e:
-        return None, str(e)
\ No newline at end of file
+    data, error = fetch_league_views(league_id, year, LEAGUE_VIEWS)
+    if error:
+        return None, error
+
+    settings = data.get('settings', {})
+    teams = data.get('teams', [])
+
+    return {
+        'league_name': settings.get('name', 'Unknown League'),
+        'team_count': len(teams),
+        'current_week': data.get('scoringPeriodId', 1),
+        'final_week': settings.get('scheduleSettings', {}).get('matchupPeriodCount', 14)
+    }, None
+
+
+def get_season_plan(league_id, year):
+    """
+    Work out which weeks of a season can have data, from the league's
+    mStatus/mSettings (the cached league-level response, so no extra request).
+
+    The season's last week is status.finalScoringPeriod, falling back to the
+    last scoring period of the schedule's matchup periods, then to
+    matchupPeriodCount. Weeks before the current one are final; once the
+    season is over, every week is.
+
+    Returns:
+        tuple: (SeasonPlan, error string or None)
+    """
+    data, error = fetch_league_views(league_id, year, LEAGUE_VIEWS)
+    if error or not data:
+        return None, error or 'No league data'
+
+    status = data.get('status', {})
+    schedule_settings = data.get('settings', {}).get('scheduleSettings', {})
+    matchup_periods = schedule_settings.get('matchupPeriods') or {}
+    last_week = (
+        status.get('finalScoringPeriod')
+        or max((max(periods) for periods in matchup_periods.values() if periods), default=None)
+        or schedule_settings.get('matchupPeriodCount')
+    )
+
+    current_week = status.get('latestScoringPeriod') or data.get('scoringPeriodId') or 1
+    if last_week:
+        current_week = min(current_week, last_week)
+    season_over = bool(last_week) and current_week >= last_week and not status.get('isActive', True)
+    final_through = current_week if season_over else current_week - 1
+
+    plan = SeasonPlan(current_week, last_week or current_week, final_through)
+    season_plans.set((str(league_id), year), plan)
+    return plan, None
+
+
+def is_planned_final(league_id, year, week):
+    """Whether the league's latest known season plan says week is final (no request is made)."""
+    if week is None:
+        return False
+    plan = season_plans.get((str(league_id), year))
+    return plan is not None and week <= plan.final_through
+
+
+def clamp_week_range(plan, start_week, end_week):
+    """
+    Clamp a requested week range to the weeks that can have data (completed
+    weeks plus the current one), so future weeks aren't fetched. A range
+    entirely in the future comes back empty (end_week < start_week).
+
+    Args:
+        plan: SeasonPlan from get_season_plan (None leaves the range as is)
+        start_week: First requested week
+        end_week: Last requested week
+
+    Returns:
+        (start_week, end_week)
+    """
+    if plan is None:
+        return start_week, end_week
+    return start_week, min(end_week, plan.current_week)
@@ -0,0 +1,161 @@
+"""
+Gasp previews for the dashboard cards
+The start/sit, draft and waiver pillars are computed concurrently, each with
+its own deadline, counted from when the pillar starts running (not from when
+it was queued). A pillar that misses its deadline is reported as pending
+rather than holding up the others; it keeps running in the background, and
+a retry (or the /draft and /waivers pages the dashboard preloads) while
+it's still running joins it instead of starting over. A pillar still queued
+behind other requests' pillars after GASP_PILLAR_QUEUE_S is cancelled and
+reported as busy, so an overloaded pool doesn't keep growing its queue.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from analysis import get_season_analysis, get_draft_analysis, get_waiver_analysis
+from stats.draft_analyzer import calculate_draft_alternatives
+from stats.team_calculator import detect_undefeated_optimal, detect_perfect_lineup_losses
+
+# Seconds each pillar gets before it's reported as pending
+GASP_PILLAR_DEADLINE_S = float(os.getenv('GASP_PILLAR_DEADLINE_S', 8))
+
+# Seconds a pillar may wait for a free worker before it's reported as busy
+GASP_PILLAR_QUEUE_S = float(os.getenv('GASP_PILLAR_QUEUE_S', 4))
+
+PILLARS = ('start_sit', 'draft', 'waiver')
+
+# Gasp-preview requests a worker process serves at once; the shared pool has
+# a thread per pillar for each of them, plus room for pillars that are still
+# running after their deadline
+GASP_CONCURRENT_REQUESTS = int(os.getenv('GASP_CONCURRENT_REQUESTS', 4))
+GASP_PILLAR_WORKERS = int(os.getenv('GASP_PILLAR_WORKERS', 2 * GASP_CONCURRENT_REQUESTS * len(PILLARS)))
+
+pillar_executor = ThreadPoolExecutor(max_workers=GASP_PILLAR_WORKERS, thread_name_prefix='gasp-pillar')
+
+
+def start_sit_preview(league_id, year, start_week, end_week, team_id, team_name_map):
+    """Start/Sit pillar: optimal record + one-player-away count"""
+    results = get_season_analysis(league_id, year, start_week, end_week, team_name_map)
+    if team_id not in results['team_stats']:
+        return None, None
+
+    ts = results['team_stats'][team_id]
+    optimal = detect_undefeated_optimal(team_id, results['team_stats'])
+    perfect_losses = detect_perfect_lineup_losses(team_id, results['team_stats'], team_name_map)
+    return {
+        'optimal_record': f"{optimal['optimal_wins']}-{optimal['optimal_losses']}",
+        'actual_record': f"{optimal['actual_wins']}-{optimal['actual_losses']}",
+        'wins_left_on_bench': optimal['wins_left_on_bench'],
+        'undefeated_optimal': optimal['undefeated'],
+        'perfect_lineup_losses': len(perfect_losses),
+        'one_player_away_losses': len(ts.get('one_player_away_losses', [])),
+        'total_points_lost': round(ts.get('points_lost', 0), 1),
+    }, None
+
+
+def draft_preview(league_id, year, start_week, end_week, team_id, team_name_map):
+    """Draft pillar: biggest miss"""
+    draft_result, error = get_draft_analysis(league_id, year, start_week, end_week)
+    if error:
+        return None, error
+
+    alternatives = calculate_draft_alternatives(draft_result['picks'], team_id)
+    biggest_miss = max(alternatives, key=lambda a: a['missed_points']) if alternatives else None
+    if not biggest_miss or biggest_miss['missed_points'] <= 0:
+        return None, None
+    return {
+        'biggest_miss_player': biggest_miss['your_pick']['player_name'],
+        'best_alternative': biggest_miss['best_alternative']['player_name'],
+        'missed_points': biggest_miss['missed_points'],
+        'round': biggest_miss['your_pick']['round'],
+    }, None
+
+
+def waiver_preview(league_id, year, start_week, end_week, team_id, team_name_map):
+    """Waiver pillar: transaction count + best pickup"""
+    waiver_result, error = get_waiver_analysis(league_id, year, start_week, end_week)
+    if error:
+        return None, error
+
+    team_txns = [t for t in waiver_result.get('transactions', []) if t.get('to_team_id') == team_id]
+    awards = waiver_result.get('awards', {})
+    return {
+        'total_moves': len(team_txns),
+        'league_total_moves': len(waiver_result.get('transactions', [])),
+        'diamond': awards.get('diamond_in_the_rough', {}).get('player_name') if awards.get('diamond_in_the_rough') else None,
+    }, None
+
+
+PILLAR_FUNCS = {
+    'start_sit': start_sit_preview,
+    'draft': draft_preview,
+    'waiver': waiver_preview,
+}
+
+
+def _run_pillar(started, func, *args):
+    """Run a pillar, recording when it left the queue."""
+    started['at'] = time.monotonic()
+    started['event'].set()
+    return func(*args)
+
+
+def get_gasp_previews(league_id, year, start_week, end_week, team_id, team_name_map,
+                      deadline=GASP_PILLAR_DEADLINE_S, queue_wait=GASP_PILLAR_QUEUE_S):
+    """
+    Compute every pillar's preview concurrently.
+
+    Args:
+        league_id: ESPN league ID
+        year: Season year
+        start_week: First week of the range
+        end_week: Last week of the range
+        team_id: Team the previews are for
+        team_name_map: Dictionary mapping team IDs to names
+        deadline: Seconds each pillar gets, counted from when it starts running
+        queue_wait: Seconds a pillar may wait for a free worker
+
+    Returns:
+        Dict with each pillar's preview (None if it has nothing to show, or
+        didn't finish), 'pending' (pillars that missed their deadline),
+        'busy' (pillars that never got a worker) and 'errors' ({pillar:
+        message} for pillars that failed)
+    """
+    submitted = time.monotonic()
+    runs = {}
+    for pillar in PILLARS:
+        started = {'event': threading.Event(), 'at': None}
+        future = pillar_executor.submit(
+            _run_pillar, started, PILLAR_FUNCS[pillar],
+            league_id, year, start_week, end_week, team_id, team_name_map
+        )
+        runs[pillar] = (started, future)
+
+    previews = {pillar: None for pillar in PILLARS}
+    previews['pending'] = []
+    previews['busy'] = []
+    previews['errors'] = {}
+    for pillar, (started, future) in runs.items():
+        if not started['event'].wait(max(0.0, submitted + queue_wait - time.monotonic())) and future.cancel():
+            previews['busy'].append(pillar)
+            continue
+        started['event'].wait()
+        try:
+            preview, error = future.result(timeout=max(0.0, started['at'] + deadline - time.monotonic()))
+        except TimeoutError:
+            previews['pending'].append(pillar)
+            continue
+        except Exception as e:
+            previews['errors'][pillar] = str(e)
+            continue
+        previews[pillar] = preview
+        if error:
+            previews['errors'][pillar] = error
+
+    if previews['pending']:
+        print(f"[Gasp] {league_id}/{team_id}: {', '.join(previews['pending'])} still running after {deadline}s")
+    if previews['busy']:
+        print(f"[Gasp] {league_id}/{team_id}: {', '.join(previews['busy'])} waited {queue_wait}s for a worker")
+    return previews
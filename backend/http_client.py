@@ -0,0 +1,243 @@
+"""
+Shared HTTP Client for ESPN APIs
+Every ESPN request goes through one pooled requests.Session per process:
+keep-alive connection reuse, gzip, per-call timeouts and a total deadline,
+and jittered exponential backoff on 429 / 5xx / connection errors.
+
+ESPN_FIXTURE_MODE turns the client into a record/replay harness:
+    record - every decoded response is also written to ESPN_FIXTURE_DIR,
+             one JSON file per URL + params (ESPN responses served from the
+             week cache / shared store are recorded too, see espn_api)
+    replay - responses are served from ESPN_FIXTURE_DIR and the network is
+             never touched; a missing fixture fails like a request error
+             (ESPN_FIXTURE_LATENCY_MS adds a fixed delay per response)
+Replaying with CACHE_BACKEND=memory runs the whole app offline with
+deterministic data and timings, for benchmarks, load tests and demos.
+"""
+import hashlib
+import json
+import os
+import time
+import random
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = float(os.getenv('ESPN_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.getenv('ESPN_READ_TIMEOUT', 10))
+DEFAULT_DEADLINE = float(os.getenv('ESPN_REQUEST_DEADLINE', 30))
+MAX_RETRIES = int(os.getenv('ESPN_MAX_RETRIES', 3))
+POOL_SIZE = int(os.getenv('ESPN_POOL_SIZE', 16))
+
+FIXTURE_MODE = os.getenv('ESPN_FIXTURE_MODE', 'off')
+FIXTURE_DIR = Path(os.getenv(
+    'ESPN_FIXTURE_DIR', str(Path(__file__).parent.parent / 'dev' / 'fixtures' / 'espn')
+))
+FIXTURE_LATENCY_MS = float(os.getenv('ESPN_FIXTURE_LATENCY_MS', 0))
+if FIXTURE_MODE not in ('off', 'record', 'replay'):
+    raise ValueError(f"Unknown ESPN_FIXTURE_MODE {FIXTURE_MODE!r} (expected off, record or replay)")
+
+BACKOFF_BASE = 0.5   # seconds
+BACKOFF_MAX = 8.0    # seconds
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_pid = None
+_lock = threading.Lock()
+
+_counters = {
+    'requests': 0,
+    'retries': 0,
+    'throttled': 0,
+    'server_errors': 0,
+    'connection_errors': 0,
+    'failures': 0,
+    'recorded': 0,
+    'replayed': 0,
+    'fixture_misses': 0,
+}
+
+
+class FixtureMissing(requests.exceptions.RequestException):
+    """Replay mode has no recorded response for a request."""
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def get_session():
+    """Return this process's pooled session (recreated after a fork)."""
+    global _session, _session_pid
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                'Accept': 'application/json',
+                'Accept-Encoding': 'gzip, deflate',
+                'Connection': 'keep-alive',
+            })
+            _session = session
+            _session_pid = os.getpid()
+        return _session
+
+
+def _backoff_delay(attempt, response=None):
+    """Full-jitter exponential backoff, honoring Retry-After when ESPN sends it."""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _attempt_timeout(timeout, give_up_at):
+    """Per-attempt (connect, read) timeout, capped at the time left before give_up_at."""
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    if give_up_at is None:
+        return connect, read
+    remaining = give_up_at - time.monotonic()
+    if remaining <= 0:
+        raise requests.exceptions.Timeout('Request deadline exceeded')
+    return min(connect, remaining), min(read, remaining)
+
+
+def _fixture_path(url, params):
+    """Fixture file for a request: <dir>/<host>/<path-slug>-<hash of URL + params>.json"""
+    parts = urlsplit(url)
+    canonical = sorted(
+        (str(key), sorted(map(str, value)) if isinstance(value, (list, tuple)) else [str(value)])
+        for key, value in (params or {}).items()
+    )
+    digest = hashlib.blake2b(repr((url, canonical)).encode(), digest_size=10).hexdigest()
+    slug = '_'.join(segment for segment in parts.path.split('/')[-2:] if segment) or 'root'
+    return FIXTURE_DIR / parts.netloc / f"{slug}-{digest}.json"
+
+
+def _replay_fixture(url, params):
+    path = _fixture_path(url, params)
+    try:
+        with open(path) as f:
+            fixture = json.load(f)
+    except FileNotFoundError:
+        _count('fixture_misses')
+        raise FixtureMissing(f"No recorded fixture for {url} {params or {}} ({path.name})")
+    if FIXTURE_LATENCY_MS:
+        time.sleep(FIXTURE_LATENCY_MS / 1000)
+    _count('replayed')
+    return fixture['body']
+
+
+def record_fixture(url, params, body, overwrite=True):
+    """
+    Write a response to the fixture directory (record mode). Called for
+    every response get_json decodes, and by callers whose caches answered
+    without reaching the network, so a record run against warm caches still
+    captures every request.
+
+    Args:
+        url: Request URL
+        params: Query params, as passed to get_json
+        body: Decoded JSON response
+        overwrite: False keeps an existing fixture for the request
+    """
+    path = _fixture_path(url, params)
+    if not overwrite and path.exists():
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'url': url, 'params': params or {}, 'body': body}, f)
+        os.replace(tmp_path, path)
+        _count('recorded')
+    except OSError as e:
+        print(f"[HTTP] Could not record fixture {path}: {e}")
+
+
+def get_json(url, params=None, timeout=None, deadline=DEFAULT_DEADLINE, max_retries=MAX_RETRIES):
+    """
+    GET a URL and decode the JSON body.
+
+    Args:
+        url: Request URL
+        params: Query params (lists are sent as repeated keys)
+        timeout: Per-attempt timeout, float or (connect, read) tuple
+        deadline: Total seconds allowed across all attempts and backoff;
+            each attempt's timeout is capped at the time left
+        max_retries: Retries after the first attempt
+
+    Returns:
+        Decoded JSON
+
+    Raises:
+        requests.exceptions.RequestException on failure after retries
+    """
+    if FIXTURE_MODE == 'replay':
+        return _replay_fixture(url, params)
+
+    session = get_session()
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    give_up_at = time.monotonic() + deadline if deadline else None
+    attempt = 0
+
+    while True:
+        _count('requests')
+        response = None
+        try:
+            response = session.get(url, params=params, timeout=_attempt_timeout(timeout, give_up_at))
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                body = response.json()
+                if FIXTURE_MODE == 'record':
+                    record_fixture(url, params, body)
+                return body
+            _count('throttled' if response.status_code == 429 else 'server_errors')
+            error = requests.exceptions.HTTPError(
+                f"{response.status_code} Error for url: {response.url}", response=response
+            )
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            _count('connection_errors')
+            error = e
+        except requests.exceptions.RequestException:
+            _count('failures')
+            raise
+
+        delay = _backoff_delay(attempt, response)
+        out_of_time = give_up_at is not None and time.monotonic() + delay >= give_up_at
+        if attempt >= max_retries or out_of_time:
+            _count('failures')
+            raise error
+
+        if response is not None and response.status_code == 429:
+            print(f"[HTTP] ESPN throttled us (429), retrying in {delay:.1f}s")
+        _count('retries')
+        time.sleep(delay)
+        attempt += 1
+
+
+def get_stats():
+    """Return request/retry counters plus connection pool usage."""
+    with _lock:
+        stats = dict(_counters)
+        session = _session
+
+    pools = []
+    if session is not None:
+        for adapter in set(session.adapters.values()):
+            manager_pools = adapter.poolmanager.pools
+            pools.extend(p for p in (manager_pools.get(k) for k in manager_pools.keys()) if p)
+
+    stats['fixture_mode'] = FIXTURE_MODE
+    stats['pool_maxsize'] = POOL_SIZE
+    stats['open_pools'] = len(pools)
+    stats['connections_opened'] = sum(p.num_connections for p in pools)
+    stats['pooled_requests'] = sum(p.num_requests for p in pools)
+    return stats
@@ -5,6 +5,8 @@ Fetches real NFL game scores and results for a given week
 import requests
 from datetime import datetime, timedelta
 
+import http_client
+
 NFL_SCOREBOARD_URL = "https://site.api.espn.com/apis/site/v2/sports/football/nfl/scoreboard"
 
 
@@ -57,9 +59,7 @@ def fetch_nfl_scores(year, week):
             'limit': 100
         }
 
-        response = requests.get(NFL_SCOREBOARD_URL, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = http_client.get_json(NFL_SCOREBOARD_URL, params=params, timeout=10)
 
         games = []
         for event in data.get('events', []):
@@ -0,0 +1,168 @@
+"""
+API response layer
+JSON is encoded with orjson (falling back to the stdlib encoder), large JSON
+bodies are gzip/brotli compressed for clients that accept it, and every JSON
+response carries a strong ETag so If-None-Match can be answered with 304.
+
+Routes whose output is a function of versioned inputs (the season analyses)
+derive the ETag from those inputs via request_etag, which lets them answer
+304 before computing anything. Other routes get an ETag hashed from the body,
+which saves the transfer but not the work.
+"""
+import gzip
+import hashlib
+import os
+
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+from stats.player_week import PlayerWeek
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# JSON bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 5))
+
+# Mixed into input-derived ETags; change it on deploys that change response
+# shapes so clients don't keep revalidating against the old format
+ETAG_SALT = os.getenv('ETAG_SALT', '')
+
+_ENCODING_SUFFIXES = ('', '-gzip', '-br')
+
+
+class AppJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that encodes responses with orjson when it's installed and
+    also handles compact PlayerWeek rows. Responses hold the same JSON as the
+    stdlib provider's (sorted keys, non-string dict keys as strings), just
+    without the ASCII escaping.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, PlayerWeek):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            encoded = self._orjson_dumps(obj)
+            if encoded is not None:
+                return encoded.decode()
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        encoded = self._orjson_dumps(obj) if orjson is not None and not self._app.debug else None
+        if encoded is None:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(encoded, mimetype=self.mimetype)
+
+    def _orjson_dumps(self, obj):
+        """orjson bytes, or None for values orjson can't encode (e.g. ints beyond 64 bits)."""
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=self.default, option=options)
+        except (TypeError, orjson.JSONEncodeError):
+            return None
+
+
+def _etag_digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def request_etag(versions):
+    """
+    Strong ETag for the current request, derived from the versions of the
+    data it's computed from (so it can be checked before computing).
+
+    Args:
+        versions: Input fingerprint, e.g. analysis.AnalysisInputs.versions
+
+    Returns:
+        ETag string, or None if the inputs couldn't be versioned
+    """
+    if versions is None:
+        return None
+    args = sorted(request.args.items(multi=True))
+    return _etag_digest(repr((ETAG_SALT, request.path, args, versions)).encode())
+
+
+def etag_matches(etag):
+    """Whether the request's If-None-Match already names this ETag (any encoding)."""
+    if etag is None:
+        return False
+    return any(request.if_none_match.contains_weak(etag + suffix) for suffix in _ENCODING_SUFFIXES)
+
+
+def _accepted_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def finalize_json_response(response):
+    """
+    after_request hook for JSON responses: adds a content ETag if the route
+    didn't set one, answers If-None-Match with 304, and compresses the body.
+    """
+    if (response.mimetype != 'application/json' or response.is_streamed or response.direct_passthrough
+            or response.status_code != 200 or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if 'Cache-Control' not in response.headers:
+        # Cacheable, but revalidate with the ETag before reuse
+        response.headers['Cache-Control'] = 'no-cache'
+
+    etag, _weak = response.get_etag()
+    if etag is None:
+        etag = _etag_digest(response.get_data())
+    if etag_matches(etag):
+        response.set_etag(etag)
+        response.status_code = 304
+        response.set_data(b'')
+        response.headers.pop('Content-Length', None)
+        return response
+
+    encoding = _accepted_encoding()
+    body = response.get_data()
+    if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+        response.set_etag(etag)
+        return response
+
+    response.set_data(_compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # Each encoding is its own representation, so it gets its own strong ETag
+    response.set_etag(f"{etag}-{encoding}")
+    return response
+
+
+def not_modified(etag):
+    """Empty 304 for a request whose If-None-Match matched an input ETag."""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -4,8 +4,13 @@ Advanced Statistics Package — Phase 1 (Tier 1)
 """
 import statistics
 
+import numpy as np
 
-def calculate_advanced_stats(stats, all_team_stats, team_name_map):
+from .score_matrix import ScoreMatrix
+from .player_week import player_key
+
+
+def calculate_advanced_stats(stats, all_team_stats, team_name_map, matrix=None):
     """
     Calculate all advanced statistics for one team (Phase 1 + Phase 2).
 
@@ -13,18 +18,23 @@ def calculate_advanced_stats(stats, all_team_stats, team_name_map):
         stats: Single team's stats dict (after post_season_stats)
         all_team_stats: All teams' stats dict (for league comparisons)
         team_name_map: Team name mapping
+        matrix: Optional ScoreMatrix for all_team_stats. Build it once and
+            pass it in when computing every team; built here if omitted.
 
     Returns:
         Dict with all advanced stat categories
     """
+    m = matrix if matrix is not None else ScoreMatrix(all_team_stats)
+    row = next(m.row(tid) for tid, ts in all_team_stats.items() if ts is stats)
+
     # Phase 1
     result = {
-        'consistency': _calc_consistency(stats),
+        'consistency': _calc_consistency(stats, m, row),
         'position_iq': _calc_position_iq(stats),
-        'clutch_factor': _calc_clutch_factor(stats, team_name_map),
+        'clutch_factor': _calc_clutch_factor(stats, team_name_map, m, row),
         'bench_narratives': _calc_bench_narratives(stats),
         'extreme_moments': _calc_extreme_moments(stats, team_name_map),
-        'league_comparison': _calc_league_comparisons(stats, all_team_stats),
+        'league_comparison': _calc_league_comparisons(stats, all_team_stats, m, row),
         'streaks': _calc_streaks(stats),
         'what_if': _calc_what_if(stats, team_name_map),
     }
@@ -33,7 +43,7 @@ def calculate_advanced_stats(stats, all_team_stats, team_name_map):
     result['head_to_head'] = _calc_head_to_head(stats, all_team_stats, team_name_map)
     result['roster_tenure'] = _calc_roster_tenure(stats, all_team_stats)
     result['season_splits'] = _calc_season_splits(stats)
-    result['manager_archetype'] = _calc_manager_archetype(stats, all_team_stats, result)
+    result['manager_archetype'] = _calc_manager_archetype(stats, all_team_stats, result, m, row)
     result['coach_vs_gm'] = _calc_coach_vs_gm(stats, all_team_stats)
 
     return result
@@ -53,15 +63,15 @@ def _resolve_name(team_name_map, team_id):
     return info
 
 
-def _get_optimal_names(week_data):
-    """Extract set of optimal player names from weekly data."""
-    names = set()
+def _get_optimal_keys(week_data):
+    """Extract set of optimal player keys (see player_key) from weekly data."""
+    keys = set()
     for item in week_data.get('optimal_lineup', []):
         if isinstance(item, dict):
-            names.add(item['player']['name'])
+            keys.add(player_key(item['player']))
         else:
-            names.add(item[1]['name'])
-    return names
+            keys.add(player_key(item[1]))
+    return keys
 
 
 def _get_optimal_player(week_data, position_label):
@@ -80,7 +90,7 @@ def _get_optimal_player(week_data, position_label):
 # Category 1: Consistency & Volatility
 # ---------------------------------------------------------------------------
 
-def _calc_consistency(stats):
+def _calc_consistency(stats, m, row):
     weekly = stats.get('weekly_points', [])
     if not weekly:
         return {}
@@ -88,18 +98,15 @@ def _calc_consistency(stats):
     avg = statistics.mean(weekly)
     std = statistics.stdev(weekly) if len(weekly) > 1 else 0.0
 
-    boom_count = sum(1 for w in weekly if w > 120)
-    bust_count = sum(1 for w in weekly if w < 80)
+    points = np.asarray(weekly, dtype=float)
+    boom_count = int((points > 120).sum())
+    bust_count = int((points < 80).sum())
     ratio = round(boom_count / bust_count, 2) if bust_count > 0 else float(boom_count)
 
-    predictable = sum(1 for w in weekly if abs(w - avg) <= 10)
+    predictable = int((np.abs(points - avg) <= 10).sum())
 
     # Errors by week
-    errors_by_week = []
-    for wd in stats.get('weekly_data', []):
-        optimal_names = _get_optimal_names(wd)
-        starter_names = set(p['name'] for p in wd.get('starters', []))
-        errors_by_week.append(len(optimal_names - starter_names))
+    errors_by_week = m.values(m.errors, row)
 
     worst_idx = errors_by_week.index(max(errors_by_week)) if errors_by_week else 0
     weeks = [wd['week'] for wd in stats.get('weekly_data', [])]
@@ -134,23 +141,18 @@ def _calc_position_iq(stats):
     worst_flex = None
 
     for wd in stats.get('weekly_data', []):
-        optimal_names = _get_optimal_names(wd)
-        starter_names = set(p['name'] for p in wd.get('starters', []))
+        optimal_keys = _get_optimal_keys(wd)
+        starter_keys = set(player_key(p) for p in wd.get('starters', []))
 
-        # Build optimal name->position map
+        # Build optimal player->position map
         optimal_map = {}
         for item in wd.get('optimal_lineup', []):
-            if isinstance(item, dict):
-                name = item['player']['name']
-                pos = item['player'].get('actual_position', 'Unknown')
-            else:
-                name = item[1]['name']
-                pos = item[1].get('actual_position', 'Unknown')
-            optimal_map[name] = pos
+            player = item['player'] if isinstance(item, dict) else item[1]
+            optimal_map[player_key(player)] = player.get('actual_position', 'Unknown')
 
         # Errors by position
-        for name in optimal_names - starter_names:
-            pos = optimal_map.get(name, 'Unknown')
+        for key in optimal_keys - starter_keys:
+            pos = optimal_map.get(key, 'Unknown')
             errors_by_pos[pos] = errors_by_pos.get(pos, 0) + 1
 
         # FLEX analysis
@@ -162,7 +164,7 @@ def _calc_position_iq(stats):
 
         if flex_starter:
             optimal_flex = _get_optimal_player(wd, 'FLEX')
-            if optimal_flex and optimal_flex['name'] != flex_starter['name']:
+            if optimal_flex and player_key(optimal_flex) != player_key(flex_starter):
                 diff = optimal_flex['points'] - flex_starter['points']
                 if diff > 0:
                     flex_points_lost += diff
@@ -195,41 +197,34 @@ def _calc_position_iq(stats):
 # Category 3: Win/Loss Context (Clutch Factor)
 # ---------------------------------------------------------------------------
 
-def _calc_clutch_factor(stats, team_name_map):
-    close_wins = close_losses = 0
-    blowout_wins = blowout_losses = 0
-    nailbiter_wins = nailbiter_losses = 0
+def _calc_clutch_factor(stats, team_name_map, m, row):
+    weekly = stats.get('weekly_data', [])
+    margins = np.abs(np.asarray(m.values(m.margin, row), dtype=float))
+    won = np.asarray(m.values(m.won, row), dtype=bool)
+
+    nailbiter = margins < 3
+    close = margins < 10
+    blowout = margins > 30
+    nailbiter_wins = int((nailbiter & won).sum())
+    nailbiter_losses = int((nailbiter & ~won).sum())
+    close_wins = int((close & won).sum())
+    close_losses = int((close & ~won).sum())
+    blowout_wins = int((blowout & won).sum())
+    blowout_losses = int((blowout & ~won).sum())
+
+    # Closest game: smallest sub-3 margin, earliest week on ties
     closest_game = None
-
-    for wd in stats.get('weekly_data', []):
-        margin = abs(wd['my_score'] - wd['opp_score'])
-
-        if margin < 3:
-            if wd['won']:
-                nailbiter_wins += 1
-            else:
-                nailbiter_losses += 1
-            if closest_game is None or margin < closest_game['margin']:
-                closest_game = {
-                    'week': wd['week'],
-                    'margin': round(margin, 2),
-                    'won': wd['won'],
-                    'my_score': wd['my_score'],
-                    'opp_score': wd['opp_score'],
-                    'opponent': _resolve_name(team_name_map, wd['opponent_id']),
-                }
-
-        if margin < 10:
-            if wd['won']:
-                close_wins += 1
-            else:
-                close_losses += 1
-
-        if margin > 30:
-            if wd['won']:
-                blowout_wins += 1
-            else:
-                blowout_losses += 1
+    if nailbiter.any():
+        idx = int(np.argmin(np.where(nailbiter, margins, np.inf)))
+        wd = weekly[idx]
+        closest_game = {
+            'week': wd['week'],
+            'margin': round(float(margins[idx]), 2),
+            'won': wd['won'],
+            'my_score': wd['my_score'],
+            'opp_score': wd['opp_score'],
+            'opponent': _resolve_name(team_name_map, wd['opponent_id']),
+        }
 
     return {
         'close_game_wins': close_wins,
@@ -323,43 +318,27 @@ def _calc_extreme_moments(stats, team_name_map):
 # Category 6: League Comparative Stats
 # ---------------------------------------------------------------------------
 
-def _calc_league_comparisons(stats, all_team_stats):
-    # Build weekly scoreboard: {week: [score1, score2, ...]}
-    weekly_scores = {}
-    for _tid, ts in all_team_stats.items():
-        for wd in ts.get('weekly_data', []):
-            week = wd['week']
-            weekly_scores.setdefault(week, []).append(wd['my_score'])
-
+def _calc_league_comparisons(stats, all_team_stats, m, row):
     # Strength of schedule
-    opp_scores = [wd['opp_score'] for wd in stats.get('weekly_data', [])]
-    avg_opp = statistics.mean(opp_scores) if opp_scores else 0.0
-    all_scores = [s for scores in weekly_scores.values() for s in scores]
-    league_avg = statistics.mean(all_scores) if all_scores else 0.0
+    avg_opp = m.avg_opp_scores[row]
+    league_avg = m.league_avg_score
 
     # Rank schedule difficulty across all teams
-    team_avg_opps = {}
-    for tid, ts in all_team_stats.items():
-        opps = [wd['opp_score'] for wd in ts.get('weekly_data', [])]
-        team_avg_opps[tid] = statistics.mean(opps) if opps else 0.0
-    sorted_sos = sorted(team_avg_opps.values(), reverse=True)
+    sorted_sos = sorted(m.avg_opp_scores, reverse=True)
     sos_rank = 1
     for i, val in enumerate(sorted_sos):
         if abs(val - avg_opp) < 0.01:
             sos_rank = i + 1
             break
 
-    # Lucky wins / unlucky losses
+    # Lucky wins / unlucky losses (per-week league scoreboard from the matrix)
     lucky_wins = []
     unlucky_losses = []
 
-    for wd in stats.get('weekly_data', []):
-        week = wd['week']
-        scores_that_week = weekly_scores.get(week, [])
-        if not scores_that_week:
-            continue
-        my_rank = sum(1 for s in scores_that_week if s < wd['my_score'])
-        total = len(scores_that_week)
+    teams_below = m.values(m.teams_below, row)
+    teams_per_week = m.teams_per_week[m.played[row]].tolist()
+
+    for wd, my_rank, total in zip(stats.get('weekly_data', []), teams_below, teams_per_week):
         percentile = round((my_rank / total) * 100) if total > 0 else 50
 
         if wd['won'] and percentile <= 30:
@@ -428,12 +407,16 @@ def _calc_streaks(stats):
     worst = {'weeks': [], 'total': float('inf'), 'avg': 0}
 
     if len(points) >= 3:
-        for i in range(len(points) - 2):
-            total = sum(points[i:i + 3])
-            if total > peak['total']:
-                peak = {'weeks': weeks[i:i + 3], 'total': round(total, 2), 'avg': round(total / 3, 2)}
-            if total < worst['total']:
-                worst = {'weeks': weeks[i:i + 3], 'total': round(total, 2), 'avg': round(total / 3, 2)}
+        pts = np.asarray(points, dtype=float)
+        totals = pts[:-2] + pts[1:-1] + pts[2:]
+        best_i = int(np.argmax(totals))
+        worst_i = int(np.argmin(totals))
+        if totals[best_i] > peak['total']:
+            total = float(totals[best_i])
+            peak = {'weeks': weeks[best_i:best_i + 3], 'total': round(total, 2), 'avg': round(total / 3, 2)}
+        if totals[worst_i] < worst['total']:
+            total = float(totals[worst_i])
+            worst = {'weeks': weeks[worst_i:worst_i + 3], 'total': round(total, 2), 'avg': round(total / 3, 2)}
 
     if worst['total'] == float('inf'):
         worst = {'weeks': [], 'total': 0, 'avg': 0}
@@ -608,37 +591,37 @@ def _calc_roster_tenure(stats, all_team_stats):
         return {}
 
     # Count starts per player
-    starter_counts = {}   # name -> {starts, total_points, position, weeks}
-    all_players = {}      # name -> {starts + bench appearances, total_points}
+    starter_counts = {}   # player key -> {name, starts, total_points, position, weeks}
+    all_players = {}      # player key -> {starts + bench appearances, total_points}
 
     for wd in weekly:
         for s in wd.get('starters', []):
-            name = s['name']
-            if name not in starter_counts:
-                starter_counts[name] = {
-                    'starts': 0, 'total_points': 0.0,
+            key = player_key(s)
+            if key not in starter_counts:
+                starter_counts[key] = {
+                    'name': s['name'], 'starts': 0, 'total_points': 0.0,
                     'position': s.get('actual_position', ''), 'weeks': [],
                 }
-            starter_counts[name]['starts'] += 1
-            starter_counts[name]['total_points'] += s['points']
-            starter_counts[name]['weeks'].append(wd['week'])
+            starter_counts[key]['starts'] += 1
+            starter_counts[key]['total_points'] += s['points']
+            starter_counts[key]['weeks'].append(wd['week'])
 
         for p in wd.get('starters', []) + wd.get('bench', []):
-            name = p['name']
-            if name not in all_players:
-                all_players[name] = {'appearances': 0, 'total_points': 0.0}
-            all_players[name]['appearances'] += 1
-            all_players[name]['total_points'] += p['points']
+            key = player_key(p)
+            if key not in all_players:
+                all_players[key] = {'appearances': 0, 'total_points': 0.0}
+            all_players[key]['appearances'] += 1
+            all_players[key]['total_points'] += p['points']
 
     total_weeks = len(weekly)
 
     # Iron Man: most starts
     iron_man = None
     if starter_counts:
-        im_name = max(starter_counts, key=lambda n: starter_counts[n]['starts'])
-        im = starter_counts[im_name]
+        im_key = max(starter_counts, key=lambda k: starter_counts[k]['starts'])
+        im = starter_counts[im_key]
         iron_man = {
-            'player': im_name,
+            'player': im['name'],
             'position': im['position'],
             'starts': im['starts'],
             'total_weeks': total_weeks,
@@ -647,10 +630,10 @@ def _calc_roster_tenure(stats, all_team_stats):
 
     # Flash in Pan: exactly 1 start
     flash_in_pan = []
-    for name, data in starter_counts.items():
+    for data in starter_counts.values():
         if data['starts'] == 1:
             flash_in_pan.append({
-                'player': name,
+                'player': data['name'],
                 'position': data['position'],
                 'week': data['weeks'][0],
                 'points': round(data['total_points'], 2),
@@ -680,7 +663,7 @@ def _calc_roster_tenure(stats, all_team_stats):
 
     # Positional depth: count starters per position with >1 start
     pos_depth = {}
-    for name, data in starter_counts.items():
+    for data in starter_counts.values():
         pos = data['position']
         if not pos:
             continue
@@ -763,7 +746,7 @@ def _calc_season_splits(stats):
 # PHASE 2: Manager Archetype Classification
 # ---------------------------------------------------------------------------
 
-def _calc_manager_archetype(stats, all_team_stats, adv_stats):
+def _calc_manager_archetype(stats, all_team_stats, adv_stats, m, row):
     """Auto-classify into one of 8 archetypes based on stats patterns."""
     consistency = adv_stats.get('consistency', {})
     clutch = adv_stats.get('clutch_factor', {})
@@ -781,18 +764,11 @@ def _calc_manager_archetype(stats, all_team_stats, adv_stats):
     close_losses = clutch.get('close_game_losses', 0)
 
     # Count unique starters across weeks (proxy for tinkering)
-    unique_starters = set()
-    for wd in stats.get('weekly_data', []):
-        for s in wd.get('starters', []):
-            unique_starters.add(s['name'])
+    unique_starters = int(m.unique_starters[row])
 
     # League percentiles for each metric
     all_errors = sorted(ts.get('errors', 0) for ts in all_team_stats.values())
-    all_stdevs = sorted(
-        statistics.stdev(ts.get('weekly_points', [0, 0]))
-        for ts in all_team_stats.values()
-        if len(ts.get('weekly_points', [])) > 1
-    )
+    all_stdevs = m.sorted_stdevs
 
     error_pct = _percentile_rank(errors, all_errors)
     std_pct = _percentile_rank(std_dev, all_stdevs)
@@ -826,10 +802,10 @@ def _calc_manager_archetype(stats, all_team_stats, adv_stats):
         archetype = 'The Snakebitten'
         description = 'You deserved better. The schedule did you dirty.'
         supporting = [f"{unlucky_losses} unlucky losses", "Outscored most teams and still lost"]
-    elif len(unique_starters) >= 20:
+    elif unique_starters >= 20:
         archetype = 'The Tinkerer'
         description = 'Never satisfied. Always tweaking, always changing.'
-        supporting = [f"{len(unique_starters)} unique starters", "Most roster churn in the league"]
+        supporting = [f"{unique_starters} unique starters", "Most roster churn in the league"]
     elif close_wins > close_losses and close_wins >= 3:
         archetype = 'The Closer'
         description = 'Ice in your veins in close games.'
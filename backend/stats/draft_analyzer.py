@@ -10,8 +10,7 @@ import math
 from pathlib import Path
 from collections import defaultdict
 
-import requests
-from espn_api import PLAYER_POSITION_MAP, POSITION_MAP
+from espn_api import POSITION_MAP, fetch_league_views, fetch_week_range
 
 
 def _tm(team_map, team_id, field='manager_name', default=None):
@@ -50,18 +49,9 @@ def fetch_draft_data(league_id, year):
     Returns:
         tuple: (picks list, error string or None)
     """
-    url = (
-        f"https://lm-api-reads.fantasy.espn.com/apis/v3/games/ffl/"
-        f"seasons/{year}/segments/0/leagues/{league_id}"
-    )
-    params = {'view': ['mDraftDetail', 'mTeam']}
-
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-    except requests.exceptions.RequestException as e:
-        return None, str(e)
+    data, error = fetch_league_views(league_id, year, ['mDraftDetail', 'mTeam'])
+    if error:
+        return None, error
 
     draft_detail = data.get('draftDetail', {})
     picks = draft_detail.get('picks', [])
@@ -125,63 +115,28 @@ def fetch_season_player_data(league_id, year, start_week=1, end_week=14):
             }
         }
     """
-    url = (
-        f"https://lm-api-reads.fantasy.espn.com/apis/v3/games/ffl/"
-        f"seasons/{year}/segments/0/leagues/{league_id}"
-    )
-
     players = {}
     total_weeks = end_week - start_week + 1
 
-    for week in range(start_week, end_week + 1):
-        params = {
-            'view': ['mMatchup', 'mRoster'],
-            'scoringPeriodId': week
-        }
-
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.RequestException:
+    # Same week bundles as the season and waiver analyzers, so each week is fetched once
+    for week, bundle, error in fetch_week_range(league_id, year, start_week, end_week):
+        if error or not bundle:
             continue
 
-        schedule = data.get('schedule', [])
-        matchups = [m for m in schedule if m.get('matchupPeriodId') == week]
-
-        for matchup in matchups:
-            for side in ('home', 'away'):
-                team_data = matchup.get(side, {})
-                team_id = team_data.get('teamId')
+        for matchup in bundle['matchups']:
+            for team_id in (matchup['home_id'], matchup['away_id']):
                 if not team_id:
                     continue
 
-                roster = (
-                    team_data
-                    .get('rosterForCurrentScoringPeriod', {})
-                    .get('entries', [])
-                )
-
-                for entry in roster:
-                    pool_entry = entry.get('playerPoolEntry', {})
-                    player = pool_entry.get('player', {})
-                    player_id = player.get('id')
+                for row in bundle['rosters'].get(team_id, []):
+                    player_id = row['player_id']
                     if not player_id:
                         continue
 
-                    player_name = player.get('fullName', 'Unknown')
-                    pos_id = player.get('defaultPositionId', 0)
-                    position = PLAYER_POSITION_MAP.get(pos_id, 'Unknown')
-                    lineup_slot = entry.get('lineupSlotId')
-
-                    # Get points
-                    points = pool_entry.get('appliedStatTotal', 0)
-                    if points == 0:
-                        for stat in player.get('stats', []):
-                            if stat.get('scoringPeriodId') == week:
-                                points = stat.get('appliedTotal', 0)
-                                if points > 0:
-                                    break
+                    player_name = row['name']
+                    position = row['position']
+                    lineup_slot = row['slot_id']
+                    points = row['points']
 
                     if player_id not in players:
                         players[player_id] = {
@@ -4,6 +4,10 @@ Includes full superlatives system (16 awards).
 """
 import statistics
 
+import numpy as np
+
+from .score_matrix import ScoreMatrix
+
 
 def _tm(team_map, team_id, field='manager_name', default=None):
     """Extract name from team map (handles dict or string values)."""
@@ -15,13 +19,14 @@ def _tm(team_map, team_id, field='manager_name', default=None):
     return info
 
 
-def calculate_league_stats(team_stats, team_name_map):
+def calculate_league_stats(team_stats, team_name_map, matrix=None):
     """
     Calculate league-wide statistics from all team data.
 
     Args:
         team_stats: Dictionary mapping team_id to team stats
         team_name_map: Dictionary mapping team_id to team name
+        matrix: Optional prebuilt ScoreMatrix for team_stats (built if omitted)
 
     Returns:
         Dictionary of league-wide statistics including superlatives
@@ -71,7 +76,7 @@ def calculate_league_stats(team_stats, team_name_map):
     standings_map = {tid: rank + 1 for rank, tid in enumerate(standings)}
 
     # ── Superlatives ──────────────────────────────────────────────────
-    awards = _calculate_superlatives(team_stats, team_name_map)
+    awards = _calculate_superlatives(team_stats, team_name_map, matrix)
 
     # ── Roster Strength Rankings ──────────────────────────────────────
     roster_rankings = _calculate_roster_rankings(team_stats, team_name_map)
@@ -118,7 +123,7 @@ def calculate_league_stats(team_stats, team_name_map):
 # Superlatives System — 16 league-wide awards
 # ======================================================================
 
-def _calculate_superlatives(team_stats, team_name_map):
+def _calculate_superlatives(team_stats, team_name_map, matrix=None):
     """
     Compute all 16 league-wide superlatives.
     Returns dict keyed by award id with winner info + value.
@@ -127,51 +132,46 @@ def _calculate_superlatives(team_stats, team_name_map):
         return {}
 
     team_ids = list(team_stats.keys())
-
-    # Build weekly scoreboard for luck calculations
-    weekly_scores = {}  # {week: [(team_id, score), ...]}
-    for tid, ts in team_stats.items():
-        for wd in ts.get('weekly_data', []):
-            weekly_scores.setdefault(wd['week'], []).append((tid, wd['my_score']))
+    m = matrix if matrix is not None else ScoreMatrix(team_stats)
+    rows = range(len(m.team_ids))
 
     awards = {}
 
     # ── 1. Clown: Most goose eggs (0-point starters) ─────────────────
-    goose_eggs = {}
-    for tid, ts in team_stats.items():
-        count = 0
-        for wd in ts.get('weekly_data', []):
-            count += sum(1 for s in wd.get('starters', []) if s['points'] == 0)
-        goose_eggs[tid] = count
-    winner = max(team_ids, key=lambda t: goose_eggs[t])
-    if goose_eggs[winner] > 0:
-        awards['clown'] = _award(team_name_map, winner, goose_eggs[winner], f"{goose_eggs[winner]} goose eggs")
+    goose_eggs = m.zeros.sum(axis=1)
+    winner = m.first_argmax(goose_eggs)
+    count = int(goose_eggs[m.row(winner)])
+    if count > 0:
+        awards['clown'] = _award(team_name_map, winner, count, f"{count} goose eggs")
 
     # ── 2. Blue Chip: Highest avg win margin ─────────────────────────
-    avg_win_margin = {}
-    for tid, ts in team_stats.items():
-        margins = [wd['my_score'] - wd['opp_score'] for wd in ts.get('weekly_data', []) if wd['won']]
-        avg_win_margin[tid] = statistics.mean(margins) if margins else 0
-    winner = max(team_ids, key=lambda t: avg_win_margin[t])
-    if avg_win_margin[winner] > 0:
-        awards['blue_chip'] = _award(team_name_map, winner, round(avg_win_margin[winner], 1), f"Avg win margin: {round(avg_win_margin[winner], 1)} pts")
+    avg_win_margin = []
+    for row in rows:
+        margins = m.values(m.margin, row, m.won)
+        avg_win_margin.append(statistics.mean(margins) if margins else 0)
+    winner = m.first_argmax(avg_win_margin)
+    value = avg_win_margin[m.row(winner)]
+    if value > 0:
+        awards['blue_chip'] = _award(team_name_map, winner, round(value, 1), f"Avg win margin: {round(value, 1)} pts")
 
     # ── 3. Skull: Highest avg loss margin ────────────────────────────
-    avg_loss_margin = {}
-    for tid, ts in team_stats.items():
-        margins = [wd['opp_score'] - wd['my_score'] for wd in ts.get('weekly_data', []) if not wd['won']]
-        avg_loss_margin[tid] = statistics.mean(margins) if margins else 0
-    winner = max(team_ids, key=lambda t: avg_loss_margin[t])
-    if avg_loss_margin[winner] > 0:
-        awards['skull'] = _award(team_name_map, winner, round(avg_loss_margin[winner], 1), f"Avg loss margin: {round(avg_loss_margin[winner], 1)} pts")
+    avg_loss_margin = []
+    for row in rows:
+        margins = m.values(m.opp_score - m.score, row, m.lost)
+        avg_loss_margin.append(statistics.mean(margins) if margins else 0)
+    winner = m.first_argmax(avg_loss_margin)
+    value = avg_loss_margin[m.row(winner)]
+    if value > 0:
+        awards['skull'] = _award(team_name_map, winner, round(value, 1), f"Avg loss margin: {round(value, 1)} pts")
 
     # ── 4. Dice Roll: Lowest avg absolute margin ─────────────────────
-    avg_abs_margin = {}
-    for tid, ts in team_stats.items():
-        margins = [abs(wd['my_score'] - wd['opp_score']) for wd in ts.get('weekly_data', [])]
-        avg_abs_margin[tid] = statistics.mean(margins) if margins else 999
-    winner = min(team_ids, key=lambda t: avg_abs_margin[t])
-    awards['dice_roll'] = _award(team_name_map, winner, round(avg_abs_margin[winner], 1), f"Avg margin: {round(avg_abs_margin[winner], 1)} pts")
+    avg_abs_margin = []
+    for row in rows:
+        margins = m.values(np.abs(m.margin), row)
+        avg_abs_margin.append(statistics.mean(margins) if margins else 999)
+    winner = m.first_argmin(avg_abs_margin)
+    value = avg_abs_margin[m.row(winner)]
+    awards['dice_roll'] = _award(team_name_map, winner, round(value, 1), f"Avg margin: {round(value, 1)} pts")
 
     # ── 5. Top Heavy: Highest % of points from top 2 players ────────
     top_heavy_pct = {}
@@ -188,16 +188,11 @@ def _calculate_superlatives(team_stats, team_name_map):
     awards['bench_warmer'] = _award(team_name_map, winner, val, f"{val} points left on bench")
 
     # ── 7. Heartbreak Kid: Most losses by < 10 pts ───────────────────
-    close_losses = {}
-    for tid, ts in team_stats.items():
-        count = sum(
-            1 for wd in ts.get('weekly_data', [])
-            if not wd['won'] and abs(wd['my_score'] - wd['opp_score']) < 10
-        )
-        close_losses[tid] = count
-    winner = max(team_ids, key=lambda t: close_losses[t])
-    if close_losses[winner] > 0:
-        awards['heartbreak'] = _award(team_name_map, winner, close_losses[winner], f"{close_losses[winner]} losses by <10 pts")
+    close_losses = (m.lost & (np.abs(m.margin) < 10)).sum(axis=1)
+    winner = m.first_argmax(close_losses)
+    count = int(close_losses[m.row(winner)])
+    if count > 0:
+        awards['heartbreak'] = _award(team_name_map, winner, count, f"{count} losses by <10 pts")
 
     # ── 8. Perfect Week Club: Most perfect lineups ───────────────────
     winner = max(team_ids, key=lambda t: len(team_stats[t]['perfect_weeks']))
@@ -214,56 +209,29 @@ def _calculate_superlatives(team_stats, team_name_map):
     awards['worst_manager'] = _award(team_name_map, winner, team_stats[winner]['errors'], f"{team_stats[winner]['errors']} lineup errors")
 
     # ── 11. Lucky: Most wins where outscored by 6+ other teams ───────
-    lucky_counts = {}
-    for tid, ts in team_stats.items():
-        count = 0
-        for wd in ts.get('weekly_data', []):
-            if not wd['won']:
-                continue
-            week = wd['week']
-            scores = weekly_scores.get(week, [])
-            teams_higher = sum(1 for _, s in scores if s > wd['my_score'])
-            if teams_higher >= 6:
-                count += 1
-        lucky_counts[tid] = count
-    winner = max(team_ids, key=lambda t: lucky_counts[t])
-    if lucky_counts[winner] > 0:
-        awards['lucky'] = _award(team_name_map, winner, lucky_counts[winner], f"{lucky_counts[winner]} wins when outscored by 6+ teams")
+    lucky_counts = (m.played & m.won & (m.teams_above >= 6)).sum(axis=1)
+    winner = m.first_argmax(lucky_counts)
+    count = int(lucky_counts[m.row(winner)])
+    if count > 0:
+        awards['lucky'] = _award(team_name_map, winner, count, f"{count} wins when outscored by 6+ teams")
 
     # ── 12. Unlucky: Most losses where outscored 6+ other teams ──────
-    unlucky_counts = {}
-    for tid, ts in team_stats.items():
-        count = 0
-        for wd in ts.get('weekly_data', []):
-            if wd['won']:
-                continue
-            week = wd['week']
-            scores = weekly_scores.get(week, [])
-            teams_lower = sum(1 for _, s in scores if s < wd['my_score'])
-            if teams_lower >= 6:
-                count += 1
-        unlucky_counts[tid] = count
-    winner = max(team_ids, key=lambda t: unlucky_counts[t])
-    if unlucky_counts[winner] > 0:
-        awards['unlucky'] = _award(team_name_map, winner, unlucky_counts[winner], f"{unlucky_counts[winner]} losses despite outscoring 6+ teams")
+    unlucky_counts = (m.lost & (m.teams_below >= 6)).sum(axis=1)
+    winner = m.first_argmax(unlucky_counts)
+    count = int(unlucky_counts[m.row(winner)])
+    if count > 0:
+        awards['unlucky'] = _award(team_name_map, winner, count, f"{count} losses despite outscoring 6+ teams")
 
     # ── 13. Speedrunner: Most unique players used ────────────────────
     # Approximation: count unique player names across all weeks
-    unique_players = {}
-    for tid, ts in team_stats.items():
-        names = set()
-        for wd in ts.get('weekly_data', []):
-            for s in wd.get('starters', []):
-                names.add(s['name'])
-            for b in wd.get('bench', []):
-                names.add(b['name'])
-        unique_players[tid] = len(names)
-    winner = max(team_ids, key=lambda t: unique_players[t])
-    awards['speedrunner'] = _award(team_name_map, winner, unique_players[winner], f"{unique_players[winner]} unique players rostered")
+    winner = m.first_argmax(m.unique_players)
+    count = int(m.unique_players[m.row(winner)])
+    awards['speedrunner'] = _award(team_name_map, winner, count, f"{count} unique players rostered")
 
     # ── 14. Snail: Fewest unique players used ────────────────────────
-    winner = min(team_ids, key=lambda t: unique_players[t])
-    awards['snail'] = _award(team_name_map, winner, unique_players[winner], f"Only {unique_players[winner]} unique players rostered")
+    winner = m.first_argmin(m.unique_players)
+    count = int(m.unique_players[m.row(winner)])
+    awards['snail'] = _award(team_name_map, winner, count, f"Only {count} unique players rostered")
 
     # ── 15. Sniper: Highest single-week bench player score ───────────
     # (Best bench explosion — proxy for "found a diamond")
@@ -1,86 +1,242 @@
 """
 Optimal Lineup Calculator
-Determines the best possible lineup from available players
+Determines the best possible lineup from available players, for the league's
+own starting slots (ESPN lineupSlotCounts) or the standard
+1QB/2RB/2WR/1TE/1FLEX/1DST/1K layout
 """
+import os
+from collections import namedtuple
+from functools import lru_cache
 
-def calculate_optimal_lineup(starters, bench):
+import numpy as np
+
+from caching import LRUCache, approx_size
+
+from .player_week import PlayerWeek, player_key
+
+# ESPN lineup slot ID -> (slot label, eligible player positions). Position
+# order breaks ties between equal scorers (FLEX prefers RB, then WR, then TE).
+# Bench (20), IR (21) and team QB (1) are never filled by the optimizer.
+LINEUP_SLOT_RULES = {
+    0: ('QB', ('QB',)),
+    2: ('RB', ('RB',)),
+    3: ('RB/WR', ('RB', 'WR')),
+    4: ('WR', ('WR',)),
+    5: ('WR/TE', ('WR', 'TE')),
+    6: ('TE', ('TE',)),
+    7: ('OP', ('QB', 'RB', 'WR', 'TE')),
+    8: ('DT', ('DT',)),
+    9: ('DE', ('DE',)),
+    10: ('LB', ('LB',)),
+    11: ('DL', ('DT', 'DE')),
+    12: ('CB', ('CB',)),
+    13: ('S', ('S',)),
+    14: ('DB', ('CB', 'S')),
+    15: ('DP', ('DT', 'DE', 'LB', 'CB', 'S')),
+    16: ('D/ST', ('D/ST',)),
+    17: ('K', ('K',)),
+    18: ('P', ('P',)),
+    19: ('HC', ('HC',)),
+    23: ('FLEX', ('RB', 'WR', 'TE')),
+}
+
+# Slot label -> eligible player positions
+SLOT_POSITIONS = {label: positions for label, positions in LINEUP_SLOT_RULES.values()}
+
+# Order slots appear in an optimal lineup
+SLOT_ORDER = (0, 2, 4, 6, 3, 5, 23, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19)
+
+# Used when a league's settings aren't available
+DEFAULT_LINEUP_SLOT_COUNTS = {0: 1, 2: 2, 4: 2, 6: 1, 23: 1, 16: 1, 17: 1}
+
+# Position codes used by the batched optimizer (-1 = padding / other)
+POSITION_CODES = {
+    'QB': 0, 'RB': 1, 'WR': 2, 'TE': 3, 'D/ST': 4, 'K': 5, 'P': 6,
+    'DT': 7, 'DE': 8, 'LB': 9, 'CB': 10, 'S': 11, 'HC': 12,
+}
+
+# Memory budget for memoized lineups (roster fingerprint -> chosen players)
+LINEUP_CACHE_MAX_MB = int(os.getenv('LINEUP_CACHE_MAX_MB', 16))
+
+lineup_cache = LRUCache(max_bytes=LINEUP_CACHE_MAX_MB * 1024 * 1024)
+
+# Below this many rosters, array setup costs more than the vectorized solve
+# saves, so calculate_optimal_lineups fills them one at a time (measured with
+# dev/benchmarks/lineup_optimizer_benchmark.py)
+BATCH_MIN_ROSTERS = int(os.getenv('LINEUP_BATCH_MIN_ROSTERS', 64))
+
+LineupLayout = namedtuple('LineupLayout', ['labels', 'positions', 'fill_order', 'laminar'])
+LineupLayout.__doc__ = """
+Starting slots for one lineup configuration.
+
+    labels: Slot label per slot, in lineup order (one entry per slot, so
+        2 RB slots appear twice)
+    positions: Eligible player positions per slot
+    fill_order: Slot indices ordered so every slot comes after the slots
+        whose eligible positions are a strict subset of its own
+    laminar: True when any two slots' eligible positions are either nested
+        or disjoint, so filling slots greedily in fill_order is exact
+"""
+
+
+def _slot_counts_key(slot_counts):
+    """Normalize lineupSlotCounts (JSON keys may be strings) into a hashable key."""
+    if not slot_counts:
+        slot_counts = DEFAULT_LINEUP_SLOT_COUNTS
+    counts = {}
+    for slot_id, count in slot_counts.items():
+        slot_id = int(slot_id)
+        if slot_id in LINEUP_SLOT_RULES and count:
+            counts[slot_id] = int(count)
+    return tuple(sorted(counts.items()))
+
+
+@lru_cache(maxsize=256)
+def _build_layout(counts_key):
+    counts = dict(counts_key)
+    labels = []
+    positions = []
+    for slot_id in SLOT_ORDER:
+        label, eligible = LINEUP_SLOT_RULES[slot_id]
+        for _ in range(counts.get(slot_id, 0)):
+            labels.append(label)
+            positions.append(eligible)
+
+    # Narrower slots first, otherwise in lineup order
+    fill_order = []
+    remaining = list(range(len(labels)))
+    while remaining:
+        for slot in remaining:
+            eligible = set(positions[slot])
+            if not any(set(positions[other]) < eligible for other in remaining):
+                fill_order.append(slot)
+                remaining.remove(slot)
+                break
+
+    sets = {frozenset(eligible) for eligible in positions}
+    laminar = all(a <= b or b <= a or not (a & b) for a in sets for b in sets)
+
+    return LineupLayout(tuple(labels), tuple(positions), tuple(fill_order), laminar)
+
+
+def lineup_layout(slot_counts=None):
+    """
+    Get the LineupLayout for a league's lineupSlotCounts.
+
+    Args:
+        slot_counts: Dict of ESPN slot ID -> number of starters (from the
+            mSettings view's rosterSettings.lineupSlotCounts). None or empty
+            means DEFAULT_LINEUP_SLOT_COUNTS. Bench/IR/unknown slots are ignored.
+
+    Returns:
+        LineupLayout (cached per configuration)
+    """
+    return _build_layout(_slot_counts_key(slot_counts))
+
+
+def calculate_optimal_lineup(starters, bench, slot_counts=None):
     """
     Calculate optimal lineup from starters and bench players
-    
+
     Args:
         starters: List of starter player dicts
         bench: List of bench player dicts
-        
+        slot_counts: Optional lineupSlotCounts (see lineup_layout)
+
     Returns:
         List of tuples (position, player_dict) representing optimal lineup
     """
+    layout = lineup_layout(slot_counts)
     all_players = starters + bench
-    
-    # Separate by position
-    qbs = sorted([p for p in all_players if p['actual_position'] == 'QB'], 
-                 key=lambda x: x['points'], reverse=True)
-    rbs = sorted([p for p in all_players if p['actual_position'] == 'RB'], 
-                 key=lambda x: x['points'], reverse=True)
-    wrs = sorted([p for p in all_players if p['actual_position'] == 'WR'], 
-                 key=lambda x: x['points'], reverse=True)
-    tes = sorted([p for p in all_players if p['actual_position'] == 'TE'], 
-                 key=lambda x: x['points'], reverse=True)
-    dsts = sorted([p for p in all_players if p['actual_position'] == 'D/ST'], 
-                  key=lambda x: x['points'], reverse=True)
-    ks = sorted([p for p in all_players if p['actual_position'] == 'K'], 
-                key=lambda x: x['points'], reverse=True)
-    
-    optimal = []
+
+    if layout.laminar:
+        picks = _fill_greedy(all_players, layout)
+    else:
+        picks = _fill_matching(all_players, layout)
+
+    return [(layout.labels[slot], player) for slot, player in enumerate(picks) if player is not None]
+
+
+def _fill_greedy(players, layout):
+    """
+    Fill slots in fill_order, each with the best eligible player left.
+
+    Exact for laminar layouts: a narrower slot's best player is never worth
+    more in a wider slot, since the wider slot can take anyone the narrower
+    one can. Players are "used" by player_key; equal scorers go to the
+    earlier position in the slot's list, then to the earlier roster spot.
+    """
+    # Per-position queues, best first (stable, so roster order breaks ties)
+    queues = {}
+    for player in players:
+        queues.setdefault(player['actual_position'], []).append(player)
+    for queue in queues.values():
+        queue.sort(key=lambda x: x['points'], reverse=True)
+    heads = dict.fromkeys(queues, 0)
+
+    picks = [None] * len(layout.labels)
+    used = set()
+    for slot in layout.fill_order:
+        best = None
+        for position in layout.positions[slot]:
+            queue = queues.get(position)
+            if not queue:
+                continue
+            head = heads[position]
+            while head < len(queue) and player_key(queue[head]) in used:
+                head += 1
+            heads[position] = head
+            if head < len(queue) and (best is None or queue[head]['points'] > best['points']):
+                best = queue[head]
+        if best is not None:
+            picks[slot] = best
+            used.add(player_key(best))
+    return picks
+
+
+def _fill_matching(players, layout):
+    """
+    Exact fill for any layout (e.g. RB/WR alongside WR/TE slots).
+
+    Players that can be seated together form a transversal matroid, so
+    taking players best-first and keeping each one that still fits (checked
+    with an augmenting path through the current slot assignment) gives a
+    maximum-points lineup that fills as many slots as possible.
+    """
+    n_slots = len(layout.labels)
+    narrow_first = sorted(range(n_slots), key=lambda slot: (len(layout.positions[slot]), slot))
+    slots_for = {}
+    for slot in narrow_first:
+        for position in layout.positions[slot]:
+            slots_for.setdefault(position, []).append(slot)
+
+    assigned = [None] * n_slots  # slot -> player index
+    seated = 0
     used = set()
-    
-    # 1 QB
-    if qbs:
-        optimal.append(('QB', qbs[0]))
-        used.add(qbs[0]['name'])
-    
-    # 2 RBs
-    for i in range(min(2, len(rbs))):
-        optimal.append(('RB', rbs[i]))
-        used.add(rbs[i]['name'])
-    
-    # 2 WRs
-    for i in range(min(2, len(wrs))):
-        optimal.append(('WR', wrs[i]))
-        used.add(wrs[i]['name'])
-    
-    # 1 TE
-    if tes:
-        optimal.append(('TE', tes[0]))
-        used.add(tes[0]['name'])
-    
-    # 1 FLEX (best remaining RB/WR/TE)
-    flex = []
-    for rb in rbs:
-        if rb['name'] not in used:
-            flex.append(rb)
-    for wr in wrs:
-        if wr['name'] not in used:
-            flex.append(wr)
-    for te in tes:
-        if te['name'] not in used:
-            flex.append(te)
-    
-    flex.sort(key=lambda x: x['points'], reverse=True)
-    if flex:
-        optimal.append(('FLEX', flex[0]))
-        used.add(flex[0]['name'])
-    
-    # 1 D/ST
-    if dsts:
-        optimal.append(('D/ST', dsts[0]))
-        used.add(dsts[0]['name'])
-    
-    # 1 K
-    if ks:
-        optimal.append(('K', ks[0]))
-        used.add(ks[0]['name'])
-    
-    return optimal
+
+    def seat(index, visited):
+        for slot in slots_for.get(players[index]['actual_position'], ()):
+            if slot in visited:
+                continue
+            visited.add(slot)
+            if assigned[slot] is None or seat(assigned[slot], visited):
+                assigned[slot] = index
+                return True
+        return False
+
+    order = sorted(range(len(players)), key=lambda i: players[i]['points'], reverse=True)
+    for index in order:
+        if seated == n_slots:
+            break
+        player = players[index]
+        key = player_key(player)
+        if key in used or player['actual_position'] not in slots_for:
+            continue
+        if seat(index, set()):
+            seated += 1
+            used.add(key)
+
+    return [players[index] if index is not None else None for index in assigned]
 
 
 def get_optimal_total(optimal_lineup):
@@ -88,6 +244,206 @@ def get_optimal_total(optimal_lineup):
     return sum(player[1]['points'] for player in optimal_lineup)
 
 
-def get_optimal_player_names(optimal_lineup):
-    """Get set of player names in optimal lineup"""
-    return set(player[1]['name'] for player in optimal_lineup)
+def get_optimal_player_keys(optimal_lineup):
+    """Get set of player keys (player_id, see player_key) in optimal lineup"""
+    return set(player_key(player[1]) for player in optimal_lineup)
+
+
+# ---------------------------------------------------------------------------
+# Batched optimizer
+# ---------------------------------------------------------------------------
+
+def encode_rosters(rosters):
+    """
+    Pack rosters into padded arrays for optimize_lineups_batch.
+
+    Args:
+        rosters: List of (starters, bench) player-dict lists
+
+    Returns:
+        (points, positions, keys, players): points float (N, P), position
+        codes int (N, P), per-roster player identity codes int (N, P) (from
+        player_key), and the starters + bench player list for each roster
+    """
+    players = [list(starters) + list(bench) for starters, bench in rosters]
+    width = max((len(p) for p in players), default=0)
+
+    # Build padded rows as plain lists and convert once (per-cell numpy
+    # assignment would cost more than the optimization itself). PlayerWeek
+    # rows are read by attribute, skipping their dict-style __getitem__.
+    position_code = POSITION_CODES.get
+    point_rows, position_rows, key_rows = [], [], []
+    for roster in players:
+        pad = [-1] * (width - len(roster))
+        codes = {}
+        if all(type(player) is PlayerWeek for player in roster):
+            points = [player.points for player in roster]
+            positions = [position_code(player.actual_position, -1) for player in roster]
+            identities = [player.name if player.player_id is None else player.player_id for player in roster]
+        else:
+            points = [player['points'] for player in roster]
+            positions = [position_code(player['actual_position'], -1) for player in roster]
+            identities = [player_key(player) for player in roster]
+        point_rows.append(points + [0.0] * len(pad))
+        position_rows.append(positions + pad)
+        key_rows.append([codes.setdefault(identity, len(codes)) for identity in identities] + pad)
+
+    shape = (len(players), width)
+    points = np.array(point_rows, dtype=float).reshape(shape)
+    positions = np.array(position_rows, dtype=np.int64).reshape(shape)
+    keys = np.array(key_rows, dtype=np.int64).reshape(shape)
+
+    return points, positions, keys, players
+
+
+def optimize_lineups_batch(points, positions, keys=None, slot_counts=None):
+    """
+    Optimal lineups for many rosters in one vectorized pass.
+
+    Same rules and tie-breaking as calculate_optimal_lineup: slots are filled
+    in fill_order, each with the highest eligible scorer not yet used (by
+    player_key), preferring the earlier position in the slot's list and then the
+    earlier roster spot on ties.
+
+    Args:
+        points: Float array (N, P) of player points
+        positions: Int array (N, P) of POSITION_CODES (-1 for padding)
+        keys: Optional int array (N, P) of per-roster player_key codes;
+            players sharing a code count as the same player. Defaults to all
+            distinct.
+        slot_counts: Optional lineupSlotCounts (see lineup_layout). Must
+            give a laminar layout.
+
+    Returns:
+        (totals, selected, slots): totals float (N,) summed in lineup order
+        exactly as get_optimal_total does, selected bool (N, P) marking the
+        players in each optimal lineup, and slots int (N, number of slots)
+        holding the roster index filling each slot of
+        lineup_layout(slot_counts).labels (-1 if empty)
+
+    Raises:
+        ValueError: If the layout isn't laminar (use calculate_optimal_lineups)
+    """
+    layout = lineup_layout(slot_counts)
+    if not layout.laminar:
+        raise ValueError("optimize_lineups_batch needs a laminar slot layout")
+
+    points = np.asarray(points, dtype=float)
+    positions = np.asarray(positions)
+    n_rows, width = points.shape
+    if keys is None:
+        keys = np.broadcast_to(np.arange(width), (n_rows, width))
+
+    rows = np.arange(n_rows)
+    slots = np.full((n_rows, len(layout.labels)), -1, dtype=np.int64)
+    if width == 0:
+        return np.zeros(n_rows), np.zeros((n_rows, 0), dtype=bool), slots
+
+    used_keys = np.zeros((n_rows, width), dtype=bool)
+    roster_index = np.arange(width)
+    no_rank = len(POSITION_CODES)
+
+    for slot in layout.fill_order:
+        # Rank of each player's position in this slot's list (padding -> no_rank)
+        rank_table = np.full(len(POSITION_CODES) + 1, no_rank, dtype=np.int64)
+        for rank, position in enumerate(layout.positions[slot]):
+            rank_table[POSITION_CODES[position]] = rank
+        rank = rank_table[positions]
+
+        available = (rank < no_rank) & ~used_keys
+        best = np.where(available, points, -np.inf).max(axis=1, initial=-np.inf)
+        tied = available & (points == best[:, np.newaxis])
+        pick = np.argmin(np.where(tied, rank * width + roster_index, np.iinfo(np.int64).max), axis=1)
+        has = available.any(axis=1)
+
+        slots[has, slot] = pick[has]
+        used_keys |= has[:, np.newaxis] & (keys == keys[rows, pick][:, np.newaxis])
+
+    # Sum in lineup order, like get_optimal_total
+    totals = np.zeros(n_rows)
+    selected = np.zeros((n_rows, width), dtype=bool)
+    for col in range(len(layout.labels)):
+        picked = slots[:, col]
+        has = picked >= 0
+        totals = np.where(has, totals + points[rows, np.where(has, picked, 0)], totals)
+        selected[rows[has], picked[has]] = True
+
+    return totals, selected, slots
+
+
+def _roster_fingerprint(players, counts_key):
+    """
+    Flat tuple of everything an optimal lineup depends on: the lineup
+    configuration plus each player's player_key, position and points, in
+    roster order (order breaks ties). Exact, so a hit can't be a collision.
+    """
+    fingerprint = [counts_key]
+    for player in players:
+        fingerprint += (player_key(player), player['actual_position'], player['points'])
+    return tuple(fingerprint)
+
+
+def calculate_optimal_lineups(rosters, slot_counts=None, use_cache=True, batch_min=BATCH_MIN_ROSTERS):
+    """
+    Batched calculate_optimal_lineup.
+
+    Results are memoized in lineup_cache on each roster's fingerprint, so
+    re-analyzing the same week (deep dives, standings, repeat requests) only
+    optimizes rosters it hasn't seen.
+
+    Args:
+        rosters: List of (starters, bench) player-dict lists
+        slot_counts: Optional lineupSlotCounts shared by every roster
+        use_cache: Set False to always optimize (benchmarks)
+        batch_min: Fewest rosters to optimize with optimize_lineups_batch;
+            smaller sets are filled one roster at a time
+
+    Returns:
+        List of optimal lineups (lists of (position, player_dict) tuples),
+        identical to calling calculate_optimal_lineup on each roster
+    """
+    if not rosters:
+        return []
+
+    counts_key = _slot_counts_key(slot_counts)
+    layout = _build_layout(counts_key)
+    players = [list(starters) + list(bench) for starters, bench in rosters]
+
+    # Cached picks are (slot index, roster index) pairs, rebound to the
+    # caller's own player dicts
+    picks = [None] * len(rosters)
+    fingerprints = [None] * len(rosters)
+    if use_cache:
+        for i, roster in enumerate(players):
+            fingerprints[i] = _roster_fingerprint(roster, counts_key)
+            picks[i] = lineup_cache.get(fingerprints[i])
+
+    misses = [i for i, cached in enumerate(picks) if cached is None]
+    if misses:
+        if layout.laminar and len(misses) >= batch_min:
+            encoded = encode_rosters([rosters[i] for i in misses])
+            _totals, _selected, slots = optimize_lineups_batch(*encoded[:3], slot_counts=slot_counts)
+            solved = [
+                tuple((slot, idx) for slot, idx in enumerate(row) if idx >= 0)
+                for row in slots.tolist()
+            ]
+        else:
+            fill = _fill_greedy if layout.laminar else _fill_matching
+            solved = []
+            for i in misses:
+                index = {id(player): idx for idx, player in enumerate(players[i])}
+                filled = fill(players[i], layout)
+                solved.append(tuple(
+                    (slot, index[id(player)]) for slot, player in enumerate(filled) if player is not None
+                ))
+
+        for i, row_picks in zip(misses, solved):
+            picks[i] = row_picks
+            if use_cache:
+                lineup_cache.set(fingerprints[i], row_picks, size=approx_size((fingerprints[i], row_picks)))
+
+    return [
+        [(layout.labels[slot], roster[idx]) for slot, idx in row_picks]
+        for roster, row_picks in zip(players, picks)
+    ]
+
@@ -0,0 +1,94 @@
+"""
+Player Week - compact roster row for one player in one week
+process_team_roster builds one per rostered player per week, and the same
+objects are shared by weekly_data, optimal lineups, busts / benched stars and
+the season ledger. They're __slots__ objects with interned strings rather than
+dicts, read like the dicts they replace (player['points'],
+player.get('slot_id')), and only become dicts when a response is serialized.
+
+Players are identified by ESPN player_id (see player_key); names are only for
+display.
+"""
+import sys
+
+PLAYER_WEEK_FIELDS = ('player_id', 'name', 'position', 'actual_position', 'slot_id', 'points')
+
+_FIELD_SET = frozenset(PLAYER_WEEK_FIELDS)
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def player_key(player):
+    """
+    Identity of a player row (PlayerWeek or player dict): the ESPN player_id,
+    or the name for rows that don't carry an id (e.g. older serialized data).
+    """
+    player_id = player.get('player_id')
+    return player_id if player_id is not None else player['name']
+
+
+class PlayerWeek:
+    """
+    Read-only player-week row.
+
+    Attributes:
+        player_id: ESPN player ID (None if ESPN didn't send one)
+        name: Player name (interned)
+        position: Lineup slot label, e.g. 'FLEX' or 'BENCH' (interned)
+        actual_position: Player's real position, e.g. 'RB' (interned)
+        slot_id: ESPN lineup slot ID
+        points: Points scored, rounded to 2 decimals
+    """
+
+    __slots__ = PLAYER_WEEK_FIELDS
+
+    def __init__(self, player_id, name, position, actual_position, slot_id, points):
+        self.player_id = player_id
+        self.name = _intern(name)
+        self.position = _intern(position)
+        self.actual_position = _intern(actual_position)
+        self.slot_id = slot_id
+        self.points = points
+
+    # Dict-style reads, so code written against player dicts keeps working
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in _FIELD_SET else default
+
+    def __contains__(self, key):
+        return key in _FIELD_SET
+
+    def keys(self):
+        return PLAYER_WEEK_FIELDS
+
+    def to_dict(self):
+        """Plain dict of the row's fields (for JSON responses)."""
+        return {field: getattr(self, field) for field in PLAYER_WEEK_FIELDS}
+
+    def __eq__(self, other):
+        if isinstance(other, PlayerWeek):
+            return all(getattr(self, f) == getattr(other, f) for f in PLAYER_WEEK_FIELDS)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    # Never mutated, so copies (e.g. the season ledger's deepcopy) can share it
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"PlayerWeek({self.to_dict()!r})"
+
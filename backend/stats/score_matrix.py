@@ -0,0 +1,141 @@
+"""
+Score Matrix - columnar team x week view of a season
+Built once per analysis from every team's weekly_data so league superlatives
+and advanced stats can run as vectorized reductions instead of re-walking
+weekly_data per award / per team.
+"""
+import statistics
+from functools import cached_property
+
+import numpy as np
+
+from .player_week import player_key
+
+
+def _optimal_keys(week_data):
+    """Optimal player keys (optimal_lineup may be tuples or serialized dicts)."""
+    keys = set()
+    for item in week_data.get('optimal_lineup', []):
+        if isinstance(item, dict):
+            keys.add(player_key(item['player']))
+        else:
+            keys.add(player_key(item[1]))
+    return keys
+
+
+class ScoreMatrix:
+    """
+    Team x week arrays for one analysis.
+
+    Rows follow team_stats order and columns are the sorted set of weeks any
+    team played. Cells a team didn't play are masked out by `played`.
+
+    Arrays (shape teams x weeks):
+        played: bool, team has a weekly_data entry for the week
+        score: rounded actual score (weekly_data my_score)
+        points: unrounded actual score (weekly_points)
+        optimal: rounded optimal score (weekly_data my_optimal)
+        opp_score: rounded opponent score
+        opp_index: row of the opponent (-1 if unknown / not played)
+        won: bool, weekly_data won flag
+        zeros: starters who scored exactly 0
+        errors: optimal players left on the bench
+    """
+
+    def __init__(self, team_stats):
+        self.team_ids = list(team_stats.keys())
+        self.index = {team_id: row for row, team_id in enumerate(self.team_ids)}
+        self.weeks = sorted({
+            wd['week'] for ts in team_stats.values() for wd in ts.get('weekly_data', [])
+        })
+        column = {week: col for col, week in enumerate(self.weeks)}
+
+        shape = (len(self.team_ids), len(self.weeks))
+        self.played = np.zeros(shape, dtype=bool)
+        self.score = np.zeros(shape)
+        self.points = np.zeros(shape)
+        self.optimal = np.zeros(shape)
+        self.opp_score = np.zeros(shape)
+        self.opp_index = np.full(shape, -1, dtype=np.int64)
+        self.won = np.zeros(shape, dtype=bool)
+        self.zeros = np.zeros(shape, dtype=np.int64)
+        self.errors = np.zeros(shape, dtype=np.int64)
+        self.unique_players = np.zeros(len(self.team_ids), dtype=np.int64)
+        self.unique_starters = np.zeros(len(self.team_ids), dtype=np.int64)
+
+        # The only Python pass over weekly_data
+        for row, team_id in enumerate(self.team_ids):
+            ts = team_stats[team_id]
+            player_keys = set()
+            starter_keys_all = set()
+            for wd, points in zip(ts.get('weekly_data', []), ts.get('weekly_points', [])):
+                col = column[wd['week']]
+                starters = wd.get('starters', [])
+                starter_keys = set(player_key(s) for s in starters)
+
+                self.played[row, col] = True
+                self.score[row, col] = wd['my_score']
+                self.points[row, col] = points
+                self.optimal[row, col] = wd['my_optimal']
+                self.opp_score[row, col] = wd['opp_score']
+                self.opp_index[row, col] = self.index.get(wd['opponent_id'], -1)
+                self.won[row, col] = wd['won']
+                self.zeros[row, col] = sum(1 for s in starters if s['points'] == 0)
+                self.errors[row, col] = len(_optimal_keys(wd) - starter_keys)
+
+                starter_keys_all |= starter_keys
+                player_keys |= starter_keys
+                player_keys.update(player_key(b) for b in wd.get('bench', []))
+            self.unique_players[row] = len(player_keys)
+            self.unique_starters[row] = len(starter_keys_all)
+
+        self.lost = self.played & ~self.won
+        self.margin = self.score - self.opp_score
+
+        # Per-week league scoreboard: how many played teams scored above / below
+        others = self.played[np.newaxis, :, :] & self.played[:, np.newaxis, :]
+        self.teams_above = (others & (self.score[np.newaxis, :, :] > self.score[:, np.newaxis, :])).sum(axis=1)
+        self.teams_below = (others & (self.score[np.newaxis, :, :] < self.score[:, np.newaxis, :])).sum(axis=1)
+        self.teams_per_week = self.played.sum(axis=0)
+
+    def row(self, team_id):
+        return self.index[team_id]
+
+    def values(self, array, row, mask=None):
+        """Played cells of a row (optionally further masked) as a Python list."""
+        keep = self.played[row] if mask is None else (self.played[row] & mask[row])
+        return array[row][keep].tolist()
+
+    # ── League-wide aggregates (computed once, shared by every team) ──
+
+    @cached_property
+    def league_avg_score(self):
+        scores = self.score[self.played].tolist()
+        return statistics.mean(scores) if scores else 0.0
+
+    @cached_property
+    def avg_opp_scores(self):
+        """Mean opponent score per row (0.0 for teams with no games)."""
+        means = []
+        for row in range(len(self.team_ids)):
+            opps = self.values(self.opp_score, row)
+            means.append(statistics.mean(opps) if opps else 0.0)
+        return means
+
+    @cached_property
+    def sorted_stdevs(self):
+        """Sorted weekly-points standard deviations of teams with 2+ games."""
+        stdevs = []
+        for row in range(len(self.team_ids)):
+            points = self.values(self.points, row)
+            if len(points) > 1:
+                stdevs.append(statistics.stdev(points))
+        return sorted(stdevs)
+
+    def first_argmax(self, values):
+        """Team id with the largest value (first in team order on ties)."""
+        return self.team_ids[int(np.argmax(values))]
+
+    def first_argmin(self, values):
+        """Team id with the smallest value (first in team order on ties)."""
+        return self.team_ids[int(np.argmin(values))]
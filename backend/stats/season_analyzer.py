@@ -1,71 +1,115 @@
 """
 Season Analyzer - Main orchestration of fantasy football analysis
 """
-from collections import defaultdict
 from .lineup_optimizer import (
-    calculate_optimal_lineup, 
+    calculate_optimal_lineups,
     get_optimal_total, 
-    get_optimal_player_names
+    get_optimal_player_keys
 )
 from .team_calculator import (
-    initialize_team_stats, 
-    calculate_post_season_stats
+    calculate_post_season_stats,
+    detect_one_player_away_losses
 )
 from .league_calculator import calculate_league_stats
 from .advanced_stats import calculate_advanced_stats
-from espn_api import POSITION_MAP, PLAYER_POSITION_MAP
+from .season_ledger import SeasonLedger
+from .score_matrix import ScoreMatrix
+from .player_week import PlayerWeek, player_key
+from espn_api import POSITION_MAP, fetch_week_range
 
 
-def process_team_roster(team_roster, week):
+def process_team_roster(team_roster):
     """
     Process roster and return starters and bench with full player details
     
     Args:
-        team_roster: List of roster entries from ESPN API
-        week: Week number being processed
+        team_roster: List of player rows from a week bundle
+            (see espn_api.parse_week_bundle)
         
     Returns:
-        Tuple of (starters, bench) - lists of player dicts
+        Tuple of (starters, bench) - lists of PlayerWeek rows
     """
     starters = []
     bench = []
     
-    for entry in team_roster:
-        player = entry.get('playerPoolEntry', {}).get('player', {})
-        player_name = player.get('fullName', 'Unknown')
-        lineup_slot_id = entry.get('lineupSlotId')
+    for player in team_roster:
+        lineup_slot_id = player['slot_id']
+        if lineup_slot_id == 21:  # IR
+            continue
         position = POSITION_MAP.get(lineup_slot_id, f"Slot_{lineup_slot_id}")
         
-        player_position_id = player.get('defaultPositionId', 0)
-        actual_position = PLAYER_POSITION_MAP.get(player_position_id, "Unknown")
-        
-        points = entry.get('playerPoolEntry', {}).get('appliedStatTotal', 0)
-        
-        # Fallback: look in player stats if points not in entry
-        if points == 0:
-            stats = player.get('stats', [])
-            for stat in stats:
-                if stat.get('scoringPeriodId') == week:
-                    points = stat.get('appliedTotal', 0)
-                    if points > 0:
-                        break
-        
-        player_info = {
-            'name': player_name,
-            'position': position,
-            'actual_position': actual_position,
-            'slot_id': lineup_slot_id,
-            'points': round(points, 2)
-        }
+        player_info = PlayerWeek(
+            player['player_id'],
+            player['name'],
+            position,
+            player['position'],
+            lineup_slot_id,
+            round(player['points'], 2)
+        )
         
         if lineup_slot_id == 20:  # Bench
             bench.append(player_info)
-        elif lineup_slot_id != 21:  # Not IR
+        else:
             starters.append(player_info)
     
     return starters, bench
 
 
+def process_week_rosters(bundle):
+    """
+    Process every matchup roster in a week bundle and optimize all of the
+    lineups in one batch, using the league's lineup slots when the bundle
+    carries them.
+
+    Args:
+        bundle: Normalized week bundle (see espn_api.parse_week_bundle)
+
+    Returns:
+        Dict mapping team ID to (starters, bench, optimal_lineup) for each
+        team in a matchup with both sides set
+    """
+    return process_range_rosters([bundle])[0]
+
+
+def process_range_rosters(bundles):
+    """
+    process_week_rosters for several weeks at once: every team-week in the
+    range is optimized in a single batch per lineup configuration, which is
+    where the vectorized optimizer pays off (one week is only ~10 rosters).
+
+    Args:
+        bundles: List of normalized week bundles
+
+    Returns:
+        List of process_week_rosters dicts, one per bundle
+    """
+    entries = []  # (bundle index, team_id, (starters, bench))
+    for index, bundle in enumerate(bundles):
+        team_ids = []
+        for matchup in bundle['matchups']:
+            if matchup['home_id'] and matchup['away_id']:
+                team_ids.extend(team_id for team_id in (matchup['home_id'], matchup['away_id'])
+                                if team_id not in team_ids)
+        entries.extend(
+            (index, team_id, process_team_roster(bundle['rosters'].get(team_id, [])))
+            for team_id in team_ids
+        )
+
+    # Leagues can change lineup settings mid-season, so batch per configuration
+    by_slots = {}
+    for entry in entries:
+        lineup_slots = bundles[entry[0]].get('lineup_slots')
+        slots_key = tuple(sorted(lineup_slots.items())) if lineup_slots else None
+        by_slots.setdefault(slots_key, (lineup_slots, []))[1].append(entry)
+
+    week_rosters = [{} for _ in bundles]
+    for lineup_slots, group in by_slots.values():
+        lineups = calculate_optimal_lineups([rosters for _i, _t, rosters in group], lineup_slots)
+        for (index, team_id, (starters, bench)), optimal in zip(group, lineups):
+            week_rosters[index][team_id] = (starters, bench, optimal)
+    return week_rosters
+
+
 def update_team_week_stats(
     team_stats, 
     team_id, 
@@ -107,7 +151,7 @@ def update_team_week_stats(
     
     # Track player season totals
     for starter in starters:
-        stats['player_season_points'][starter['name']] += starter['points']
+        stats['player_season_points'][player_key(starter)] += starter['points']
     
     # Track highest scoring starter this week
     for starter in starters:
@@ -160,9 +204,9 @@ def update_team_week_stats(
             }
     
     # Check for perfect lineup
-    optimal_names = get_optimal_player_names(optimal_lineup)
-    starter_names = set(p['name'] for p in starters)
-    is_perfect = optimal_names == starter_names
+    optimal_keys = get_optimal_player_keys(optimal_lineup)
+    starter_keys = set(player_key(p) for p in starters)
+    is_perfect = optimal_keys == starter_keys
     
     if is_perfect:
         stats['perfect_weeks'].append(week)
@@ -183,7 +227,7 @@ def update_team_week_stats(
     })
     
     # Count lineup errors
-    errors = len(optimal_names - starter_names)
+    errors = len(optimal_keys - starter_keys)
     points_lost = optimal_score - actual_score
     
     stats['errors'] += errors
@@ -191,16 +235,18 @@ def update_team_week_stats(
     
     # Track benched stars and started busts
     for opt_pos, opt_player in optimal_lineup:
-        if opt_player['name'] not in starter_names:
+        if player_key(opt_player) not in starter_keys:
             stats['benched_stars'].append({
+                'player_id': opt_player['player_id'],
                 'name': opt_player['name'],
                 'points': opt_player['points'],
                 'week': week
             })
     
     for starter in starters:
-        if starter['name'] not in optimal_names:
+        if player_key(starter) not in optimal_keys:
             stats['started_busts'].append({
+                'player_id': starter['player_id'],
                 'name': starter['name'],
                 'points': starter['points'],
                 'week': week
@@ -269,114 +315,174 @@ def update_win_loss_records(
         team_stats[away_id]['optimal_loses_to_opp_actual'] += 1
 
 
-def analyze_season(league_id, year, start_week, end_week, team_name_map, fetch_data_func):
+def fold_week(team_stats, week, bundle, error, processing_errors, week_rosters=None):
     """
-    Analyze full season and return comprehensive statistics
-    
+    Fold one week into the running season accumulators.
+
     Args:
-        league_id: ESPN league ID
-        year: Season year
-        start_week: First week to analyze
-        end_week: Last week to analyze
-        team_name_map: Dictionary mapping team IDs to names
-        fetch_data_func: Function to fetch data (allows dependency injection)
-        
+        team_stats: defaultdict(initialize_team_stats) being accumulated
+        week: Week number
+        bundle: Normalized week bundle (or None if the fetch failed)
+        error: Fetch error, if any
+        processing_errors: List that week-level errors are appended to
+        week_rosters: The week's process_week_rosters result, if it was
+            already optimized along with the rest of the range
+
     Returns:
-        Dictionary containing:
-            - team_stats: Stats for each team
-            - league_stats: League-wide statistics
-            - processing_errors: List of any errors encountered
+        True if the week's data was available and processed
     """
-    team_stats = defaultdict(initialize_team_stats)
-    processing_errors = []
-    
-    # Process each week
-    for week in range(start_week, end_week + 1):
-        data, error = fetch_data_func(league_id, year, week)
+    if error or not bundle:
+        processing_errors.append(f"Week {week}: {error or 'No data'}")
+        return False
+
+    matchups = bundle['matchups']
+
+    if not matchups:
+        processing_errors.append(f"Week {week}: No matchups found")
+        return True
+
+    # Process rosters and calculate every optimal lineup in one batch
+    if week_rosters is None:
+        week_rosters = process_week_rosters(bundle)
+
+    # Process each matchup
+    for matchup in matchups:
+        home_id = matchup['home_id']
+        away_id = matchup['away_id']
         
-        if error or not data:
-            processing_errors.append(f"Week {week}: {error or 'No data'}")
+        if not home_id or not away_id:
             continue
         
-        schedule = data.get('schedule', [])
-        matchups = [m for m in schedule if m.get('matchupPeriodId') == week]
+        home_starters, home_bench, home_optimal = week_rosters[home_id]
+        away_starters, away_bench, away_optimal = week_rosters[away_id]
         
-        if not matchups:
-            processing_errors.append(f"Week {week}: No matchups found")
-            continue
+        # Calculate scores
+        home_actual = sum(p['points'] for p in home_starters)
+        away_actual = sum(p['points'] for p in away_starters)
+        home_opt_total = get_optimal_total(home_optimal)
+        away_opt_total = get_optimal_total(away_optimal)
         
-        # Process each matchup
-        for matchup in matchups:
-            home = matchup.get('home', {})
-            away = matchup.get('away', {})
-            
-            home_id = home.get('teamId')
-            away_id = away.get('teamId')
-            
-            if not home_id or not away_id:
-                continue
-            
-            # Get rosters
-            home_roster = home.get('rosterForCurrentScoringPeriod', {}).get('entries', [])
-            away_roster = away.get('rosterForCurrentScoringPeriod', {}).get('entries', [])
-            
-            # Process rosters
-            home_starters, home_bench = process_team_roster(home_roster, week)
-            away_starters, away_bench = process_team_roster(away_roster, week)
-            
-            # Calculate optimal lineups
-            home_optimal = calculate_optimal_lineup(home_starters, home_bench)
-            away_optimal = calculate_optimal_lineup(away_starters, away_bench)
-            
-            # Calculate scores
-            home_actual = sum(p['points'] for p in home_starters)
-            away_actual = sum(p['points'] for p in away_starters)
-            home_opt_total = get_optimal_total(home_optimal)
-            away_opt_total = get_optimal_total(away_optimal)
-            
-            # Count zeros in opponent lineups
-            home_zeros = sum(1 for p in home_starters if p['points'] == 0)
-            away_zeros = sum(1 for p in away_starters if p['points'] == 0)
-            
-            # Determine winners
-            home_won = home_actual > away_actual
-            away_won = away_actual > home_actual
-            
-            # Update team statistics
-            update_team_week_stats(
-                team_stats, home_id, home_starters, home_bench, 
-                home_optimal, home_actual, home_opt_total, week,
-                away_id, away_actual, away_zeros, home_won
-            )
-            
-            update_team_week_stats(
-                team_stats, away_id, away_starters, away_bench,
-                away_optimal, away_actual, away_opt_total, week,
-                home_id, home_actual, home_zeros, away_won
-            )
-            
-            # Update win-loss records
-            update_win_loss_records(
-                team_stats, home_id, away_id,
-                home_actual, away_actual, home_opt_total, away_opt_total
-            )
-    
+        # Count zeros in opponent lineups
+        home_zeros = sum(1 for p in home_starters if p['points'] == 0)
+        away_zeros = sum(1 for p in away_starters if p['points'] == 0)
+        
+        # Determine winners
+        home_won = home_actual > away_actual
+        away_won = away_actual > home_actual
+        
+        # Update team statistics
+        update_team_week_stats(
+            team_stats, home_id, home_starters, home_bench, 
+            home_optimal, home_actual, home_opt_total, week,
+            away_id, away_actual, away_zeros, home_won
+        )
+        
+        update_team_week_stats(
+            team_stats, away_id, away_starters, away_bench,
+            away_optimal, away_actual, away_opt_total, week,
+            home_id, home_actual, home_zeros, away_won
+        )
+        
+        # Update win-loss records
+        update_win_loss_records(
+            team_stats, home_id, away_id,
+            home_actual, away_actual, home_opt_total, away_opt_total
+        )
+
+    return True
+
+
+def finalize_season(team_stats, team_name_map, processing_errors, advanced_stats=True):
+    """
+    Turn accumulated weekly stats into the final analyze_season result.
+    Mutates team_stats, so pass a copy if the accumulators are reused.
+    With advanced_stats=False the per-team advanced stats are skipped (for
+    responses that don't return them).
+    """
     # Post-process all team stats
     for team_id in team_stats:
         team_stats[team_id] = calculate_post_season_stats(team_stats[team_id])
 
+    # Team x week score matrix shared by the league and advanced stats
+    matrix = ScoreMatrix(team_stats)
+
     # Calculate league-wide stats (includes superlatives)
-    league_stats = calculate_league_stats(team_stats, team_name_map)
+    league_stats = calculate_league_stats(team_stats, team_name_map, matrix)
 
     # Calculate advanced stats for each team (needs all team data for comparisons)
     ts_dict = dict(team_stats)
-    for team_id in ts_dict:
-        ts_dict[team_id]['advanced_stats'] = calculate_advanced_stats(
-            ts_dict[team_id], ts_dict, team_name_map
-        )
+    if advanced_stats:
+        for team_id in ts_dict:
+            ts_dict[team_id]['advanced_stats'] = calculate_advanced_stats(
+                ts_dict[team_id], ts_dict, team_name_map, matrix
+            )
+
+    # One-player-away losses for every team, from the weekly_data built above
+    one_player_away = detect_one_player_away_losses(ts_dict, team_name_map)
+    for team_id, losses in one_player_away.items():
+        ts_dict[team_id]['one_player_away_losses'] = losses
 
     return {
         'team_stats': ts_dict,
         'league_stats': league_stats,
         'processing_errors': processing_errors
     }
+
+
+def analyze_season(league_id, year, start_week, end_week, team_name_map, fetch_data_func):
+    """
+    Analyze full season and return comprehensive statistics
+    
+    Args:
+        league_id: ESPN league ID
+        year: Season year
+        start_week: First week to analyze
+        end_week: Last week to analyze
+        team_name_map: Dictionary mapping team IDs to names
+        fetch_data_func: Function(league_id, year, week) -> (week bundle, error),
+            e.g. espn_api.fetch_week_bundle (allows dependency injection)
+        
+    Returns:
+        Dictionary containing:
+            - team_stats: Stats for each team
+            - league_stats: League-wide statistics
+            - processing_errors: List of any errors encountered
+    """
+    ledger = SeasonLedger()
+    fetch_errors = {}
+    weeks = []
+
+    # Fetch every week concurrently, then fold them in order
+    for week, bundle, error in fetch_week_range(league_id, year, start_week, end_week, fetch_data_func):
+        if error or not bundle:
+            fetch_errors[week] = f"Week {week}: {error or 'No data'}"
+            continue
+        weeks.append((week, None, bundle))
+    fold_weeks(ledger, weeks)
+
+    return analyze_ledger_range(ledger, start_week, end_week, team_name_map, fetch_errors)
+
+
+def fold_weeks(ledger, weeks):
+    """
+    Fold several weeks into a SeasonLedger, in order, with every team-week's
+    optimal lineup computed in one batch (see process_range_rosters).
+
+    Args:
+        ledger: SeasonLedger to update
+        weeks: List of (week, version, bundle)
+    """
+    range_rosters = process_range_rosters([bundle for _week, _version, bundle in weeks])
+    for (week, version, bundle), week_rosters in zip(weeks, range_rosters):
+        ledger.set_week(week, version, bundle, fold_week, week_rosters)
+
+
+def analyze_ledger_range(ledger, start_week, end_week, team_name_map, fetch_errors=None,
+                         advanced_stats=True):
+    """
+    Build the analyze_season result for a week range from a SeasonLedger.
+    Only the post-season, league and advanced stats are computed here; the
+    weekly accumulation comes from the ledger's prefix sums and fragments.
+    """
+    team_stats, processing_errors = ledger.build_team_stats(start_week, end_week, fetch_errors)
+    return finalize_season(team_stats, team_name_map, processing_errors, advanced_stats)
@@ -0,0 +1,217 @@
+"""
+Season Ledger - per-week season accumulators with prefix sums
+Each week is folded once into its own fragment. Scalar totals for any
+start_week/end_week range are O(1) prefix-sum differences, and the list
+fields are stitched together from the fragments, so a new range for a
+league that's already been analyzed needs no fetching or lineup optimization.
+"""
+import copy
+import threading
+from collections import defaultdict
+
+from caching import approx_size
+from .team_calculator import initialize_team_stats
+
+# Scalar accumulators (summed across weeks) and per-week lists (concatenated)
+COUNTER_FIELDS = tuple(
+    field for field, default in initialize_team_stats().items()
+    if isinstance(default, (int, float)) and not isinstance(default, bool)
+)
+LIST_FIELDS = tuple(
+    field for field, default in initialize_team_stats().items()
+    if isinstance(default, list)
+)
+# Float totals are re-added in week order when building a full result, so it
+# matches a sequential fold bit for bit (prefix differences can be off by an ulp)
+FLOAT_FIELDS = tuple(
+    field for field, default in initialize_team_stats().items()
+    if isinstance(default, float)
+)
+# Running maxima, replaced only when a later week strictly beats them
+HIGH_FIELDS = ('highest_scorer_week', 'highest_bench_week')
+
+
+class SeasonLedger:
+    """
+    Folded per-week team stats for one league season.
+
+    Fragments are keyed by week along with the content version they were
+    built from, so callers can tell which weeks need refolding. Hold
+    `lock` across an update + build sequence to get a consistent view.
+
+    sys.getsizeof (and so the LRU's approx_size) reports the fragments'
+    estimated footprint, kept up to date as weeks are folded and dropped.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._fragments = {}   # week -> {'version', 'team_stats', 'errors'}
+        self._fragment_bytes = {}  # week -> approx_size of its fragment
+        self._prefix = None    # team_id -> field -> cumulative list indexed by week
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sum(self._fragment_bytes.values())
+
+    def version(self, week):
+        """Content version a week was folded from, or None if not folded."""
+        fragment = self._fragments.get(week)
+        return fragment['version'] if fragment else None
+
+    def weeks(self):
+        return sorted(self._fragments)
+
+    def set_week(self, week, version, bundle, fold_func, week_rosters=None):
+        """
+        Fold a week's bundle into a fresh fragment, replacing any previous one.
+
+        Args:
+            week: Week number
+            version: Content version of the bundle (None if unknown)
+            bundle: Normalized week bundle
+            fold_func: season_analyzer.fold_week
+            week_rosters: Optional precomputed rosters + optimal lineups for
+                the week (see season_analyzer.fold_weeks)
+        """
+        team_stats = defaultdict(initialize_team_stats)
+        errors = []
+        fold_func(team_stats, week, bundle, None, errors, week_rosters)
+
+        fragment = {
+            'version': version,
+            'team_stats': dict(team_stats),
+            'errors': errors,
+        }
+        size = approx_size(fragment)
+
+        with self.lock:
+            self._fragments[week] = fragment
+            self._fragment_bytes[week] = size
+            self._prefix = None
+
+    def drop_week(self, week):
+        with self.lock:
+            if self._fragments.pop(week, None) is not None:
+                del self._fragment_bytes[week]
+                self._prefix = None
+
+    def _build_prefix(self):
+        """Cumulative counters per team, indexed by week number (0 = before week 1)."""
+        last_week = max(self._fragments, default=0)
+        team_ids = []
+        for week in sorted(self._fragments):
+            for team_id in self._fragments[week]['team_stats']:
+                if team_id not in team_ids:
+                    team_ids.append(team_id)
+
+        defaults = initialize_team_stats()
+        prefix = {}
+        for team_id in team_ids:
+            sums = {field: [defaults[field]] * (last_week + 1) for field in COUNTER_FIELDS}
+            sums['perfect_week_count'] = [0] * (last_week + 1)
+            for week in range(1, last_week + 1):
+                fragment = self._fragments.get(week)
+                stats = fragment['team_stats'].get(team_id) if fragment else None
+                for field in COUNTER_FIELDS:
+                    sums[field][week] = sums[field][week - 1] + (stats[field] if stats else 0)
+                sums['perfect_week_count'][week] = (
+                    sums['perfect_week_count'][week - 1] + (len(stats['perfect_weeks']) if stats else 0)
+                )
+            prefix[team_id] = sums
+        return prefix
+
+    def range_totals(self, team_id, start_week, end_week):
+        """
+        Scalar totals for one team over start_week..end_week in O(1).
+
+        Returns:
+            Dict of COUNTER_FIELDS plus 'perfect_week_count' (zeros if the
+            team has no folded weeks)
+        """
+        with self.lock:
+            if self._prefix is None:
+                self._prefix = self._build_prefix()
+            sums = self._prefix.get(team_id)
+            if sums is None:
+                sums = {field: [value] for field, value in initialize_team_stats().items() if field in COUNTER_FIELDS}
+                sums['perfect_week_count'] = [0]
+
+            last_week = len(next(iter(sums.values()))) - 1
+            hi = min(end_week, last_week)
+            lo = min(max(start_week - 1, 0), last_week)
+            if hi <= lo:
+                return {field: sums[field][0] for field in sums}
+            return {field: values[hi] - values[lo] for field, values in sums.items()}
+
+    def running_totals(self, start_week, end_week):
+        """
+        range_totals for every team seen in the ledger, e.g. season-to-date
+        totals while weeks are still being folded.
+
+        Returns:
+            {team_id: totals}
+        """
+        with self.lock:
+            if self._prefix is None:
+                self._prefix = self._build_prefix()
+            return {team_id: self.range_totals(team_id, start_week, end_week) for team_id in self._prefix}
+
+    def matchup_count(self, week):
+        """Number of matchups folded for a week (0 if it isn't folded)."""
+        fragment = self._fragments.get(week)
+        return len(fragment['team_stats']) // 2 if fragment else 0
+
+    def build_team_stats(self, start_week, end_week, fetch_errors=None):
+        """
+        Assemble analyze_season accumulators for a week range.
+
+        Equivalent to folding start_week..end_week in order: teams appear in
+        first-appearance order, lists are concatenated in week order, counts
+        come from prefix differences, float totals are re-added in week order,
+        and running maxima keep the earliest week on ties. The returned objects
+        are copies, so finalize_season can mutate them freely.
+
+        Args:
+            start_week: First week of the range
+            end_week: Last week of the range
+            fetch_errors: Optional {week: message} for weeks that couldn't be
+                fetched this time (reported in week order)
+
+        Returns:
+            (team_stats, processing_errors)
+        """
+        fetch_errors = fetch_errors or {}
+        team_stats = defaultdict(initialize_team_stats)
+        processing_errors = []
+
+        with self.lock:
+            weeks = range(start_week, end_week + 1)
+            for week in weeks:
+                if week in fetch_errors:
+                    processing_errors.append(fetch_errors[week])
+                fragment = self._fragments.get(week)
+                if fragment is None:
+                    continue
+                processing_errors.extend(fragment['errors'])
+
+                for team_id, week_stats in fragment['team_stats'].items():
+                    stats = team_stats[team_id]
+                    for field in LIST_FIELDS:
+                        stats[field].extend(copy.deepcopy(week_stats[field]))
+                    for key, points in week_stats['player_season_points'].items():
+                        stats['player_season_points'][key] += points
+                    for field in FLOAT_FIELDS:
+                        stats[field] += week_stats[field]
+                    for field in HIGH_FIELDS:
+                        candidate = week_stats[field]
+                        if candidate is not None and (
+                            stats[field] is None or candidate['points'] > stats[field]['points']
+                        ):
+                            stats[field] = dict(candidate)
+
+            for team_id, stats in team_stats.items():
+                totals = self.range_totals(team_id, start_week, end_week)
+                for field in COUNTER_FIELDS:
+                    if field not in FLOAT_FIELDS:
+                        stats[field] = totals[field]
+
+        return team_stats, processing_errors
@@ -0,0 +1,273 @@
+"""
+Cumulative Standings Engine
+Computes per-week standings increments once per season and keeps a cumulative
+snapshot for every week, so "standings through week N" is a lookup
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from .lineup_optimizer import get_optimal_player_keys, get_optimal_total
+from .player_week import player_key
+from .season_analyzer import process_week_rosters
+
+# Number of (league, season) engines kept in memory
+MAX_ENGINES = int(os.getenv('STANDINGS_MAX_ENGINES', 64))
+
+
+def _new_record():
+    return {
+        'wins': 0, 'losses': 0, 'ties': 0, 'points_for': 0.0,
+        'errors': 0, 'lost_points': 0.0, 'perfect_weeks': []
+    }
+
+
+def _copy_record(record):
+    copied = dict(record)
+    copied['perfect_weeks'] = list(record['perfect_weeks'])
+    return copied
+
+
+def _team_week(starters, bench, optimal):
+    """Score, lineup errors and lost points for one team's week."""
+    score = sum(p['points'] for p in starters)
+    opt_total = get_optimal_total(optimal)
+
+    opt_keys = get_optimal_player_keys(optimal)
+    starter_keys = set(player_key(p) for p in starters)
+
+    errors = len(opt_keys - starter_keys)
+    lost = max(0, opt_total - score)
+    return score, errors, lost
+
+
+def compute_week_increments(bundle):
+    """
+    Compute the standings increments for a single week.
+
+    Args:
+        bundle: Normalized week bundle (see espn_api.parse_week_bundle)
+
+    Returns:
+        List of (home_id, home_result, away_id, away_result) tuples, one per
+        matchup in bundle order, where each result is (score, errors, lost_points)
+    """
+    week_rosters = process_week_rosters(bundle)
+    increments = []
+    for matchup in bundle['matchups']:
+        home_id = matchup['home_id']
+        away_id = matchup['away_id']
+
+        if not home_id or not away_id:
+            continue
+
+        home = _team_week(*week_rosters[home_id])
+        away = _team_week(*week_rosters[away_id])
+        increments.append((home_id, home, away_id, away))
+
+    return increments
+
+
+def bundle_token(bundle):
+    """
+    Small identity for a bundle's content: its data version plus lineup
+    settings, or None for a bundle without a version (always recomputed).
+    """
+    version = bundle.get('version')
+    if version is None:
+        return None
+    lineup_slots = bundle.get('lineup_slots')
+    return version, tuple(sorted(lineup_slots.items())) if lineup_slots else None
+
+
+def _apply_week(records, week, increments):
+    """Apply one week's increments to a records dict in place."""
+    for home_id, home, away_id, away in increments:
+        home_rec = records.setdefault(home_id, _new_record())
+        away_rec = records.setdefault(away_id, _new_record())
+        home_score, home_errors, home_lost = home
+        away_score, away_errors, away_lost = away
+
+        home_rec['points_for'] += home_score
+        away_rec['points_for'] += away_score
+        home_rec['errors'] += home_errors
+        away_rec['errors'] += away_errors
+        home_rec['lost_points'] += home_lost
+        away_rec['lost_points'] += away_lost
+
+        if home_errors == 0:
+            home_rec['perfect_weeks'].append(week)
+        if away_errors == 0:
+            away_rec['perfect_weeks'].append(week)
+
+        if home_score > away_score:
+            home_rec['wins'] += 1
+            away_rec['losses'] += 1
+        elif away_score > home_score:
+            away_rec['wins'] += 1
+            home_rec['losses'] += 1
+        else:
+            home_rec['ties'] += 1
+            away_rec['ties'] += 1
+
+
+class StandingsEngine:
+    """
+    Per-season standings state.
+
+    Each week's increments are computed once per bundle version. A week is
+    only recomputed when its bundle_token changes, and cumulative snapshots
+    are rebuilt from the earliest changed week onwards. Only the token is
+    kept, not the bundle, so an engine doesn't hold a season of rosters in
+    memory after the bundle cache has let them go.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._weeks = {}          # week -> (bundle_token, increments)
+        self._snapshots = {}      # week -> {team_id: record} through that week
+        self._ranks = {}          # week -> {team_id: rank} through that week
+
+    def update(self, week_results):
+        """
+        Fold fetched weeks into the engine.
+
+        Args:
+            week_results: Iterable of (week, bundle, error) tuples, as returned
+                by espn_api.fetch_week_range
+
+        Returns:
+            Number of weeks whose increments were (re)computed
+        """
+        with self._lock:
+            dirty_from = None
+            recomputed = 0
+
+            for week, bundle, error in week_results:
+                cached = self._weeks.get(week)
+
+                if error or not bundle:
+                    if cached is not None:
+                        del self._weeks[week]
+                        dirty_from = week if dirty_from is None else min(dirty_from, week)
+                    continue
+
+                token = bundle_token(bundle)
+                if cached is not None and token is not None and cached[0] == token:
+                    continue
+
+                self._weeks[week] = (token, compute_week_increments(bundle))
+                recomputed += 1
+                dirty_from = week if dirty_from is None else min(dirty_from, week)
+
+            if dirty_from is not None:
+                self._rebuild_from(dirty_from)
+
+            return recomputed
+
+    def _rebuild_from(self, start_week):
+        """Recompute cumulative snapshots for every week >= start_week."""
+        for week in [w for w in self._snapshots if w >= start_week]:
+            del self._snapshots[week]
+            self._ranks.pop(week, None)
+
+        earlier = [w for w in self._snapshots if w < start_week]
+        if earlier:
+            base = self._snapshots[max(earlier)]
+            records = {tid: _copy_record(rec) for tid, rec in base.items()}
+        else:
+            records = {}
+
+        for week in sorted(w for w in self._weeks if w >= start_week):
+            _apply_week(records, week, self._weeks[week][1])
+            self._snapshots[week] = {tid: _copy_record(rec) for tid, rec in records.items()}
+
+    def _records_through(self, week):
+        """Cumulative records through the latest week <= week that had data."""
+        weeks = [w for w in self._snapshots if w <= week]
+        if not weeks:
+            return {}
+        return self._snapshots[max(weeks)]
+
+    def _week_ranks(self, week):
+        """Ranks at the end of a week, or an empty dict if that week had no data."""
+        if week not in self._snapshots:
+            return {}
+        if week not in self._ranks:
+            ordered = sorted(
+                self._snapshots[week].items(),
+                key=lambda item: (item[1]['wins'], item[1]['points_for']),
+                reverse=True
+            )
+            self._ranks[week] = {team_id: i + 1 for i, (team_id, _) in enumerate(ordered)}
+        return self._ranks[week]
+
+    def standings(self, target_week, team_name_map, name_func):
+        """
+        League standings through target_week, with rank change vs target_week - 1.
+
+        Args:
+            target_week: Last week to include
+            team_name_map: Dict mapping team IDs to name info
+            name_func: Function(team_name_map, team_id) -> display name
+
+        Returns:
+            List of standings dicts sorted by wins, then points for
+        """
+        with self._lock:
+            records = self._records_through(target_week)
+            prev_week_ranks = self._week_ranks(target_week - 1)
+
+            standings = []
+            for team_id, record in records.items():
+                standings.append({
+                    'team_id': team_id,
+                    'team_name': name_func(team_name_map, team_id),
+                    'wins': record['wins'],
+                    'losses': record['losses'],
+                    'ties': record['ties'],
+                    'record': f"{record['wins']}-{record['losses']}" + (f"-{record['ties']}" if record['ties'] > 0 else ""),
+                    'points_for': round(record['points_for'], 2),
+                    'errors': record['errors'],
+                    'lost_points': round(record['lost_points'], 2),
+                    'perfect_weeks': list(record['perfect_weeks'])
+                })
+
+        # Sort by wins (desc), then points for (desc)
+        standings.sort(key=lambda x: (x['wins'], x['points_for']), reverse=True)
+
+        # Add rank and rank change
+        for i, team in enumerate(standings):
+            team['rank'] = i + 1
+            prev_rank = prev_week_ranks.get(team['team_id'])
+            if prev_rank is not None and target_week > 1:
+                team['rank_change'] = prev_rank - team['rank']  # positive = moved up
+            else:
+                team['rank_change'] = 0
+
+        return standings
+
+
+_engines = OrderedDict()
+_engines_lock = threading.Lock()
+
+
+def get_standings_engine(league_id, year, fetch_data_func):
+    """
+    Get (or create) the standings engine for a league season.
+
+    Engines are keyed on the fetcher too, so injected fetchers never share
+    state with the live ESPN one. The least recently used engine is dropped
+    once MAX_ENGINES is exceeded.
+    """
+    key = (str(league_id), int(year), fetch_data_func)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = StandingsEngine()
+            _engines[key] = engine
+            while len(_engines) > MAX_ENGINES:
+                _engines.popitem(last=False)
+        else:
+            _engines.move_to_end(key)
+        return engine
@@ -1,8 +1,12 @@
 """
 Team-Level Statistics Calculator
 """
+from bisect import bisect_right
 from collections import defaultdict, Counter
 
+from .lineup_optimizer import SLOT_POSITIONS
+from .player_week import player_key
+
 
 def initialize_team_stats():
     """Initialize empty team stats dictionary"""
@@ -44,8 +48,11 @@ def calculate_post_season_stats(team_stats):
     """
     stats = team_stats
     
-    # Convert defaultdict to regular dict for JSON serialization
-    stats['player_season_points'] = dict(stats['player_season_points'])
+    # Season totals are keyed by player_key; names are attached here
+    player_names = {}
+    for week_data in stats['weekly_data']:
+        for starter in week_data['starters']:
+            player_names.setdefault(player_key(starter), starter['name'])
     
     # Find top 3 scorers
     sorted_players = sorted(
@@ -54,10 +61,17 @@ def calculate_post_season_stats(team_stats):
         reverse=True
     )
     stats['top_scorers'] = [
-        {'name': name, 'points': round(pts, 2)} 
-        for name, pts in sorted_players[:3]
+        {'name': player_names[key], 'points': round(pts, 2)}
+        for key, pts in sorted_players[:3]
     ]
     
+    # Name-keyed for JSON serialization (same-name players share an entry)
+    season_points = {}
+    for key, pts in stats['player_season_points'].items():
+        name = player_names[key]
+        season_points[name] = season_points.get(name, 0) + pts
+    stats['player_season_points'] = season_points
+    
     # Lucky break (lowest score in a win)
     wins = [w for w in stats['weekly_data'] if w['won']]
     if wins:
@@ -108,18 +122,13 @@ def calculate_post_season_stats(team_stats):
     
     # Most slept on player (most frequently benched when optimal)
     if stats['benched_stars']:
-        benched_counter = Counter(p['name'] for p in stats['benched_stars'])
+        benched_counter = Counter(player_key(p) for p in stats['benched_stars'])
         most_benched = benched_counter.most_common(1)[0]
-        total_pts = sum(
-            p['points'] for p in stats['benched_stars'] 
-            if p['name'] == most_benched[0]
-        )
-        weeks = [
-            p['week'] for p in stats['benched_stars'] 
-            if p['name'] == most_benched[0]
-        ]
+        benched = [p for p in stats['benched_stars'] if player_key(p) == most_benched[0]]
+        total_pts = sum(p['points'] for p in benched)
+        weeks = [p['week'] for p in benched]
         stats['most_slept_on'] = {
-            'name': most_benched[0],
+            'name': benched[0]['name'],
             'times_benched': most_benched[1],
             'points_missed': round(total_pts, 2),
             'weeks': weeks
@@ -129,18 +138,13 @@ def calculate_post_season_stats(team_stats):
     
     # Most overrated player (most frequently started when shouldn't)
     if stats['started_busts']:
-        bust_counter = Counter(p['name'] for p in stats['started_busts'])
+        bust_counter = Counter(player_key(p) for p in stats['started_busts'])
         most_overrated = bust_counter.most_common(1)[0]
-        total_pts = sum(
-            p['points'] for p in stats['started_busts'] 
-            if p['name'] == most_overrated[0]
-        )
-        weeks = [
-            p['week'] for p in stats['started_busts'] 
-            if p['name'] == most_overrated[0]
-        ]
+        busts = [p for p in stats['started_busts'] if player_key(p) == most_overrated[0]]
+        total_pts = sum(p['points'] for p in busts)
+        weeks = [p['week'] for p in busts]
         stats['most_overrated'] = {
-            'name': most_overrated[0],
+            'name': busts[0]['name'],
             'times_started': most_overrated[1],
             'points_from_starts': round(total_pts, 2),
             'weeks': weeks
@@ -236,3 +240,142 @@ def detect_perfect_lineup_losses(team_id, team_stats, team_name_map):
     perfect_losses.sort(key=lambda x: x['margin'])
 
     return perfect_losses
+
+
+def find_best_one_player_swap(my_score, opp_score, starters, bench):
+    """
+    Find the smallest single bench->starter swap that flips a loss into a win.
+
+    A swap is valid if the bench player's actual_position matches the
+    starter's slot (flex slots like FLEX or OP take any of their eligible
+    positions), the bench player outscored the starter, and the new total
+    beats the opponent. Bench players are bucketed by position and sorted by
+    points, so each starter only looks at the first few compatible bench
+    players above its score.
+
+    Args:
+        my_score: Team's (rounded) score for the week
+        opp_score: Opponent's (rounded) score for the week
+        starters: Starter dicts from process_team_roster
+        bench: Bench dicts from process_team_roster
+
+    Returns:
+        Swap dict, or None if no single swap flips the result. Ties on
+        point_gain go to the earlier bench player, then the earlier starter.
+    """
+    by_position = defaultdict(list)
+    for bench_idx, bench_player in enumerate(bench):
+        by_position[bench_player['actual_position']].append((bench_player['points'], bench_idx))
+    for candidates in by_position.values():
+        candidates.sort()
+
+    best = None  # (point_gain, bench_idx, starter_idx)
+    for starter_idx, starter in enumerate(starters):
+        slot = starter['position']
+        positions = SLOT_POSITIONS.get(slot, (slot,))
+
+        for position in positions:
+            candidates = by_position.get(position)
+            if not candidates:
+                continue
+
+            # Bench player must outscore the starter
+            start = bisect_right(candidates, (starter['points'], len(bench)))
+            first_gain = None
+            for points, bench_idx in candidates[start:]:
+                point_gain = round(points - starter['points'], 2)
+                if first_gain is not None and point_gain != first_gain:
+                    break
+                # Must actually flip the result
+                if round(my_score + point_gain, 2) <= opp_score:
+                    continue
+                first_gain = point_gain
+                candidate = (point_gain, bench_idx, starter_idx)
+                if best is None or candidate < best:
+                    best = candidate
+
+    if best is None:
+        return None
+
+    point_gain, bench_idx, starter_idx = best
+    bench_player = bench[bench_idx]
+    starter = starters[starter_idx]
+    return {
+        'bench_player': bench_player['name'],
+        'bench_points': bench_player['points'],
+        'starter_replaced': starter['name'],
+        'starter_points': starter['points'],
+        'starter_slot': starter['position'],
+        'point_gain': point_gain,
+        'new_total': round(my_score + point_gain, 2),
+    }
+
+
+def one_player_away_entry(week, opponent_name, my_score, opp_score, starters, bench):
+    """
+    Build the "one player away" record for a single week.
+
+    Returns:
+        Dict for the week, or None if the week was not a loss or no single
+        swap would have flipped it
+    """
+    # Only care about losses
+    if my_score >= opp_score:
+        return None
+
+    swap = find_best_one_player_swap(my_score, opp_score, starters, bench)
+    if swap is None:
+        return None
+
+    return {
+        'week': week,
+        'opponent_name': opponent_name,
+        'your_score': my_score,
+        'opponent_score': opp_score,
+        'margin': round(opp_score - my_score, 2),
+        'swap': swap,
+    }
+
+
+def detect_one_player_away_losses(team_stats, team_name_map):
+    """
+    Detect "one player away" losses for every team in a single pass over
+    the already-processed weekly_data.
+
+    Args:
+        team_stats: Dict of all team stats (keyed by team_id)
+        team_name_map: Dict mapping team IDs to name info
+
+    Returns:
+        Dict mapping team_id -> list of one-player-away losses sorted by week
+        (same entries as weekly_analyzer.find_one_player_away_losses)
+    """
+    results = {}
+
+    for team_id, stats in team_stats.items():
+        losses = []
+        for week_data in stats['weekly_data']:
+            if week_data['my_score'] >= week_data['opp_score']:
+                continue
+
+            opponent_id = week_data['opponent_id']
+            opp_info = team_name_map.get(opponent_id)
+            if isinstance(opp_info, dict):
+                opponent_name = opp_info.get('manager_name', f"Team {opponent_id}")
+            elif opp_info is not None:
+                opponent_name = opp_info
+            else:
+                opponent_name = f"Team {opponent_id}"
+
+            entry = one_player_away_entry(
+                week_data['week'], opponent_name,
+                week_data['my_score'], week_data['opp_score'],
+                week_data['starters'], week_data['bench']
+            )
+            if entry:
+                losses.append(entry)
+
+        losses.sort(key=lambda x: x['week'])
+        results[team_id] = losses
+
+    return results
@@ -4,7 +4,7 @@ Derives transactions from week-over-week roster diffs.
 ESPN's transaction history requires auth, so we reconstruct it from roster snapshots.
 """
 from collections import defaultdict
-from espn_api import POSITION_MAP, PLAYER_POSITION_MAP, fetch_league_data, get_team_name_map
+from espn_api import POSITION_MAP, fetch_week_range, get_team_name_map
 
 
 def _tm(team_map, team_id, field='manager_name', default=None):
@@ -17,43 +17,26 @@ def _tm(team_map, team_id, field='manager_name', default=None):
     return info
 
 
-def _extract_roster_players(team_data, week):
-    """Extract player IDs and info from a team's roster for a given week."""
+def _extract_roster_players(roster):
+    """Extract player IDs and info from a team's week-bundle roster rows."""
     players = {}
-    roster = team_data.get('roster', {}).get('entries', [])
-    if not roster:
-        # Try matchup roster
-        roster = team_data.get('rosterForCurrentScoringPeriod', {}).get('entries', [])
-        if not roster:
-            roster = team_data.get('rosterForMatchupPeriod', {}).get('entries', [])
-
-    for entry in roster:
-        ppe = entry.get('playerPoolEntry', {})
-        player = ppe.get('player', {})
-        pid = player.get('id')
+
+    for row in roster:
+        pid = row['player_id']
         if not pid:
             continue
 
-        # Get points for this week
-        points = ppe.get('appliedStatTotal', 0)
-        if points == 0:
-            for stat in player.get('stats', []):
-                if stat.get('scoringPeriodId') == week and stat.get('statSourceId') == 0:
-                    points = stat.get('appliedTotal', 0)
-                    break
-
-        slot_id = entry.get('lineupSlotId', 20)
-        pos_id = player.get('defaultPositionId', 0)
+        slot_id = row['slot_id'] if row['slot_id'] is not None else 20
 
         players[pid] = {
             'player_id': pid,
-            'name': player.get('fullName', 'Unknown'),
-            'position': PLAYER_POSITION_MAP.get(pos_id, 'Unknown'),
+            'name': row['name'],
+            'position': row['position'],
             'slot_id': slot_id,
             'started': slot_id != 20 and slot_id != 21,  # not bench, not IR
-            'points': round(points, 2),
-            'acquisition_type': entry.get('acquisitionType', -1),
-            'acquisition_date': entry.get('acquisitionDate', 0),
+            'points': round(row['points'], 2),
+            'acquisition_type': row['acquisition_type'],
+            'acquisition_date': row['acquisition_date'],
         }
 
     return players
@@ -66,44 +49,16 @@ def _fetch_all_rosters(league_id, year, start_week, end_week):
     """
     weekly_rosters = {}
 
-    for week in range(start_week, end_week + 1):
-        data, error = fetch_league_data(league_id, year, week)
-        if error or not data:
+    for week, bundle, error in fetch_week_range(league_id, year, start_week, end_week):
+        if error or not bundle:
             print(f"[Waivers] Error fetching week {week}: {error}")
             continue
 
-        teams = data.get('teams', [])
-        week_data = {}
-
-        # Try to get roster from schedule (matchup data) first
-        schedule = data.get('schedule', [])
-        matchup_rosters = {}
-        for matchup in schedule:
-            if matchup.get('matchupPeriodId') != week:
-                continue
-            for side in ('home', 'away'):
-                team_entry = matchup.get(side, {})
-                if not team_entry:
-                    continue
-                tid = team_entry.get('teamId')
-                if tid:
-                    roster_key = 'rosterForCurrentScoringPeriod'
-                    if roster_key not in team_entry:
-                        roster_key = 'rosterForMatchupPeriod'
-                    roster_entries = team_entry.get(roster_key, {}).get('entries', [])
-                    if roster_entries:
-                        matchup_rosters[tid] = team_entry
-
-        for team in teams:
-            tid = team.get('id')
-            # Prefer matchup roster (has per-week data), fall back to team roster
-            if tid in matchup_rosters:
-                players = _extract_roster_players(matchup_rosters[tid], week)
-            else:
-                players = _extract_roster_players(team, week)
-            week_data[tid] = players
-
-        weekly_rosters[week] = week_data
+        # Bundle rosters prefer the matchup roster (has per-week data) over the team roster
+        weekly_rosters[week] = {
+            tid: _extract_roster_players(roster)
+            for tid, roster in bundle['rosters'].items()
+        }
 
     return weekly_rosters
 
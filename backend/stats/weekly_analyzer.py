@@ -2,9 +2,12 @@
 Weekly Deep Dive Analyzer
 Per-week analysis with detailed matchup breakdowns, league standings, and all matchups
 """
-from collections import defaultdict
-from .lineup_optimizer import calculate_optimal_lineup, get_optimal_total
-from .season_analyzer import process_team_roster
+from .lineup_optimizer import SLOT_POSITIONS, get_optimal_player_keys, get_optimal_total
+from .player_week import player_key
+from .season_analyzer import process_team_roster, process_week_rosters
+from .standings import get_standings_engine
+from .team_calculator import find_best_one_player_swap, one_player_away_entry
+from espn_api import fetch_week_range
 import sys
 import os
 
@@ -34,7 +37,8 @@ def analyze_week(league_id, year, week, team_id, team_name_map, fetch_data_func)
         week: Week number to analyze
         team_id: ID of the team to analyze (for "my matchup" context)
         team_name_map: Dictionary mapping team IDs to names
-        fetch_data_func: Function to fetch data (allows dependency injection)
+        fetch_data_func: Function(league_id, year, week) -> (week bundle, error),
+            e.g. espn_api.fetch_week_bundle (allows dependency injection)
 
     Returns:
         Dictionary containing:
@@ -44,13 +48,12 @@ def analyze_week(league_id, year, week, team_id, team_name_map, fetch_data_func)
             - error: Error message if any
     """
     # Fetch data for this week
-    data, error = fetch_data_func(league_id, year, week)
+    bundle, error = fetch_data_func(league_id, year, week)
 
-    if error or not data:
+    if error or not bundle:
         return {'error': error or 'No data available'}
 
-    schedule = data.get('schedule', [])
-    matchups = [m for m in schedule if m.get('matchupPeriodId') == week]
+    matchups = bundle['matchups']
 
     if not matchups:
         return {'error': f'No matchups found for week {week}'}
@@ -59,27 +62,18 @@ def analyze_week(league_id, year, week, team_id, team_name_map, fetch_data_func)
     all_matchups_data = []
     my_matchup_data = None
 
-    for matchup in matchups:
-        home = matchup.get('home', {})
-        away = matchup.get('away', {})
+    # Process rosters and calculate every optimal lineup in one batch
+    week_rosters = process_week_rosters(bundle)
 
-        home_id = home.get('teamId')
-        away_id = away.get('teamId')
+    for matchup in matchups:
+        home_id = matchup['home_id']
+        away_id = matchup['away_id']
 
         if not home_id or not away_id:
             continue
 
-        # Get rosters
-        home_roster = home.get('rosterForCurrentScoringPeriod', {}).get('entries', [])
-        away_roster = away.get('rosterForCurrentScoringPeriod', {}).get('entries', [])
-
-        # Process rosters
-        home_starters, home_bench = process_team_roster(home_roster, week)
-        away_starters, away_bench = process_team_roster(away_roster, week)
-
-        # Calculate optimal lineups
-        home_optimal = calculate_optimal_lineup(home_starters, home_bench)
-        away_optimal = calculate_optimal_lineup(away_starters, away_bench)
+        home_starters, home_bench, home_optimal = week_rosters[home_id]
+        away_starters, away_bench, away_optimal = week_rosters[away_id]
 
         # Calculate scores
         home_actual = sum(p['points'] for p in home_starters)
@@ -147,29 +141,17 @@ def analyze_week(league_id, year, week, team_id, team_name_map, fetch_data_func)
         starters = my_team['starters']
         bench = my_team['bench']
 
-        valid_swaps = []
-        for bench_player in bench:
-            for starter in starters:
-                if bench_player['points'] <= starter['points']:
-                    continue
-                if not _swap_compatible(bench_player, starter):
-                    continue
-                point_gain = round(bench_player['points'] - starter['points'], 2)
-                new_total = round(my_score + point_gain, 2)
-                if new_total <= opp_score:
-                    continue
-                valid_swaps.append({
-                    'bench_player': bench_player['name'],
-                    'bench_points': bench_player['points'],
-                    'starter_replaced': starter['name'],
-                    'starter_points': starter['points'],
-                    'point_gain': point_gain,
-                    'new_total': new_total,
-                    'win_margin': round(new_total - opp_score, 2),
-                })
-
-        if valid_swaps:
-            best_swap = min(valid_swaps, key=lambda s: s['point_gain'])
+        swap = find_best_one_player_swap(my_score, opp_score, starters, bench)
+        if swap:
+            best_swap = {
+                'bench_player': swap['bench_player'],
+                'bench_points': swap['bench_points'],
+                'starter_replaced': swap['starter_replaced'],
+                'starter_points': swap['starter_points'],
+                'point_gain': swap['point_gain'],
+                'new_total': swap['new_total'],
+                'win_margin': round(swap['new_total'] - opp_score, 2),
+            }
             one_player_away = {
                 'opponent_name': opponent['team_name'],
                 'your_score': my_score,
@@ -195,18 +177,17 @@ def find_lineup_errors(starters, bench, optimal_lineup):
     Returns:
         List of dicts with 'bench_player', 'should_replace', 'points_lost'
     """
-    optimal_names = set(player[1]['name'] for player in optimal_lineup)
-    starter_names = set(p['name'] for p in starters)
+    optimal_keys = get_optimal_player_keys(optimal_lineup)
 
     errors = []
 
     for bench_player in bench:
-        if bench_player['name'] in optimal_names:
+        if player_key(bench_player) in optimal_keys:
             # This bench player should have started
             # Find which starter they should have replaced
             replaced_starter = None
             for starter in starters:
-                if starter['name'] not in optimal_names:
+                if player_key(starter) not in optimal_keys:
                     # Check if positions are compatible
                     if positions_compatible(bench_player, starter):
                         if replaced_starter is None or starter['points'] < replaced_starter['points']:
@@ -234,8 +215,8 @@ def positions_compatible(player1, player2):
     if pos1 == pos2:
         return True
 
-    # FLEX can take RB/WR/TE
-    if slot2 == 'FLEX' and pos1 in ['RB', 'WR', 'TE']:
+    # Flex slots (FLEX, OP, RB/WR, ...) take any of their eligible positions
+    if pos1 in SLOT_POSITIONS.get(slot2, ()):
         return True
 
     return False
@@ -246,134 +227,26 @@ def calculate_standings_through_week(league_id, year, target_week, team_name_map
     Calculate league standings through a specific week.
     Includes rank change, cumulative errors, lost points, and perfect weeks.
 
+    Per-week increments and cumulative snapshots live in a per-season
+    StandingsEngine, so only weeks whose data changed are re-optimized.
+
     Returns:
         List of standings dicts sorted by record, with enhanced analytics
     """
-    # Initialize records with extended tracking
-    records = defaultdict(lambda: {
-        'wins': 0, 'losses': 0, 'ties': 0, 'points_for': 0.0,
-        'errors': 0, 'lost_points': 0.0, 'perfect_weeks': []
-    })
-
-    # We need previous-week standings for rank change, so track per-week snapshots
-    prev_week_ranks = {}
-
-    # Process each week up to and including target week
-    for week in range(1, target_week + 1):
-        data, error = fetch_data_func(league_id, year, week)
-
-        if error or not data:
-            continue
-
-        schedule = data.get('schedule', [])
-        matchups = [m for m in schedule if m.get('matchupPeriodId') == week]
-
-        for matchup in matchups:
-            home = matchup.get('home', {})
-            away = matchup.get('away', {})
-
-            home_id = home.get('teamId')
-            away_id = away.get('teamId')
-
-            if not home_id or not away_id:
-                continue
-
-            # Get rosters and calculate scores + optimal
-            home_roster = home.get('rosterForCurrentScoringPeriod', {}).get('entries', [])
-            away_roster = away.get('rosterForCurrentScoringPeriod', {}).get('entries', [])
-
-            home_starters, home_bench = process_team_roster(home_roster, week)
-            away_starters, away_bench = process_team_roster(away_roster, week)
-
-            home_score = sum(p['points'] for p in home_starters)
-            away_score = sum(p['points'] for p in away_starters)
-
-            # Optimal lineup analysis for errors/lost points/perfect weeks
-            home_optimal = calculate_optimal_lineup(home_starters, home_bench)
-            away_optimal = calculate_optimal_lineup(away_starters, away_bench)
-            home_opt_total = get_optimal_total(home_optimal)
-            away_opt_total = get_optimal_total(away_optimal)
-
-            home_opt_names = set(p[1]['name'] for p in home_optimal)
-            away_opt_names = set(p[1]['name'] for p in away_optimal)
-            home_starter_names = set(p['name'] for p in home_starters)
-            away_starter_names = set(p['name'] for p in away_starters)
-
-            home_week_errors = len(home_opt_names - home_starter_names)
-            away_week_errors = len(away_opt_names - away_starter_names)
-            home_week_lost = max(0, home_opt_total - home_score)
-            away_week_lost = max(0, away_opt_total - away_score)
-
-            # Update records
-            records[home_id]['points_for'] += home_score
-            records[away_id]['points_for'] += away_score
-            records[home_id]['errors'] += home_week_errors
-            records[away_id]['errors'] += away_week_errors
-            records[home_id]['lost_points'] += home_week_lost
-            records[away_id]['lost_points'] += away_week_lost
-
-            if home_week_errors == 0:
-                records[home_id]['perfect_weeks'].append(week)
-            if away_week_errors == 0:
-                records[away_id]['perfect_weeks'].append(week)
-
-            if home_score > away_score:
-                records[home_id]['wins'] += 1
-                records[away_id]['losses'] += 1
-            elif away_score > home_score:
-                records[away_id]['wins'] += 1
-                records[home_id]['losses'] += 1
-            else:
-                records[home_id]['ties'] += 1
-                records[away_id]['ties'] += 1
-
-        # Snapshot ranks at end of this week (for previous-week comparison)
-        if week == target_week - 1:
-            prev_standings = []
-            for team_id, rec in records.items():
-                prev_standings.append({'team_id': team_id, 'wins': rec['wins'], 'points_for': rec['points_for']})
-            prev_standings.sort(key=lambda x: (x['wins'], x['points_for']), reverse=True)
-            for i, t in enumerate(prev_standings):
-                prev_week_ranks[t['team_id']] = i + 1
-
-    # Build standings list
-    standings = []
-    for team_id, record in records.items():
-        standings.append({
-            'team_id': team_id,
-            'team_name': _tm(team_name_map, team_id),
-            'wins': record['wins'],
-            'losses': record['losses'],
-            'ties': record['ties'],
-            'record': f"{record['wins']}-{record['losses']}" + (f"-{record['ties']}" if record['ties'] > 0 else ""),
-            'points_for': round(record['points_for'], 2),
-            'errors': record['errors'],
-            'lost_points': round(record['lost_points'], 2),
-            'perfect_weeks': record['perfect_weeks']
-        })
-
-    # Sort by wins (desc), then points for (desc)
-    standings.sort(key=lambda x: (x['wins'], x['points_for']), reverse=True)
-
-    # Add rank and rank change
-    for i, team in enumerate(standings):
-        team['rank'] = i + 1
-        prev_rank = prev_week_ranks.get(team['team_id'])
-        if prev_rank is not None and target_week > 1:
-            team['rank_change'] = prev_rank - team['rank']  # positive = moved up
-        else:
-            team['rank_change'] = 0
-
-    return standings
+    engine = get_standings_engine(league_id, year, fetch_data_func)
+    engine.update(fetch_week_range(league_id, year, 1, target_week, fetch_data_func))
+    return engine.standings(target_week, team_name_map, _tm)
 
 
 def find_one_player_away_losses(league_id, year, team_id, start_week, end_week, team_name_map, fetch_league_data_fn):
     """
     Find weeks where swapping ONE bench player for ONE starter would have flipped a loss to a win.
 
-    For each loss, checks every bench→starter swap. A swap is valid if the bench player's
-    actual_position is compatible with the starter's slot and the bench player scored more.
-    Returns the closest valid swap (smallest point_gain that still flips) per week.
+    Fetches the range once and only processes this team's matchup each week. A swap is
+    valid if the bench player's actual_position is compatible with the starter's slot and
+    the bench player scored more. Returns the closest valid swap (smallest point_gain that
+    still flips) per week. When a season analysis is already available, prefer
+    team_calculator.detect_one_player_away_losses, which covers every team from weekly_data.
 
     Args:
         league_id: ESPN league ID
@@ -382,104 +255,42 @@ def find_one_player_away_losses(league_id, year, team_id, start_week, end_week,
         start_week: First week to check
         end_week: Last week to check
         team_name_map: Dict mapping team IDs to name info
-        fetch_league_data_fn: Function(league_id, year, week) -> (data, error)
+        fetch_league_data_fn: Function(league_id, year, week) -> (week bundle, error)
 
     Returns:
         List of dicts, one per "one player away" loss, sorted by week
     """
     results = []
 
-    for week in range(start_week, end_week + 1):
-        week_data = analyze_week(league_id, year, week, team_id, team_name_map, fetch_league_data_fn)
-
-        if week_data.get('error') or not week_data.get('my_matchup'):
-            continue
-
-        my_team = week_data['my_matchup']['my_team']
-        opponent = week_data['my_matchup']['opponent']
-
-        my_score = my_team['score']
-        opp_score = opponent['score']
-
-        # Only care about losses
-        if my_score >= opp_score:
+    # One pass over the range; only this team's matchup is processed each week
+    for week, bundle, error in fetch_week_range(league_id, year, start_week, end_week, fetch_league_data_fn):
+        if error or not bundle:
             continue
 
-        margin = round(opp_score - my_score, 2)
-        starters = my_team['starters']
-        bench = my_team['bench']
-
-        # Find all valid swaps that flip the result
-        valid_swaps = []
-
-        for bench_player in bench:
-            for starter in starters:
-                # Bench player must outscore the starter
-                if bench_player['points'] <= starter['points']:
-                    continue
-
-                # Check position compatibility (can bench player fill this starter's slot?)
-                if not _swap_compatible(bench_player, starter):
-                    continue
-
-                point_gain = round(bench_player['points'] - starter['points'], 2)
-                new_total = round(my_score + point_gain, 2)
-
-                # Must actually flip the result
-                if new_total <= opp_score:
-                    continue
-
-                valid_swaps.append({
-                    'bench_player': bench_player['name'],
-                    'bench_points': bench_player['points'],
-                    'starter_replaced': starter['name'],
-                    'starter_points': starter['points'],
-                    'starter_slot': starter['position'],
-                    'point_gain': point_gain,
-                    'new_total': new_total,
-                })
+        for matchup in bundle['matchups']:
+            home_id = matchup['home_id']
+            away_id = matchup['away_id']
 
-        if not valid_swaps:
-            continue
+            if not home_id or not away_id or team_id not in (home_id, away_id):
+                continue
 
-        # Pick the closest flip — smallest point_gain (most dramatic)
-        best_swap = min(valid_swaps, key=lambda s: s['point_gain'])
+            opponent_id = away_id if team_id == home_id else home_id
+            starters, bench = process_team_roster(bundle['rosters'].get(team_id, []))
+            opp_starters, _ = process_team_roster(bundle['rosters'].get(opponent_id, []))
 
-        results.append({
-            'week': week,
-            'opponent_name': opponent['team_name'],
-            'your_score': my_score,
-            'opponent_score': opp_score,
-            'margin': margin,
-            'swap': best_swap,
-        })
+            entry = one_player_away_entry(
+                week, _tm(team_name_map, opponent_id),
+                round(sum(p['points'] for p in starters), 2),
+                round(sum(p['points'] for p in opp_starters), 2),
+                starters, bench
+            )
+            if entry:
+                results.append(entry)
+            break
 
     return results
 
 
-def _swap_compatible(bench_player, starter):
-    """
-    Check if a bench player can fill the starter's slot.
-
-    Rules:
-        - Same actual_position always works (RB→RB slot, etc.)
-        - FLEX slot accepts RB, WR, or TE
-        - No cross-position swaps otherwise (e.g. WR cannot go into RB slot)
-    """
-    bench_pos = bench_player['actual_position']
-    starter_slot = starter['position']  # slot label: QB, RB, WR, TE, FLEX, D/ST, K
-
-    # Exact position match (bench RB → RB slot, bench WR → WR slot, etc.)
-    if bench_pos == starter_slot:
-        return True
-
-    # FLEX slot accepts RB, WR, TE
-    if starter_slot == 'FLEX' and bench_pos in ('RB', 'WR', 'TE'):
-        return True
-
-    return False
-
-
 def generate_week_summaries(league_id, league_name, year, week, all_matchups, standings, force_regenerate=False):
     """
     Generate NFL and Fantasy League summaries for a week
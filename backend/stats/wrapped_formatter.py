@@ -98,4 +98,5 @@ def format_team_wrapped(team_id, team_stats, team_name_map, league_stats):
             'optimal_points': stats['weekly_optimal_points']
         },
         'advanced_stats': stats.get('advanced_stats', {}),
+        'one_player_away_losses': stats.get('one_player_away_losses', []),
     }
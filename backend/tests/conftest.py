@@ -0,0 +1,10 @@
+"""
+Test setup: make the backend modules importable and keep the shared cache
+in memory so tests never touch backend/cache/.
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault('CACHE_BACKEND', 'memory')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,93 @@
+"""Signed shared-store envelopes: tampered or unsigned blobs are never unpickled."""
+import pickle
+import sqlite3
+import zlib
+
+import pytest
+
+from caching.backends import (
+    _HEADER, _MAGIC, ENVELOPE_FORMAT, NO_SCHEMA, SQLiteBackend, UntrustedEntry, decode_entry, encode_entry,
+)
+
+UNPICKLED = []
+
+
+def record_unpickled(message):
+    UNPICKLED.append(message)
+
+
+class Payload:
+    """Records that it was unpickled, standing in for a malicious pickle."""
+
+    def __reduce__(self):
+        return record_unpickled, ('payload ran',)
+
+
+def test_payload_runs_when_unpickled():
+    pickle.loads(pickle.dumps(Payload()))
+    assert UNPICKLED == ['payload ran']
+
+
+@pytest.fixture(autouse=True)
+def reset_unpickled():
+    UNPICKLED.clear()
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return SQLiteBackend(str(tmp_path / 'store.sqlite'), max_bytes=1024 * 1024, signing_key=b'k' * 32)
+
+
+def overwrite(backend, key, blob):
+    with sqlite3.connect(backend.path) as conn:
+        conn.execute('UPDATE entries SET value = ? WHERE key = ?', (blob, repr(key)))
+
+
+def test_round_trip(backend):
+    backend.set('season', ('123', 2025), {'team_stats': {1: (1, 2)}})
+    assert backend.get('season', ('123', 2025)) == {'team_stats': {1: (1, 2)}}
+
+
+def test_tampered_body_is_rejected_not_loaded(backend):
+    backend.set('season', 'key', {'result': 1})
+    blob = encode_entry({'result': 1}, 'season', repr('key'), signing_key=b'k' * 32)
+    signed_prefix = blob[:_HEADER.size + 32]
+    overwrite(backend, 'key', signed_prefix + zlib.compress(pickle.dumps(Payload())))
+
+    assert backend.get('season', 'key') is None
+    assert UNPICKLED == []
+    assert backend.stats()['rejected'] == 1
+    assert backend.stats()['hits'] == 0
+
+
+def test_blob_signed_with_another_key_is_rejected(backend):
+    backend.set('season', 'key', 'placeholder')
+    overwrite(backend, 'key', encode_entry(Payload(), 'season', repr('key'), signing_key=b'x' * 32))
+
+    assert backend.get('season', 'key') is None
+    assert UNPICKLED == []
+    assert backend.stats()['rejected'] == 1
+
+
+def test_signed_blob_moved_to_another_key_is_rejected(backend):
+    backend.set('season', 'a', 'value for a')
+    backend.set('season', 'b', 'value for b')
+    with sqlite3.connect(backend.path) as conn:
+        blob = conn.execute('SELECT value FROM entries WHERE key = ?', (repr('a'),)).fetchone()[0]
+    overwrite(backend, 'b', blob)
+
+    assert backend.get('season', 'b') is None
+    assert backend.get('season', 'a') == 'value for a'
+
+
+def test_unsigned_blob_is_never_loaded(backend):
+    unsigned = _HEADER.pack(_MAGIC, 1, NO_SCHEMA) + zlib.compress(pickle.dumps(Payload()))
+    backend.set('season', 'key', 'placeholder')
+    overwrite(backend, 'key', unsigned)
+    assert backend.get('season', 'key') is None
+
+    # Current format but no signature
+    unsigned = _HEADER.pack(_MAGIC, ENVELOPE_FORMAT, NO_SCHEMA) + zlib.compress(pickle.dumps(Payload()))
+    with pytest.raises(UntrustedEntry):
+        decode_entry(unsigned, 'season', repr('key'), signing_key=b'k' * 32)
+    assert UNPICKLED == []
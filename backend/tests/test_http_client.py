@@ -0,0 +1,88 @@
+"""get_json's total deadline against servers that stall."""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import http_client
+
+
+class StallingServer:
+    """Accepts connections, reads the request and never answers."""
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(16)
+        self.connections = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.sock.getsockname()[1]}/stall"
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _addr = self.sock.accept()
+            except OSError:
+                return
+            self.connections.append(conn)
+
+    def close(self):
+        for conn in self.connections:
+            conn.close()
+        self.sock.close()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = json.dumps({'ok': True}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stalling_server():
+    server = StallingServer()
+    yield server
+    server.close()
+
+
+def test_stalled_read_gives_up_at_the_deadline(stalling_server):
+    # The read timeout alone would wait 10s; the 1s deadline has to win
+    started = time.monotonic()
+    with pytest.raises(requests.exceptions.RequestException):
+        http_client.get_json(stalling_server.url, timeout=(1, 10), deadline=1, max_retries=3)
+    assert time.monotonic() - started < 1.5
+
+
+def test_retries_share_the_deadline(stalling_server):
+    # Each attempt may wait 0.4s, but all attempts together get 1s
+    started = time.monotonic()
+    with pytest.raises(requests.exceptions.RequestException):
+        http_client.get_json(stalling_server.url, timeout=0.4, deadline=1, max_retries=10)
+    assert time.monotonic() - started < 1.5
+    assert len(stalling_server.connections) >= 2
+
+
+def test_answers_within_the_deadline():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _JSONHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/ok"
+        assert http_client.get_json(url, deadline=1) == {'ok': True}
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,206 @@
+"""RedisBackend against a minimal in-process RESP server."""
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+from caching.backends import RedisBackend, schema_fingerprint
+
+
+class StubRedis(socketserver.ThreadingTCPServer):
+    """
+    Just enough of Redis for RedisBackend: AUTH, SELECT, PING, GET,
+    SET [PX ms] and DEL, with per-db keyspaces and expiry. Records every
+    command with the connection's auth state and db.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(('127.0.0.1', 0), _StubHandler)
+        self.password = password
+        self.data = {}       # (db, key) -> (value, expires_at)
+        self.commands = []   # (authenticated, db, command, args)
+        self.connections = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}"
+
+    def names(self):
+        return [command for _auth, _db, command, _args in self.commands]
+
+
+class _StubHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        authenticated = server.password is None
+        db = 0
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            command = args[0].decode().upper()
+            with server.lock:
+                server.commands.append((authenticated, db, command, args[1:]))
+
+            if command == 'AUTH':
+                authenticated = args[-1].decode() == server.password
+                self._write(b'+OK\r\n' if authenticated else b'-WRONGPASS invalid password\r\n')
+            elif not authenticated:
+                self._write(b'-NOAUTH Authentication required.\r\n')
+            elif command == 'SELECT':
+                db = int(args[1])
+                self._write(b'+OK\r\n')
+            elif command == 'PING':
+                self._write(b'+PONG\r\n')
+            elif command == 'SET':
+                expires_at = None
+                if len(args) == 5 and args[3].upper() == b'PX':
+                    expires_at = time.time() + int(args[4]) / 1000
+                with server.lock:
+                    server.data[(db, args[1])] = (args[2], expires_at)
+                self._write(b'+OK\r\n')
+            elif command == 'GET':
+                with server.lock:
+                    value, expires_at = server.data.get((db, args[1]), (None, None))
+                if value is None or (expires_at is not None and expires_at <= time.time()):
+                    self._write(b'$-1\r\n')
+                else:
+                    self._write(b'$%d\r\n%s\r\n' % (len(value), value))
+            elif command == 'DEL':
+                with server.lock:
+                    removed = server.data.pop((db, args[1]), None) is not None
+                self._write(b':%d\r\n' % removed)
+            else:
+                self._write(b'-ERR unknown command\r\n')
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line.startswith(b'*'):
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _write(self, data):
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def server():
+    stub = StubRedis()
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+
+@pytest.fixture
+def auth_server():
+    stub = StubRedis(password='s3cret')
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_get_and_set(server):
+    backend = RedisBackend(server.url)
+    assert backend.get('espn', ('123', 2025)) is None
+
+    backend.set('espn', ('123', 2025), {'teams': [1, 2, 3]})
+    assert backend.get('espn', ('123', 2025)) == {'teams': [1, 2, 3]}
+    assert ('SET', "ffw:espn:('123', 2025)") == (server.commands[-2][2], server.commands[-2][3][0].decode())
+
+    stats = backend.stats()
+    assert (stats['hits'], stats['misses'], stats['writes'], stats['errors']) == (1, 1, 1, 0)
+
+
+def test_set_with_ttl_uses_px(server):
+    backend = RedisBackend(server.url)
+    backend.set('espn', 'live', 'value', ttl=0.2)
+
+    _auth, _db, command, args = server.commands[-1]
+    assert command == 'SET'
+    assert args[2:] == [b'PX', b'200']
+    assert backend.get('espn', 'live') == 'value'
+
+    time.sleep(0.25)
+    assert backend.get('espn', 'live') is None
+
+
+def test_auth_and_select(auth_server):
+    backend = RedisBackend(f"redis://:s3cret@127.0.0.1:{auth_server.server_address[1]}/3")
+    backend.set('season', 'key', 42)
+    assert backend.get('season', 'key') == 42
+
+    assert auth_server.names()[:2] == ['AUTH', 'SELECT']
+    assert all(auth and db == 3 for auth, db, command, _args in auth_server.commands
+               if command in ('GET', 'SET'))
+    assert [key for db, key in auth_server.data] == [b'ffw:season:' + repr('key').encode()]
+    assert list(auth_server.data)[0][0] == 3
+
+
+def test_failed_handshake_is_not_reused(auth_server):
+    backend = RedisBackend(f"redis://:wrong@127.0.0.1:{auth_server.server_address[1]}", retry_seconds=0)
+
+    backend.set('espn', 'key', 'value')
+    assert backend.get('espn', 'key') is None
+    assert backend.stats()['errors'] == 2
+    assert backend.stats()['idle_connections'] == 0
+    # Every connection was refused at AUTH; nothing ran unauthenticated
+    assert set(auth_server.names()) == {'AUTH'}
+    assert auth_server.connections == 2
+
+
+def test_server_down_falls_back_to_misses():
+    backend = RedisBackend(f"redis://127.0.0.1:{_free_port()}", timeout=0.5, retry_seconds=30)
+
+    assert backend.get('espn', 'key') is None
+    backend.set('espn', 'key', 'value')
+    assert backend.get('espn', 'key') is None
+
+    stats = backend.stats()
+    assert stats['online'] is False
+    # Only the first call tried to connect; the rest skipped the dead server
+    assert stats['errors'] == 1
+    assert stats['writes'] == 1 and stats['misses'] == 1
+
+
+def test_stale_schema_reads_as_miss(server):
+    old = schema_fingerprint('season', 1)
+    new = schema_fingerprint('season', 2)
+    backend = RedisBackend(server.url)
+
+    backend.set('season', 'key', {'result': 'old shape'}, schema=old)
+    assert backend.get('season', 'key', schema=new) is None
+    assert backend.get('season', 'key', schema=old) == {'result': 'old shape'}
+    assert backend.stats()['stale'] == 1
+
+
+def test_threads_share_pooled_connections(server):
+    backend = RedisBackend(server.url)
+    backend.set('espn', 'key', 'value')
+
+    for _ in range(5):
+        thread = threading.Thread(target=backend.get, args=('espn', 'key'))
+        thread.start()
+        thread.join()
+
+    assert server.connections == 1
+    assert backend.stats()['connections_opened'] == 1
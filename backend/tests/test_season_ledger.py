@@ -0,0 +1,56 @@
+"""SeasonLedger size accounting, as seen by the ledger LRU."""
+from caching import LRUCache, approx_size
+from stats.player_week import PlayerWeek
+from stats.season_ledger import SeasonLedger
+
+
+def fold_rows(team_stats, week, bundle, error, processing_errors, week_rosters=None):
+    """Stand-in for season_analyzer.fold_week: one weekly_data row per player."""
+    for team_id in (1, 2):
+        team_stats[team_id]['weekly_data'].append({
+            'week': week,
+            'players': [PlayerWeek(team_id * 100 + i, f"Player {team_id}-{i}", 'RB', 'RB', 2, 10.0 + i) for i in range(bundle)],
+        })
+
+
+def ledger_with_weeks(weeks, players=40):
+    ledger = SeasonLedger()
+    for week in range(1, weeks + 1):
+        ledger.set_week(week, 'final', players, fold_rows)
+    return ledger
+
+
+def test_size_grows_with_folded_weeks():
+    sizes = [approx_size(ledger_with_weeks(weeks)) for weeks in (1, 4, 8)]
+    assert sizes[0] > 10_000
+    assert sizes[0] < sizes[1] < sizes[2]
+
+
+def test_size_shrinks_when_weeks_are_dropped():
+    ledger = ledger_with_weeks(4)
+    before = approx_size(ledger)
+    ledger.drop_week(4)
+    assert approx_size(ledger) < before
+
+
+def test_lru_evicts_ledgers():
+    one_ledger = approx_size(ledger_with_weeks(6))
+    cache = LRUCache(max_bytes=int(one_ledger * 2.5))
+
+    for league in ('a', 'b', 'c'):
+        cache.set(league, ledger_with_weeks(6))
+
+    assert cache.evictions == 1
+    assert cache.get('a') is None
+    assert cache.get('c') is not None
+
+
+def test_lru_remeasures_a_grown_ledger():
+    ledger = ledger_with_weeks(1)
+    cache = LRUCache(max_bytes=10 ** 9)
+    cache.set('league', ledger)
+    small = cache.total_bytes
+
+    ledger.set_week(2, 'final', 40, fold_rows)
+    cache.set('league', ledger)
+    assert cache.total_bytes > small
@@ -0,0 +1,79 @@
+"""SQLiteBackend's running byte total and eviction."""
+import os
+import sqlite3
+
+import pytest
+
+from caching.backends import SQLITE_EVICT_TO, SQLiteBackend
+
+
+def stored_bytes(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'store.sqlite')
+
+
+def test_running_total_tracks_writes_replaces_and_deletes(path):
+    backend = SQLiteBackend(path, max_bytes=10 * 1024 * 1024)
+    for i in range(20):
+        backend.set('espn', i, 'x' * (100 * i))
+    backend.set('espn', 3, 'replaced')
+    backend.delete('espn', 5)
+    backend.delete('espn', 'never stored')
+
+    assert backend.stats()['bytes'] == stored_bytes(path)
+    assert backend.stats()['entries'] == 19
+
+
+def test_writes_under_budget_do_not_sum_the_table(path):
+    backend = SQLiteBackend(path, max_bytes=10 * 1024 * 1024)
+    backend.set('espn', 'warm', 'up')
+    statements = []
+    backend._connection().set_trace_callback(statements.append)
+
+    for i in range(10):
+        backend.set('espn', i, 'x' * 1000)
+
+    assert statements
+    assert not any('SUM(' in statement.upper() for statement in statements)
+
+
+def test_eviction_keeps_the_file_under_budget(path):
+    backend = SQLiteBackend(path, max_bytes=50_000)
+    for i in range(100):
+        backend.set('espn', i, os.urandom(2000))
+
+    assert stored_bytes(path) <= 50_000
+    assert backend.stats()['bytes'] == stored_bytes(path)
+    assert backend.stats()['evictions'] > 0
+    # Oldest entries go first
+    assert backend.get('espn', 99) is not None
+    assert backend.get('espn', 0) is None
+
+
+def test_eviction_trims_to_the_low_water_mark(path):
+    backend = SQLiteBackend(path, max_bytes=50_000)
+    i = 0
+    while not backend.stats()['evictions']:
+        backend.set('espn', i, os.urandom(2000))
+        i += 1
+
+    assert stored_bytes(path) <= 50_000 * SQLITE_EVICT_TO
+
+
+def test_total_is_shared_across_connections_and_rebuilt_for_old_files(path):
+    first = SQLiteBackend(path, max_bytes=10 * 1024 * 1024)
+    second = SQLiteBackend(path, max_bytes=10 * 1024 * 1024)
+    first.set('espn', 'a', 'x' * 5000)
+    second.set('espn', 'b', 'y' * 3000)
+    first.delete('espn', 'b')
+    assert second.stats()['bytes'] == first.stats()['bytes'] == stored_bytes(path)
+
+    # A file from before the totals table existed gets its total on open
+    with sqlite3.connect(path) as conn:
+        conn.execute('DROP TABLE totals')
+    assert SQLiteBackend(path, max_bytes=10 * 1024 * 1024).stats()['bytes'] == stored_bytes(path)
@@ -0,0 +1,51 @@
+"""StandingsEngine keys weeks on a small version token, not the bundle."""
+import copy
+
+from stats.standings import StandingsEngine, bundle_token
+
+
+def make_bundle(week, home_points, version='final'):
+    def row(player_id, points, slot_id):
+        return {
+            'player_id': player_id, 'name': f"Player {player_id}", 'position_id': 2, 'position': 'RB',
+            'slot_id': slot_id, 'points': points, 'acquisition_type': None, 'acquisition_date': None,
+        }
+    return {
+        'week': week,
+        'matchups': [{'home_id': 1, 'away_id': 2}],
+        'rosters': {1: [row(11, home_points, 2)], 2: [row(21, 10.0, 2)]},
+        'teams': {},
+        'lineup_slots': {2: 1},
+        'version': version,
+    }
+
+
+def test_engine_keeps_tokens_not_bundles():
+    engine = StandingsEngine()
+    bundles = [make_bundle(week, 20.0) for week in (1, 2)]
+    assert engine.update((b['week'], b, None) for b in bundles) == 2
+
+    assert all(token == bundle_token(bundle) for (token, _), bundle in zip(engine._weeks.values(), bundles))
+    assert not any(value is bundle for entry in engine._weeks.values() for value in entry for bundle in bundles)
+
+
+def test_reparsed_bundle_at_same_version_is_skipped():
+    engine = StandingsEngine()
+    bundle = make_bundle(1, 20.0, version='abc')
+    engine.update([(1, bundle, None)])
+
+    # A new object (e.g. re-parsed after the bundle cache evicted it) with the same version
+    assert engine.update([(1, copy.deepcopy(bundle), None)]) == 0
+
+
+def test_new_version_or_unversioned_bundle_is_recomputed():
+    engine = StandingsEngine()
+    engine.update([(1, make_bundle(1, 20.0, version='abc'), None)])
+    assert engine.standings(1, {}, lambda m, t: str(t))[0]['team_id'] == 1
+
+    assert engine.update([(1, make_bundle(1, 5.0, version='def'), None)]) == 1
+    assert engine.standings(1, {}, lambda m, t: str(t))[0]['team_id'] == 2
+
+    unversioned = make_bundle(1, 5.0, version=None)
+    assert engine.update([(1, unversioned, None)]) == 1
+    assert engine.update([(1, unversioned, None)]) == 1
@@ -0,0 +1,43 @@
+"""fetch_week_bundle versions a bundle from the same cache read as its data."""
+import pytest
+
+import espn_api
+from caching import make_key
+
+
+def league_json(team_name):
+    return {'schedule': [], 'teams': [{'id': 1, 'location': team_name, 'nickname': '', 'roster': {'entries': []}}]}
+
+
+@pytest.fixture
+def week_key(monkeypatch):
+    monkeypatch.setattr(espn_api, 'get_lineup_slot_counts', lambda league_id, year: (None, None))
+    key = make_key('bundle-race', 2025, 5, espn_api.WEEK_VIEWS)
+    espn_api.week_cache.set(key, league_json('Old'))
+    yield key
+    espn_api.week_cache._entries.delete(key)
+    espn_api.bundle_cache.delete(key)
+
+
+def test_refresh_between_read_and_version_is_not_cached(monkeypatch, week_key):
+    def fetch_then_refresh(league_id, year, week):
+        data = espn_api.week_cache.get(week_key)
+        espn_api.week_cache.set(week_key, league_json('New'))
+        return data, None
+
+    monkeypatch.setattr(espn_api, 'fetch_league_data', fetch_then_refresh)
+    bundle, error = espn_api.fetch_week_bundle('bundle-race', 2025, 5)
+
+    assert error is None
+    assert bundle['teams'][1]['team_name'] == 'Old'
+    # The old data must not be labelled with the refreshed version
+    assert bundle['version'] is None
+    assert espn_api.bundle_cache.peek(week_key) is None
+
+
+def test_bundle_carries_its_data_version(week_key):
+    bundle, _ = espn_api.fetch_week_bundle('bundle-race', 2025, 5)
+
+    assert bundle['teams'][1]['team_name'] == 'Old'
+    assert bundle['version'] == espn_api.week_cache.version(week_key)
+    assert espn_api.fetch_week_bundle('bundle-race', 2025, 5)[0] is bundle
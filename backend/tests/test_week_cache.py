@@ -0,0 +1,43 @@
+"""WeekCache.version is a probe: no stats, no LRU recency."""
+from caching import LRUCache, MemoryBackend, WeekCache, make_key
+
+
+def test_peek_leaves_stats_and_order_alone():
+    cache = LRUCache(max_bytes=3 * 100)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key, size=100)
+
+    assert cache.peek('a') == 'a'
+    assert cache.peek('missing', 'default') == 'default'
+    assert (cache.hits, cache.misses) == (0, 0)
+
+    # 'a' is still least recently used, so it's the one evicted
+    cache.set('d', 'd', size=100)
+    assert cache.peek('a') is None
+    assert cache.peek('b') == 'b'
+
+
+def test_version_does_not_count_or_touch_recency(tmp_path):
+    week_cache = WeekCache(cache_dir=tmp_path, store=MemoryBackend(1024 * 1024), max_bytes=1024 * 1024)
+    keys = [make_key('123', 2025, week, ['mMatchup']) for week in (1, 2)]
+    for key in keys:
+        week_cache.set(key, {'week': key[2]}, final=True)
+
+    before = week_cache.stats()
+    assert week_cache.version(keys[0]) == 'final'
+    assert week_cache.version(make_key('123', 2025, 3, ['mMatchup'])) is None
+    assert week_cache.stats() == before
+    assert list(week_cache._entries._entries) == keys
+
+
+def test_version_for_data_ignores_a_newer_entry(tmp_path):
+    week_cache = WeekCache(cache_dir=tmp_path, store=MemoryBackend(1024 * 1024), max_bytes=1024 * 1024)
+    key = make_key('123', 2025, 5, ['mMatchup'])
+    week_cache.set(key, {'points': 1})
+    old_data = week_cache.get(key)
+    assert week_cache.version(key, old_data) == week_cache.version(key)
+
+    # A refresh replaces the entry after old_data was read
+    week_cache.set(key, {'points': 2})
+    assert week_cache.version(key, old_data) is None
+    assert week_cache.version(key, week_cache.get(key)) == week_cache.version(key)
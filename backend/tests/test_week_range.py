@@ -0,0 +1,40 @@
+"""Week ranges clamped to the league's season plan."""
+import pytest
+
+import app as app_module
+from espn_api import SeasonPlan, clamp_week_range
+
+MID_SEASON = SeasonPlan(current_week=6, last_week=17, final_through=5)
+
+
+def test_clamp_cuts_future_weeks():
+    assert clamp_week_range(MID_SEASON, 1, 14) == (1, 6)
+    assert clamp_week_range(MID_SEASON, 2, 4) == (2, 4)
+
+
+def test_clamp_future_range_is_empty():
+    start_week, end_week = clamp_week_range(MID_SEASON, 8, 14)
+    assert end_week < start_week
+
+
+def test_clamp_without_plan_keeps_range():
+    assert clamp_week_range(None, 8, 14) == (8, 14)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module, 'get_season_plan', lambda league_id, year: (MID_SEASON, None))
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize('path', ['analyze', 'draft', 'waivers'])
+def test_future_range_is_rejected(client, path):
+    response = client.get(f'/api/league/123/{path}?start_week=8&end_week=14')
+    assert response.status_code == 400
+    assert "Week 8 hasn't been played yet (current week is 6)" in response.get_json()['error']
+
+
+def test_inverted_range_is_rejected(client):
+    response = client.get('/api/league/123/waivers?start_week=5&end_week=2')
+    assert response.status_code == 400
+    assert 'before start_week' in response.get_json()['error']
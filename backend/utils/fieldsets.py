@@ -0,0 +1,108 @@
+"""
+Sparse fieldsets for large API responses
+Routes accept `fields=` (comma-separated dotted paths of the sub-trees to
+return) and `include=` (which of the heavy sections to keep). Both are
+parsed here; the routes decide which sections are heavy and skip computing
+the ones nobody asked for.
+"""
+
+WILDCARD = '*'
+
+
+def parse_fields(value):
+    """
+    Parse a `fields=` query value into path tuples.
+
+    Args:
+        value: e.g. "league_stats,team_stats.total_points" (or None)
+
+    Returns:
+        Tuple of paths such as (('league_stats',), ('team_stats', 'total_points')),
+        or None when the parameter was absent or empty (select everything)
+    """
+    if value is None:
+        return None
+    paths = tuple(
+        tuple(segment for segment in item.strip().split('.') if segment)
+        for item in value.split(',')
+    )
+    paths = tuple(path for path in paths if path)
+    return paths or None
+
+
+def parse_include(value, sections):
+    """
+    Parse an `include=` query value against a route's heavy sections.
+
+    Args:
+        value: e.g. "advanced_stats" (or None); "none" or an empty value
+            keeps none of them
+        sections: Heavy section names the route knows about
+
+    Returns:
+        (included, error): frozenset of included sections (all of them when
+        the parameter is absent), or an error message for unknown names
+    """
+    if value is None:
+        return frozenset(sections), None
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    names.discard('none')
+    unknown = sorted(names - set(sections))
+    if unknown:
+        return None, f"Unknown include section(s): {', '.join(unknown)} (expected {', '.join(sections)})"
+    return frozenset(names), None
+
+
+def _segments_match(a, b):
+    return a == b or a == WILDCARD or b == WILDCARD
+
+
+def selects(paths, target):
+    """
+    Whether a fieldset returns any part of the sub-tree at `target`.
+    True when a path is a prefix of the target or lies inside it.
+
+    Args:
+        paths: Parsed fieldset (None selects everything)
+        target: Path tuple, may use '*' for any key
+    """
+    if paths is None:
+        return True
+    for path in paths:
+        if all(_segments_match(a, b) for a, b in zip(path, target)):
+            return True
+    return False
+
+
+def select_fields(data, paths):
+    """
+    Project a response onto a fieldset. Returns new containers and never
+    mutates `data` (analysis results are shared between requests).
+
+    Args:
+        data: Response dict
+        paths: Parsed fieldset (None returns data unchanged). A '*' segment
+            matches every key at that level; paths to missing keys are ignored.
+
+    Returns:
+        Dict holding only the selected sub-trees
+    """
+    if paths is None:
+        return data
+    if any(len(path) == 0 for path in paths):
+        return data
+    if not isinstance(data, dict):
+        return data
+
+    result = {}
+    for key, value in data.items():
+        rest = [path[1:] for path in paths if _segments_match(path[0], str(key))]
+        if not rest:
+            continue
+        result[key] = value if any(len(path) == 0 for path in rest) else select_fields(value, rest)
+    return result
+
+
+def drop_sections(data, sections):
+    """Shallow copy of a dict without the given keys."""
+    return {key: value for key, value in data.items() if key not in sections}
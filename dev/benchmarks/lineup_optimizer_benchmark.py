@@ -0,0 +1,131 @@
+"""
+Lineup optimizer benchmark: per-roster calculate_optimal_lineup vs the
+batched calculate_optimal_lineups / optimize_lineups_batch.
+
+Uses the real rosters in dev/test-data/analyze.json (every team-week) as
+PlayerWeek rows, like the season pipeline builds them. Cases are one week
+(a single matchup week's rosters), the whole range (what fold_weeks
+optimizes in one call), and the range tiled to simulate bigger leagues and
+multi-season runs. Checks that every path picks the same players for every
+roster before timing them.
+
+Columns (all bypass the roster-fingerprint cache except memoized):
+    per-roster  calculate_optimal_lineup on each roster
+    per-week    one batch per week of rosters (the old per-bundle batching)
+    one batch   a single optimize_lineups_batch call over every roster
+    auto        calculate_optimal_lineups as the pipeline calls it (one
+                batch, or per-roster below BATCH_MIN_ROSTERS)
+    memoized    the same call with every roster already cached
+
+Usage:
+    python dev/benchmarks/lineup_optimizer_benchmark.py [--repeat N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from stats.lineup_optimizer import (  # noqa: E402
+    BATCH_MIN_ROSTERS,
+    calculate_optimal_lineup,
+    calculate_optimal_lineups,
+    encode_rosters,
+    get_optimal_total,
+    lineup_cache,
+    optimize_lineups_batch,
+)
+from stats.player_week import PlayerWeek  # noqa: E402
+
+TEST_DATA = os.path.join(ROOT, 'dev', 'test-data', 'analyze.json')
+
+
+def _row(player):
+    return PlayerWeek(player.get('player_id'), player['name'], player['position'],
+                      player['actual_position'], player.get('slot_id'), player['points'])
+
+
+def load_rosters():
+    """Every team-week as (starters, bench) PlayerWeek lists, grouped by week."""
+    with open(TEST_DATA) as f:
+        data = json.load(f)
+    by_week = {}
+    for ts in data['team_stats'].values():
+        for wd in ts['weekly_data']:
+            by_week.setdefault(wd['week'], []).append(
+                ([_row(p) for p in wd['starters']], [_row(p) for p in wd['bench']])
+            )
+    return [rosters for _week, rosters in sorted(by_week.items())]
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check_identical(rosters):
+    lineup_cache.clear()
+    uncached = calculate_optimal_lineups(rosters, use_cache=False)
+    cold = calculate_optimal_lineups(rosters)
+    batched = calculate_optimal_lineups(rosters)
+    for lineups in (uncached, cold):
+        if [[(pos, id(p)) for pos, p in lineup] for lineup in lineups] != \
+                [[(pos, id(p)) for pos, p in lineup] for lineup in batched]:
+            raise SystemExit('Memoized lineups differ from freshly optimized ones')
+    points, positions, keys, _players = encode_rosters(rosters)
+    totals, selected, _slots = optimize_lineups_batch(points, positions, keys)
+    for roster, lineup, total, mask in zip(rosters, batched, totals.tolist(), selected.tolist()):
+        expected = calculate_optimal_lineup(*roster)
+        if [(pos, id(p)) for pos, p in expected] != [(pos, id(p)) for pos, p in lineup]:
+            raise SystemExit('Batched lineup differs from calculate_optimal_lineup')
+        if expected and get_optimal_total(expected) != total:
+            raise SystemExit('Batched total differs from get_optimal_total')
+        picked = {id(p) for _pos, p in expected}
+        if [id(p) in picked for p in roster[0] + roster[1]] != mask[:len(roster[0]) + len(roster[1])]:
+            raise SystemExit('Batched selection mask differs from calculate_optimal_lineup')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5, help='timing runs per case (best is reported)')
+    args = parser.parse_args()
+
+    weeks = load_rosters()
+    base = [roster for week in weeks for roster in week]
+    check_identical(base)
+    print(f"{len(base)} team-weeks ({len(weeks)} weeks) from {os.path.relpath(TEST_DATA, ROOT)}: "
+          f"batched results identical")
+    print(f"BATCH_MIN_ROSTERS = {BATCH_MIN_ROSTERS}")
+    print()
+    print(f"{'case':>12}  {'rosters':>7}  {'per-roster':>10}  {'per-week':>9}  {'one batch':>9}  "
+          f"{'auto':>8}  {'memoized':>8}  {'speedup':>7}")
+
+    cases = [('one week', [weeks[0]])] + [
+        (label, weeks * tiles) for label, tiles in (('full range', 1), ('range x4', 4), ('range x20', 20))
+    ]
+    for label, case_weeks in cases:
+        rosters = [roster for week in case_weeks for roster in week]
+
+        loop = best_of(lambda: [calculate_optimal_lineup(s, b) for s, b in rosters], args.repeat)
+        per_week = best_of(
+            lambda: [calculate_optimal_lineups(week, use_cache=False, batch_min=0) for week in case_weeks],
+            args.repeat
+        )
+        batch = best_of(lambda: calculate_optimal_lineups(rosters, use_cache=False, batch_min=0), args.repeat)
+        auto = best_of(lambda: calculate_optimal_lineups(rosters, use_cache=False), args.repeat)
+        calculate_optimal_lineups(rosters)
+        memo = best_of(lambda: calculate_optimal_lineups(rosters), args.repeat)
+
+        print(f"{label:>12}  {len(rosters):>7}  {loop * 1000:>8.2f}ms  {per_week * 1000:>7.2f}ms  "
+              f"{batch * 1000:>7.2f}ms  {auto * 1000:>6.2f}ms  {memo * 1000:>6.2f}ms  {loop / auto:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -54,6 +54,15 @@ const DataCache = {
         }).catch(() => {});
     },
 
+    /** Remove one URL's cached data */
+    remove(url) {
+        const key = this.keyFrom(url);
+        delete this._memory[key];
+        try {
+            sessionStorage.removeItem('ffw_' + key);
+        } catch (e) {}
+    },
+
     /** Clear all cache */
     clear() {
         this._memory = {};